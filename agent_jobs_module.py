@@ -0,0 +1,250 @@
+# agent_jobs_module.py
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# Aynı anda çalışan SQL agent işleri; her biri bir LLM oturumu ve bir veritabanı bağlantısı tutar
+SQL_AGENT_WORKERS = int(os.getenv('SQL_AGENT_WORKERS', '2'))
+# Çalışan + kuyrukta bekleyen en fazla iş; aşılırsa istek hemen reddedilir
+SQL_AGENT_MAX_PENDING = int(os.getenv('SQL_AGENT_MAX_PENDING', str(SQL_AGENT_WORKERS * 4)))
+# Bir işin kuyrukta bekleme dahil toplam süresi; aşılırsa iş iptal edilir
+SQL_AGENT_TIMEOUT_SECONDS = float(os.getenv('SQL_AGENT_TIMEOUT_SECONDS', '60'))
+# Tek bir LLM isteğinin ve tek bir Oracle çağrısının üst sınırı
+SQL_AGENT_LLM_TIMEOUT_SECONDS = float(os.getenv('SQL_AGENT_LLM_TIMEOUT_SECONDS', '30'))
+SQL_AGENT_DB_CALL_TIMEOUT_MS = int(os.getenv('SQL_AGENT_DB_CALL_TIMEOUT_MS', '30000'))
+# /admin/sql-jobs yanıtında gösterilen tamamlanmış iş sayısı
+SQL_AGENT_RECENT_JOBS = int(os.getenv('SQL_AGENT_RECENT_JOBS', '20'))
+
+QUEUED = 'queued'
+RUNNING = 'running'
+CANCELLING = 'cancelling'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class AgentExecutorOverloaded(Exception):
+    """İş kuyruğu dolu olduğunda fırlatılır; istemciye 503 dönülmelidir."""
+    pass
+
+
+class AgentJobCancelled(Exception):
+    """İptal edilen bir işin bir sonraki adımında fırlatılır."""
+    pass
+
+
+class AgentJobTimeout(Exception):
+    """İş süresi dolduğunda fırlatılır; iş bu noktada iptal edilmiştir."""
+    pass
+
+
+class AgentJob:
+    """Tek bir SQL agent çalışması; iptal bayrağını ve kullandığı Oracle bağlantılarını taşır."""
+
+    def __init__(self, question, user_id=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.question = question
+        self.user_id = user_id
+        self.state = QUEUED
+        self.error = None
+        self.cancel_reason = None
+        self.submitted_at = time.time()
+        # İşin bitmesi gereken an; LLM isteklerinin zaman aşımı bununla sınırlanır
+        self.deadline = None
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.future = None
+        self._connections = set()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise AgentJobCancelled(f"İş iptal edildi: {self.cancel_reason}")
+
+    def remaining(self):
+        """Süre sınırına kalan saniye; sınır yoksa None."""
+        return None if self.deadline is None else self.deadline - time.time()
+
+    def attach_connection(self, connection):
+        """İşin o anda sorgu çalıştırdığı DB-API bağlantısını kaydeder."""
+        with self._lock:
+            self._connections.add(connection)
+        # İptal, bağlantı kaydedilmeden hemen önce gelmiş olabilir
+        if self.cancel_event.is_set():
+            self._cancel_connection(connection)
+
+    def detach_connection(self, connection):
+        with self._lock:
+            self._connections.discard(connection)
+
+    @staticmethod
+    def _cancel_connection(connection):
+        try:
+            connection.cancel()
+        except Exception as e:
+            print(f"Oracle çağrısı iptal edilemedi: {str(e)}")
+
+    def cancel(self, reason):
+        """İşi iptal eder; çalışan Oracle çağrıları Connection.cancel() ile kesilir."""
+        with self._lock:
+            if self.cancel_event.is_set() or self.state in (SUCCEEDED, FAILED, CANCELLED):
+                return False
+            self.cancel_reason = reason
+            self.cancel_event.set()
+            connections = list(self._connections)
+            if self.state == RUNNING:
+                self.state = CANCELLING
+        for connection in connections:
+            self._cancel_connection(connection)
+        return True
+
+    def to_dict(self):
+        now = time.time()
+        return {
+            'id': self.id,
+            'question': self.question,
+            'user_id': self.user_id,
+            'state': self.state,
+            'error': self.error,
+            'cancel_reason': self.cancel_reason,
+            'submitted_at': self.submitted_at,
+            'queued_ms': round(((self.started_at or now) - self.submitted_at) * 1000, 2),
+            'running_ms': round(((self.finished_at or now) - self.started_at) * 1000, 2) if self.started_at else None,
+            'active_db_calls': len(self._connections),
+        }
+
+
+class AgentJobExecutor:
+    """SQL agent işlerini sınırlı bir thread havuzunda çalıştırır.
+
+    Kuyruk doluysa yeni iş kabul edilmez. Süresi dolan işler sadece HTTP yanıtı dönülerek bırakılmaz;
+    iptal bayrağı kaldırılır, çalışan Oracle çağrısı kesilir ve kuyruktaki iş hiç başlatılmaz.
+    LLM istekleri işin süre sınırını aşamaz (sql_agent_module.JobDeadlineTransport); zaman aşımında
+    sürmekte olan istek de bu sınırda kesilir. Admin iptalinde ise sürmekte olan istek en geç işin
+    süre sınırında biter ve iş o ana kadar 'cancelling' durumunda slotunu tutar.
+    """
+
+    def __init__(self, workers=SQL_AGENT_WORKERS, max_pending=SQL_AGENT_MAX_PENDING,
+                 timeout=SQL_AGENT_TIMEOUT_SECONDS, recent=SQL_AGENT_RECENT_JOBS):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sql-agent')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.jobs = {}
+        self.recent = deque(maxlen=recent)
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.cancelled = 0
+
+    def current_job(self):
+        """Çağıran thread'de çalışan işi döndürür (yoksa None)."""
+        return getattr(self._local, 'job', None)
+
+    def _run(self, job, func):
+        with self._lock:
+            if job.cancelled:
+                return None
+            job.state = RUNNING
+            job.started_at = time.time()
+        self._local.job = job
+        try:
+            return func(job)
+        finally:
+            self._local.job = None
+
+    def _finished(self, job, future):
+        self._slots.release()
+        with self._lock:
+            job.finished_at = time.time()
+            if job.cancelled:
+                job.state = CANCELLED
+                self.cancelled += 1
+            elif future.exception() is not None:
+                job.state = FAILED
+                job.error = str(future.exception())
+                self.failed += 1
+            else:
+                job.state = SUCCEEDED
+                self.completed += 1
+            self.jobs.pop(job.id, None)
+            self.recent.appendleft(job)
+
+    def submit(self, func, question, user_id=None):
+        """func(job) çağrısını kuyruğa ekler; kuyruk doluysa AgentExecutorOverloaded fırlatır."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise AgentExecutorOverloaded("SQL agent iş kuyruğu dolu")
+        job = AgentJob(question, user_id)
+        job.deadline = job.submitted_at + self.timeout
+        with self._lock:
+            self.jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job, func)
+        job.future.add_done_callback(lambda future: self._finished(job, future))
+        return job
+
+    def wait(self, job, timeout=None):
+        """İşin sonucunu bekler; süre dolarsa işi iptal eder ve AgentJobTimeout fırlatır."""
+        timeout = self.timeout if timeout is None else timeout
+        remaining = timeout - (time.time() - job.submitted_at)
+        try:
+            result = job.future.result(timeout=max(remaining, 0))
+        except FutureTimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            self.cancel(job.id, f"zaman aşımı ({timeout:g} saniye)")
+            raise AgentJobTimeout(f"SQL agent işi {timeout:g} saniyede tamamlanamadı")
+        if job.cancelled:
+            raise AgentJobCancelled(f"İş iptal edildi: {job.cancel_reason}")
+        return result
+
+    def cancel(self, job_id, reason='admin isteği'):
+        """Kuyruktaki işi başlatmadan düşürür, çalışan işi iptal eder."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            return False
+        if not job.cancel(reason):
+            return False
+        print(f"SQL agent işi iptal edildi ({job.id}): {reason}")
+        # Henüz başlamamış iş thread havuzundan çıkarılır; _finished yine de slotu bırakır
+        job.future.cancel()
+        return True
+
+    def list_jobs(self):
+        with self._lock:
+            active = sorted(self.jobs.values(), key=lambda job: job.submitted_at)
+            return {
+                'running': [job.to_dict() for job in active if job.state in (RUNNING, CANCELLING)],
+                'queued': [job.to_dict() for job in active if job.state == QUEUED],
+                'recent': [job.to_dict() for job in self.recent],
+            }
+
+    def stats(self):
+        with self._lock:
+            states = [job.state for job in self.jobs.values()]
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'timeout_seconds': self.timeout,
+                'running': sum(state in (RUNNING, CANCELLING) for state in states),
+                'queued': states.count(QUEUED),
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'cancelled': self.cancelled,
+            }
@@ -1,33 +1,46 @@
-from flask import Flask, request, jsonify, make_response, Response
+from flask import Flask, request, jsonify, make_response, Response, stream_with_context, g
 import jwt
 from flask_cors import CORS
 import oracledb
-import bcrypt
 import os
 from functools import wraps
 from dotenv import load_dotenv
 from datetime import datetime, timedelta, timezone
 from abc import ABC, abstractmethod
 from contextlib import contextmanager
+import click
+import json
+import base64
+import time
+from decimal import Decimal, ROUND_HALF_UP
 
 
-
-
-# Güncel LangChain import'ları
-from langchain_community.utilities.sql_database import SQLDatabase
-from langchain_openai import ChatOpenAI
-from langchain.agents import create_sql_agent
-from langchain.agents.agent_types import AgentType
-from langchain.agents.agent_toolkits import SQLDatabaseToolkit
-
-from rag_module import RAGSystem
+import db_module
+from cache_module import ReadThroughCache
+from auth_module import TokenVerifier
+from rate_limit_module import RateLimiter
+from password_module import PasswordHasher, PasswordHasherOverloaded
+from leaderboard_module import LeaderboardService, BOARD_METRICS, LEADERBOARD_MAX_N
+from startup_module import SubsystemRegistry, STARTUP_WARMUP
+from question_router_module import QuestionRouter
+from schema_cache_module import SchemaCache
+from sql_cache_module import SQLQueryCache, READ_ONLY_PATTERN
+from query_runner_module import (
+    run_select, stream_select_ndjson, SQL_FALLBACK_MAX_ROWS, SQL_FALLBACK_STREAM_MAX_ROWS
+)
+from query_guard_module import QueryGuard
+from agent_jobs_module import (
+    AgentJobExecutor, AgentExecutorOverloaded, AgentJobCancelled, AgentJobTimeout,
+    SQL_AGENT_TIMEOUT_SECONDS, SQL_AGENT_LLM_TIMEOUT_SECONDS, SQL_AGENT_DB_CALL_TIMEOUT_MS
+)
 
 # .env dosyasını yükle
 load_dotenv()
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev_secret_key')
-CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True, expose_headers=["New-Token"])
+CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True,
+     expose_headers=["Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining"])
 
 
 # Oracle bağlantı bilgileri
@@ -39,11 +52,16 @@ oracle_sid = os.getenv('ORACLE_SID', 'XE')
 
 oracle_connection_string = f"{oracle_user}/{oracle_password}@{oracle_host}:{oracle_port}/{oracle_sid}"
 
-# RAG sistemi örneğini oluştur (dosya başında, global seviyede)
-try:
+# Ağır alt sistemler (RAG, SQL agent) import sırasında değil, arka planda veya ilk kullanımda hazırlanır
+subsystems = SubsystemRegistry()
+
+def init_rag_system():
+    """RAG sistemini oluşturur, indeks yoksa ilk indekslemeyi yapar."""
+    # rag_module LangChain/Chroma'yı yüklediği için import da geciktirilir
+    from rag_module import RAGSystem
     rag_system = RAGSystem()
     # İlk çalıştırmada indeks oluştur
-    if not os.path.exists(rag_system.persist_directory):
+    if not rag_system.vectordb:
         print("RAG indeksi oluşturuluyor...")
         success = rag_system.index_documents()
         if success:
@@ -51,10 +69,8 @@ try:
         else:
             print("RAG indeksi oluşturulamadı!")
     else:
-        print(f"Var olan RAG indeksi kullanılıyor: {rag_system.persist_directory}")
-except Exception as e:
-    print(f"RAG sistemi başlatma hatası: {str(e)}")
-    rag_system = None
+        print(f"Var olan RAG indeksi kullanılıyor: {rag_system.generation_dir}")
+    return rag_system
 
 # Güncel kurulum kodu
 def setup_langchain_sql_agent():
@@ -68,6 +84,14 @@ def setup_langchain_sql_agent():
     print(f"OpenAI API Anahtarı bulundu.")
     
     try:
+        # Güncel LangChain import'ları (açılışı yavaşlatmamak için burada yüklenir)
+        from langchain_openai import ChatOpenAI
+        from langchain.agents import create_sql_agent
+        from langchain.agents.agent_types import AgentType
+        from langchain.agents.agent_toolkits import SQLDatabaseToolkit
+        import httpx
+        from sql_agent_module import CachedSQLDatabase, JobDeadlineTransport, install_cancellation_hooks
+
         # Çalışan Oracle bağlantısını kullan
         oracle_user = os.getenv('ORACLE_USER', 'C##COSMIC_DEFENDERS')
         oracle_password = os.getenv('ORACLE_PASSWORD', 'MyPassword123')
@@ -95,17 +119,26 @@ def setup_langchain_sql_agent():
             db_url = f"oracle+oracledb://{oracle_user}:{oracle_password}@{oracle_host}:{oracle_port}/{oracle_sid}"
             print(f"Alternatif bağlantı URL'si deneniyor: {db_url}")
         
-        # SQLDatabase oluştur
-        db = SQLDatabase.from_uri(
+        # SQLDatabase oluştur; tablo bilgisi ve örnek satırlar DDL parmak iziyle anahtarlanan
+        # şema önbelleğinden gelir, şema değişmedikçe yeniden yansıtılmaz
+        db = CachedSQLDatabase.from_uri(
             db_url,
+            schema_cache=schema_cache,
+            query_guard=query_guard,
             sample_rows_in_table_info=3,
         )
+        # Agent'ın Oracle çağrıları süre sınırlı ve iptal edilebilir olsun
+        install_cancellation_hooks(db._engine, agent_jobs, SQL_AGENT_DB_CALL_TIMEOUT_MS)
         
-        # LLM modeli oluştur (ChatOpenAI)
+        # LLM modeli oluştur (ChatOpenAI); tek bir isteğin süresi sınırlandırılır ve
+        # işin kalan süresini aşamaz, süresi dolan işin isteği de kesilir
         llm = ChatOpenAI(
             temperature=0,
             api_key=openai_api_key,
             model="gpt-3.5-turbo",
+            timeout=SQL_AGENT_LLM_TIMEOUT_SECONDS,
+            max_retries=1,
+            http_client=httpx.Client(transport=JobDeadlineTransport(agent_jobs)),
         )
         
         # SQL toolkit oluştur
@@ -121,6 +154,7 @@ def setup_langchain_sql_agent():
             verbose=True,
             agent_type=AgentType.OPENAI_FUNCTIONS,
             max_iterations=5,
+            max_execution_time=SQL_AGENT_TIMEOUT_SECONDS,
             handle_parsing_errors=True
         )
         
@@ -140,16 +174,9 @@ class DatabaseManager:
 
     @contextmanager
     def get_connection(self):
-        conn = None
-        try:
-            conn = oracledb.connect(self.connection_string)
+        # Bağlantılar paylaşılan oturum havuzundan ödünç alınır
+        with db_module.get_db_connection() as conn:
             yield conn
-        finally:
-            if conn:
-                try:
-                    conn.close()
-                except Exception as e:
-                    print(f"Error closing connection: {e}")
 
     def execute_query(self, query, params=None):
         with self.get_connection() as conn:
@@ -163,22 +190,91 @@ class DatabaseManager:
 
 db_manager = DatabaseManager(oracle_connection_string)
 
+# user_id ile anahtarlanan okuma önbellekleri. Çoklu worker dağıtımında
+# shared_backend olarak cache_module.SharedDictCacheBackend verilebilir (bu durumda
+# süreç içi katman atlanır ve invalidate() tüm worker'lara etki eder).
+player_stats_cache = ReadThroughCache('player_stats')
+user_info_cache = ReadThroughCache('user_info')
+
+def invalidate_user_caches(user_id):
+    """Profil, rol veya skor değiştiğinde kullanıcının önbellek kayıtlarını siler."""
+    player_stats_cache.invalidate(user_id)
+    user_info_cache.invalidate(user_id)
 
-sql_agent = setup_langchain_sql_agent()
+
+def init_database():
+    """Oturum havuzunu oluşturur ve veritabanına erişilebildiğini doğrular."""
+    db_manager.execute_query("SELECT 1 FROM DUAL")
+    return db_module.get_pool()
+
+def init_leaderboard():
+    """Liderlik tablolarını ilk kez yükler ve periyodik uzlaştırmayı başlatır."""
+    leaderboard.reconcile()
+    leaderboard.start()
+    return leaderboard
+
+database_subsystem = subsystems.register('database', init_database)
+rag_subsystem = subsystems.register('rag', init_rag_system, required=False)
+sql_agent_subsystem = subsystems.register('sql_agent', setup_langchain_sql_agent, required=False)
+leaderboard_subsystem = subsystems.register('leaderboard', init_leaderboard, required=False)
 
 @contextmanager
 def get_db_connection():
-    """Database connection context manager"""
-    conn = None
-    try:
-        conn = oracledb.connect(oracle_connection_string)
+    """Database connection context manager (paylaşılan havuzdan)"""
+    with db_module.get_db_connection() as conn:
         yield conn
-    finally:
-        if conn:
-            try:
-                conn.close()
-            except Exception as e:
-                print(f"Error closing connection: {e}")
+
+# SQL agent'ın tablo bilgisi önbelleği (diskte paylaşılır, şema değişince yenilenir)
+schema_cache = SchemaCache(get_db_connection)
+# Agent'ın ve doğrudan çalıştırılan admin SQL'lerinin EXPLAIN PLAN tabanlı maliyet koruması
+query_guard = QueryGuard(get_db_connection)
+# SQL agent işleri için paylaşılan, sınırlı ve iptal edilebilir iş havuzu
+agent_jobs = AgentJobExecutor()
+# Tekrar eden admin sorularını LLM'e gitmeden çalıştırmak için agent'ın ürettiği SQL'ler
+sql_query_cache = SQLQueryCache()
+
+def current_schema_version():
+    """Şema önbelleğinin DDL parmak izi; okunamazsa None."""
+    try:
+        return schema_cache.fingerprint()
+    except Exception as e:
+        print(f"Şema parmak izi okunamadı: {str(e)}")
+        return None
+
+def requested_max_rows(data, limit):
+    """İstekteki max_rows değerini yapılandırılmış üst sınıra göre kırpar."""
+    try:
+        max_rows = int(data.get('max_rows') or limit)
+    except (TypeError, ValueError):
+        max_rows = limit
+    return max(1, min(max_rows, limit))
+
+def guard_rejected_response(decision):
+    return jsonify({
+        'success': False,
+        'message': 'Sorgu maliyet koruması tarafından reddedildi',
+        'guard': decision.to_dict()
+    }), 403
+
+def run_admin_select(sql, max_rows=SQL_FALLBACK_MAX_ROWS):
+    """Admin SELECT'ini satır/bayt bütçesiyle, commit etmeden ve tipli değerlerle çalıştırır."""
+    return run_select(get_db_connection, sql, max_rows=max_rows, call_timeout_ms=SQL_AGENT_DB_CALL_TIMEOUT_MS)
+
+# Bellekte tutulan liderlik tabloları; leaderboard alt sistemi başlatıldığında (arka plan ısınmasında
+# veya lazy modda ilk kullanımda) player_stats'tan yüklenir ve periyodik olarak uzlaştırılır
+leaderboard = LeaderboardService(get_db_connection)
+
+def ensure_leaderboard():
+    """Tablo hazır değilse yüklemeyi arka planda tetikler; isteği bekletmez."""
+    if not leaderboard.ready:
+        leaderboard_subsystem.start_initialize()
+    return leaderboard.ready
+
+# Kesin cevabı olan istatistik soruları RAG'e gitmeden SQL/liderlik tablosundan yanıtlanır
+question_router = QuestionRouter(get_db_connection, leaderboard)
+
+if STARTUP_WARMUP == 'background':
+    subsystems.start_background_warmup()
 
 class BaseModel:
     def __init__(self, db_manager):
@@ -190,23 +286,189 @@ class PlayerStats(BaseModel):
         self.user_id = user_id
 
     def get_stats(self):
+        # Skor geçmişi yerine player_stats özet tablosundan tek satır okunur
         query = """
-            SELECT games_played, wins, losses, total_score, highest_score
-            FROM player_stats
-            WHERE user_id = :1
+            SELECT 
+                u.username,
+                pp.nickname,
+                pp.player_level,
+                pp.experience_points,
+                COALESCE(ps.games_played, 0),
+                COALESCE(ps.total_score, 0),
+                COALESCE(ps.highest_score, 0),
+                COALESCE(ps.enemies_defeated, 0),
+                COALESCE(ps.resources_collected, 0)
+            FROM users u
+            JOIN player_profiles pp ON u.user_id = pp.user_id
+            LEFT JOIN player_stats ps ON pp.profile_id = ps.profile_id
+            WHERE u.user_id = :1
         """
         result = self.db_manager.execute_query(query, (self.user_id,))
         if result:
             stats = result[0]
             return {
-                "games": stats[0],
-                "wins": stats[1],
-                "losses": stats[2],
-                "total_score": stats[3],
-                "highest_score": stats[4]
+                "username": stats[0],
+                "nickname": stats[1],
+                "level": stats[2],
+                "deneyim": stats[3],
+                "total_games": stats[4],
+                "total_score": stats[5],
+                "highest_score": stats[6],
+                "enemies_defeated": stats[7],
+                "resources_collected": stats[8]
             }
         return None
 
+# Tek istekte kabul edilen en fazla skor sayısı (Oracle IN listesi sınırı 1000)
+SCORE_BATCH_MAX_ROWS = min(int(os.getenv('SCORE_BATCH_MAX_ROWS', '1000')), 1000)
+
+class ScoreBatchWriter(BaseModel):
+    """Birden fazla oyun sonucunu dizi bağlama (array DML) ile tek transaction'da yazar."""
+
+    REQUIRED_FIELDS = ('profile_id', 'score', 'game_duration')
+
+    @staticmethod
+    def _xp_for_score(score):
+        # PL/SQL ROUND(p_score / 10) ile aynı yuvarlama (yarımlar sıfırdan uzağa)
+        return int((Decimal(str(score)) / 10).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+    def _validate(self, row):
+        if not isinstance(row, dict):
+            return None, 'Satır bir nesne olmalı'
+        for field in self.REQUIRED_FIELDS:
+            if row.get(field) is None:
+                return None, f"'{field}' alanı gerekli"
+        values = {}
+        for field in ('profile_id', 'score', 'game_duration', 'enemies_defeated', 'resources_collected'):
+            value = row.get(field, 0)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return None, f"'{field}' sayısal olmalı"
+            if value < 0:
+                return None, f"'{field}' negatif olamaz"
+            values[field] = value
+        # 12.7 gibi bir kimlik sessizce 12'ye yuvarlanıp başka bir profile yazılmamalı
+        if isinstance(values['profile_id'], float) and not values['profile_id'].is_integer():
+            return None, "'profile_id' tam sayı olmalı"
+        values['profile_id'] = int(values['profile_id'])
+        return values, None
+
+    def _profile_owners(self, cursor, profile_ids):
+        binds = {f"p{i}": pid for i, pid in enumerate(profile_ids)}
+        cursor.execute(
+            f"SELECT profile_id, user_id FROM player_profiles WHERE profile_id IN ({', '.join(':' + b for b in binds)})",
+            binds
+        )
+        return dict(cursor.fetchall())
+
+    def write(self, rows, owner_user_id=None):
+        """Skorları yazar. owner_user_id verilirse sadece o kullanıcının profillerine izin verilir.
+
+        Dönüş: {'inserted': n, 'failed': [{'index': i, 'error': msg}], 'user_ids': set(), 'profile_ids': set()}
+        """
+        failed = []
+        valid = []
+        for index, row in enumerate(rows):
+            values, error = self._validate(row)
+            if error:
+                failed.append({'index': index, 'error': error})
+            else:
+                valid.append((index, values))
+
+        if not valid:
+            return {'inserted': 0, 'failed': failed, 'user_ids': set(), 'profile_ids': set()}
+
+        with self.db_manager.get_connection() as conn:
+            cursor = conn.cursor()
+
+            owners = self._profile_owners(cursor, sorted({v['profile_id'] for _, v in valid}))
+            accepted = []
+            for index, values in valid:
+                owner = owners.get(values['profile_id'])
+                if owner is None:
+                    failed.append({'index': index, 'error': 'Profil bulunamadı'})
+                elif owner_user_id is not None and owner != owner_user_id:
+                    failed.append({'index': index, 'error': 'Bu profil için skor gönderme yetkiniz yok'})
+                else:
+                    accepted.append((index, values))
+
+            if not accepted:
+                return {'inserted': 0, 'failed': sorted(failed, key=lambda f: f['index']), 'user_ids': set(), 'profile_ids': set()}
+
+            # Skorları tek çağrıda ekle; hatalı satırlar tüm partiyi durdurmaz
+            cursor.executemany("""
+                INSERT INTO game_scores (profile_id, score, game_duration, enemies_defeated, resources_collected, game_date)
+                VALUES (:profile_id, :score, :game_duration, :enemies_defeated, :resources_collected, SYSDATE)
+            """, [values for _, values in accepted], batcherrors=True)
+
+            failed_offsets = set()
+            for batch_error in cursor.getbatcherrors():
+                failed_offsets.add(batch_error.offset)
+                failed.append({'index': accepted[batch_error.offset][0], 'error': batch_error.message})
+
+            # Başarılı satırları profil bazında topla
+            totals = {}
+            for offset, (_, values) in enumerate(accepted):
+                if offset in failed_offsets:
+                    continue
+                t = totals.setdefault(values['profile_id'], {
+                    'profile_id': values['profile_id'], 'games': 0, 'xp': 0, 'total_score': 0,
+                    'highest_score': 0, 'enemies': 0, 'resources': 0
+                })
+                t['games'] += 1
+                t['xp'] += self._xp_for_score(values['score'])
+                t['total_score'] += values['score']
+                t['highest_score'] = max(t['highest_score'], values['score'])
+                t['enemies'] += values['enemies_defeated']
+                t['resources'] += values['resources_collected']
+
+            if totals:
+                # Satır kilitleri her partide aynı sırayla alınır; eşzamanlı partiler ORA-00060 ile kilitlenmez
+                ordered = [totals[pid] for pid in sorted(totals)]
+
+                # Deneyim ve seviye güncellemesi: parti başına tek ifade
+                cursor.executemany("""
+                    UPDATE player_profiles
+                    SET experience_points = experience_points + :xp,
+                        player_level = FLOOR(SQRT(experience_points + :xp) / 10) + 1
+                    WHERE profile_id = :profile_id
+                """, [{'xp': t['xp'], 'profile_id': t['profile_id']} for t in ordered])
+
+                # Eksik istatistik satırları önce eklenir; eşzamanlı bir parti aynı satırı eklediyse
+                # ORA-00001 yok sayılır. İki partinin aynı profil için MERGE ile INSERT yarışı böylece oluşmaz.
+                cursor.executemany("""
+                    INSERT INTO player_stats (profile_id)
+                    SELECT :profile_id FROM dual
+                    WHERE NOT EXISTS (SELECT 1 FROM player_stats WHERE profile_id = :profile_id)
+                """, [{'profile_id': t['profile_id']} for t in ordered], batcherrors=True)
+                for batch_error in cursor.getbatcherrors():
+                    if batch_error.code != 1:
+                        raise oracledb.DatabaseError(batch_error)
+
+                cursor.executemany("""
+                    UPDATE player_stats SET
+                        games_played = games_played + :games,
+                        total_score = total_score + :total_score,
+                        highest_score = GREATEST(highest_score, :highest_score),
+                        enemies_defeated = enemies_defeated + :enemies,
+                        resources_collected = resources_collected + :resources,
+                        last_game_date = SYSDATE,
+                        updated_at = SYSTIMESTAMP
+                    WHERE profile_id = :profile_id
+                """, [{k: t[k] for k in ('profile_id', 'games', 'total_score', 'highest_score', 'enemies', 'resources')}
+                      for t in ordered])
+
+            conn.commit()
+
+        return {
+            'inserted': len(accepted) - len(failed_offsets),
+            'failed': sorted(failed, key=lambda f: f['index']),
+            'user_ids': {owners[pid] for pid in totals},
+            'profile_ids': set(totals),
+        }
+
+# Token geçerlilik süresi (saat)
+JWT_EXPIRY_HOURS = float(os.getenv('JWT_EXPIRY_HOURS', '24'))
+
 # Kullanıcı rol sınıfları için temel sınıf
 class UserRole(ABC):
     @property
@@ -221,7 +483,8 @@ class UserRole(ABC):
     
     @property
     def token_expiry(self):
-        return timedelta(hours=1)
+        # Token'lar artık her istekte yeniden imzalanmadığı için uzun ömürlüdür
+        return timedelta(hours=JWT_EXPIRY_HOURS)
     
     def can_access_endpoint(self, endpoint):
     # Oyuncular için kısıtlı endpoint erişimleri
@@ -240,13 +503,17 @@ class PlayerRole(UserRole):
     
     @property
     def rate_limit(self):
-        return 5  # Player için rate limit 5
+        return 5  # Player için rate limit: pencere başına 5 istek
     
     def can_access_endpoint(self, endpoint):
         player_allowed_endpoints = [
             '/protected-endpoint',
             '/player-stats',
-            '/refresh-token'
+            '/refresh-token',
+            '/scores/batch',
+            '/leaderboard/top',
+            '/leaderboard/rank',
+            '/leaderboard/around-me'
         ]
         return endpoint in player_allowed_endpoints
 
@@ -258,7 +525,7 @@ class AdminRole(UserRole):
     
     @property
     def rate_limit(self):
-        return 10  # Admin için rate limit 10
+        return 10  # Admin için rate limit: pencere başına 10 istek
     
     def can_access_endpoint(self, endpoint):
         return True  # Admin tüm endpointlere erişebilir
@@ -272,6 +539,45 @@ class RoleFactory:
         else:
             return PlayerRole()  # Varsayılan rol player
 
+# bcrypt işlemleri istek thread'inde değil, sınırlı bir havuzda çalışır
+password_hasher = PasswordHasher()
+
+def password_overloaded_response():
+    response = make_response(jsonify({
+        'success': False,
+        'message': 'Sunucu şu anda yoğun, lütfen biraz sonra tekrar deneyin.'
+    }), 503)
+    response.headers['Retry-After'] = '1'
+    return response
+
+def sql_agent_overloaded_response():
+    response = make_response(jsonify({
+        'success': False,
+        'message': 'SQL agent şu anda yoğun, lütfen biraz sonra tekrar deneyin.',
+        'jobs': agent_jobs.stats()
+    }), 503)
+    response.headers['Retry-After'] = '5'
+    return response
+
+# Kullanıcı/rol bazlı rate limiter. Çoklu worker dağıtımında backend olarak
+# rate_limit_module.SharedDictRateLimitBackend verilebilir.
+rate_limiter = RateLimiter()
+
+# Doğrulanmış token claim'lerinin önbelleği (imza ile anahtarlanır, exp'e uyar)
+token_verifier = TokenVerifier(app.config['SECRET_KEY'], algorithms=["HS256"])
+
+def get_token_claims(token):
+    """Token'ı istek başına bir kez doğrular; claim'ler g.jwt_claims üzerinde tutulur."""
+    claims = g.get('jwt_claims')
+    if claims is None:
+        claims = token_verifier.verify(token)
+        g.jwt_claims = claims
+    return claims
+
+def current_claims():
+    """token_required tarafından doğrulanmış claim'leri döndürür."""
+    return g.jwt_claims
+
 # JWT token doğrulama decorator'ı
 def token_required(f):
     @wraps(f)
@@ -289,25 +595,21 @@ def token_required(f):
             }), 401
         
         try:
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
+            data = get_token_claims(token)
             
-            # Rate limit kontrolü
-            if data.get('usage_count', 0) >= 5:  # Sabit rate limit
-                return jsonify({
+            # Rate limit kontrolü (sunucu tarafında, kullanıcı ve rol bazlı token bucket)
+            user_role = RoleFactory.get_role(data.get('role', 'player'))
+            allowed, limit_headers = rate_limiter.check(data['user_id'], user_role)
+            if not allowed:
+                response = make_response(jsonify({
                     'success': False,
-                    'message': 'Rate limit aşıldı! (5 istek/token)'
-                }), 429
-            
-            # Token'ı yenile
-            new_token = jwt.encode({
-                'user_id': data['user_id'],
-                'role': data.get('role', 'player'),
-                'usage_count': data.get('usage_count', 0) + 1,
-                'exp': datetime.now(timezone.utc) + timedelta(hours=1)
-            }, app.config['SECRET_KEY'], algorithm="HS256")
+                    'message': f'Rate limit aşıldı! ({user_role.rate_limit} istek / {rate_limiter.window_seconds:g} saniye)'
+                }), 429)
+                response.headers.update(limit_headers)
+                return response
             
             response = make_response(f(*args, **kwargs))
-            response.headers['New-Token'] = new_token
+            response.headers.update(limit_headers)
             return response
             
         except jwt.ExpiredSignatureError:
@@ -336,10 +638,7 @@ def role_required(allowed_roles):
         @token_required  # Önce token doğrula
         def decorated_function(*args, **kwargs):
             # Token zaten token_required tarafından doğrulandı, şimdi rol kontrolü yap
-            token = request.headers['Authorization'].split()[1]
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
-            
-            role = data.get('role', 'player')
+            role = current_claims().get('role', 'player')
             
             if role not in allowed_roles:
                 return jsonify({'message': 'Bu işlem için yetkiniz yok!'}), 403
@@ -362,6 +661,34 @@ def test_db():
     except Exception as e:
         return jsonify({'message': 'Veritabanı hatası!', 'error': str(e)}), 500
 
+@app.route('/db-pool-stats', methods=['GET'])
+@role_required(['admin'])
+def db_pool_stats():
+    try:
+        return jsonify({'success': True, 'pool': db_module.pool_stats()}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'message': 'Havuz istatistikleri alınamadı', 'error': str(e)}), 500
+
+@app.route('/cache-stats', methods=['GET'])
+@role_required(['admin'])
+def cache_stats():
+    return jsonify({
+        'success': True,
+        'caches': [player_stats_cache.stats(), user_info_cache.stats()],
+        'jwt_cache': token_verifier.stats(),
+        'rate_limiter': rate_limiter.stats(),
+        'password_hasher': password_hasher.stats(),
+        'sql_schema': schema_cache.stats(),
+        'sql_queries': sql_query_cache.stats()
+    }), 200
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    # Lazy modda veya açılışta başarısız olduysa zorunlu alt sistemler (veritabanı) burada başlatılır
+    subsystems.ensure_required()
+    status = subsystems.status()
+    return jsonify({'success': status['ready'], **status}), 200 if status['ready'] else 503
+
 @app.route('/')
 def home():
     return jsonify({'message': 'Uygulama çalışıyor!'}), 200
@@ -372,8 +699,11 @@ def register():
     if not data or not data.get('username') or not data.get('password') or not data.get('email'):
         return jsonify({'message': 'Eksik bilgi!'}), 400
     
-    # Şifreyi bcrypt ile hashle
-    hashed_password = bcrypt.hashpw(data['password'].encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    # Şifreyi bcrypt ile hashle (hash havuzunda)
+    try:
+        hashed_password = password_hasher.hash(data['password'])
+    except PasswordHasherOverloaded:
+        return password_overloaded_response()
     
     # Role kontrolü - sadece player veya admin olabilir
     role = data.get('role', 'player')
@@ -432,7 +762,11 @@ def login():
         if not stored_password:
             return jsonify({'message': 'Kullanıcı parolası okunamadı!'}), 401
 
-        if not bcrypt.checkpw(data['password'].encode('utf-8'), stored_password.encode('utf-8')):
+        try:
+            password_ok = password_hasher.verify(data['password'], stored_password)
+        except PasswordHasherOverloaded:
+            return password_overloaded_response()
+        if not password_ok:
             return jsonify({'message': 'Geçersiz kullanıcı adı veya şifre!'}), 401
         
         # Kullanıcı rolünü belirle
@@ -443,7 +777,6 @@ def login():
         token = jwt.encode({
             'user_id': user[0][0],
             'role': role,
-            'usage_count': 0,
             'exp': datetime.now(timezone.utc) + user_role.token_expiry
         }, app.config['SECRET_KEY'], algorithm="HS256")
 
@@ -461,18 +794,6 @@ def login():
 @app.route('/admin/sql-query', methods=['POST'])
 @role_required(['admin'])
 def admin_sql_query():
-    global sql_agent  # Global ifadesi fonksiyonun başında olmalı
-    
-    if not sql_agent:
-        # LangChain SQL agent yok, test edip yeniden kurmayı dene
-        sql_agent = setup_langchain_sql_agent()
-        
-        if not sql_agent:
-            return jsonify({
-                'success': False,
-                'message': 'SQL Agent yapılandırılamadı. Lütfen sistem yöneticisine başvurun.'
-            }), 500
-    
     data = request.get_json()
     if not data or not data.get('query'):
         return jsonify({'success': False, 'message': 'Sorgu parametresi gerekli!'}), 400
@@ -489,43 +810,83 @@ def admin_sql_query():
                 'message': 'Güvenlik nedeniyle, tablo silme sorguları yasaktır.'
             }), 403
         
+        # Aynı soru daha önce yanıtlandıysa agent'ın ürettiği SQL doğrudan çalıştırılır
+        schema_version = current_schema_version()
+        use_cache = data.get('use_cache', True)
+        cached = sql_query_cache.get(query, schema_version) if use_cache else None
+        if cached:
+            try:
+                started = time.perf_counter()
+                decision = query_guard.check(cached['sql'], 'cache')
+                if not decision.allowed:
+                    return guard_rejected_response(decision)
+                selected = run_admin_select(decision.sql, requested_max_rows(data, SQL_FALLBACK_MAX_ROWS))
+                print(f"Önbellekteki SQL kullanıldı ({cached['key']}): {cached['sql']}")
+                return jsonify({
+                    'success': True,
+                    'message': 'Sorgu önbellekteki SQL ile çalıştırıldı',
+                    'result': selected['rows'],
+                    'columns': selected['columns'],
+                    'row_count': selected['row_count'],
+                    'truncated': selected['truncated'],
+                    'sql': decision.sql,
+                    'guard': decision.to_dict(),
+                    'cached': True,
+                    'db_ms': round((time.perf_counter() - started) * 1000, 2)
+                }), 200
+            except Exception as cached_error:
+                # Geçersizleşmiş SQL silinir ve soru agent'a gönderilir
+                print(f"Önbellekteki SQL çalıştırılamadı, kayıt siliniyor: {str(cached_error)}")
+                sql_query_cache.evict(key=cached['key'])
+        
+        sql_agent = sql_agent_subsystem.get()
+        if not sql_agent:
+            # LangChain SQL agent yok, test edip yeniden kurmayı dene
+            sql_agent_subsystem.reset()
+            sql_agent = sql_agent_subsystem.get()
+            
+            if not sql_agent:
+                return jsonify({
+                    'success': False,
+                    'message': 'SQL Agent yapılandırılamadı. Lütfen sistem yöneticisine başvurun.'
+                }), 500
+        
         # LangChain agent ile sorguyu çalıştır
         try:
             # İlk olarak doğal dil sorgusunu anlama
             print("LangChain agent çağrılıyor...")
             
-            # Sorguyu çalıştır ve zaman aşımı kontrolü ekle
-            import threading
-            import time
-            
-            result = None
-            error = None
+            from sql_agent_module import SQLCaptureHandler, CancellationHandler
             
-            def run_agent():
-                nonlocal result, error
-                try:
-                    result = sql_agent.invoke({
-                        "input": query
-                    })
-                except Exception as e:
-                    error = str(e)
+            # Agent'ın çalıştırdığı son başarılı SQL önbelleğe yazılmak üzere yakalanır
+            capture = SQLCaptureHandler()
             
-            # Agent'ı ayrı bir thread'de çalıştır
-            agent_thread = threading.Thread(target=run_agent)
-            agent_thread.start()
+            def run_agent(job):
+                return sql_agent.invoke({
+                    "input": query
+                }, config={"callbacks": [capture, CancellationHandler(job)]})
             
-            # En fazla 60 saniye bekle
-            agent_thread.join(timeout=60)
+            # Agent paylaşılan, sınırlı iş havuzunda çalışır; kuyruk doluysa istek reddedilir
+            try:
+                job = agent_jobs.submit(run_agent, query, _token_user_id())
+            except AgentExecutorOverloaded:
+                return sql_agent_overloaded_response()
             
-            if agent_thread.is_alive():
-                # Zaman aşımı
+            try:
+                result = agent_jobs.wait(job)
+            except AgentJobTimeout:
+                # İş iptal edildi: LLM döngüsü bir sonraki adımda durur, Oracle çağrısı kesilir
                 return jsonify({
                     'success': False,
-                    'message': 'SQL agent sorgu zaman aşımına uğradı (60 saniye)'
+                    'message': f'SQL agent sorgu zaman aşımına uğradı ({SQL_AGENT_TIMEOUT_SECONDS:g} saniye), iş iptal edildi',
+                    'job_id': job.id
                 }), 504
-            
-            if error:
-                raise Exception(error)
+            except AgentJobCancelled as cancelled_error:
+                return jsonify({
+                    'success': False,
+                    'message': str(cancelled_error),
+                    'job_id': job.id
+                }), 409
             
             if not result:
                 return jsonify({
@@ -537,11 +898,16 @@ def admin_sql_query():
             response = result.get("output", "Sonuç bulunamadı.")
             print(f"SQL agent sorgu sonucu: {response}")
             
+            if capture.final_sql:
+                sql_query_cache.put(query, capture.final_sql, schema_version)
+            
             # Sonucu düzenle
             formatted_result = {
                 'success': True,
                 'message': 'Sorgu başarıyla çalıştırıldı',
-                'result': response
+                'result': response,
+                'sql': capture.final_sql,
+                'cached': False
             }
             
             # Sonuçta bir tablo varsa HTML olarak düzenleme
@@ -555,21 +921,41 @@ def admin_sql_query():
             
             # Agent başarısız oldu, alternatif olarak doğrudan çalıştırmayı dene
             try:
-                # Bu sadece SELECT sorguları için güvenli bir alternatif
-                if query.strip().lower().startswith('select'):
+                # Bu sadece okuma yapan (SELECT / WITH) sorgular için güvenli bir alternatif;
+                # SQL önbelleğiyle aynı denetim kullanılır
+                if READ_ONLY_PATTERN.match(query):
                     print("SQL agent başarısız oldu, doğrudan sorgu çalıştırılıyor...")
-                    result = db_manager.execute_query(query)
+                    sql = query.strip().rstrip(';')
+                    decision = query_guard.check(sql, 'direct')
+                    if not decision.allowed:
+                        return guard_rejected_response(decision)
+                    sql = decision.sql
                     
-                    # Sonuçları formatlama
-                    formatted_results = []
-                    if result and len(result) > 0:
-                        for row in result:
-                            formatted_results.append([str(item) if item is not None else "NULL" for item in row])
+                    # Büyük sonuçlar için satırlar NDJSON olarak sabit bellekle akıtılır
+                    if (data.get('format') or request.args.get('format')) == 'ndjson':
+                        header = {
+                            'success': True,
+                            'message': 'LangChain Agent başarısız oldu, ancak sorgu doğrudan çalıştırıldı',
+                            'error': str(agent_error),
+                            'guard': decision.to_dict()
+                        }
+                        return Response(
+                            stream_with_context(stream_select_ndjson(
+                                get_db_connection, sql,
+                                max_rows=requested_max_rows(data, SQL_FALLBACK_STREAM_MAX_ROWS),
+                                call_timeout_ms=SQL_AGENT_DB_CALL_TIMEOUT_MS, header=header)),
+                            mimetype='application/x-ndjson'
+                        )
                     
+                    selected = run_admin_select(sql, requested_max_rows(data, SQL_FALLBACK_MAX_ROWS))
                     return jsonify({
                         'success': True,
                         'message': 'LangChain Agent başarısız oldu, ancak sorgu doğrudan çalıştırıldı',
-                        'result': formatted_results,
+                        'result': selected['rows'],
+                        'columns': selected['columns'],
+                        'row_count': selected['row_count'],
+                        'truncated': selected['truncated'],
+                        'guard': decision.to_dict(),
                         'error': str(agent_error)
                     }), 200
                 else:
@@ -590,55 +976,185 @@ def admin_sql_query():
             'error': str(e)
         }), 500
 
+@app.route('/admin/sql-jobs', methods=['GET'])
+@role_required(['admin'])
+def list_sql_jobs():
+    return jsonify({
+        'success': True,
+        'jobs': agent_jobs.list_jobs(),
+        'stats': agent_jobs.stats()
+    }), 200
+
+@app.route('/admin/sql-jobs/<job_id>', methods=['DELETE'])
+@role_required(['admin'])
+def cancel_sql_job(job_id):
+    if not agent_jobs.cancel(job_id):
+        return jsonify({'success': False, 'message': 'Çalışan veya bekleyen iş bulunamadı'}), 404
+    return jsonify({'success': True, 'message': 'İş iptal edildi', 'job_id': job_id}), 200
+
+@app.route('/admin/sql-guard', methods=['GET'])
+@role_required(['admin'])
+def sql_guard_status():
+    return jsonify({
+        'success': True,
+        'stats': query_guard.stats(),
+        'decisions': query_guard.recent_decisions()
+    }), 200
+
+@app.route('/admin/sql-cache', methods=['GET'])
+@role_required(['admin'])
+def list_sql_cache():
+    return jsonify({
+        'success': True,
+        'entries': sql_query_cache.entries(),
+        'stats': sql_query_cache.stats()
+    }), 200
+
+@app.route('/admin/sql-cache', methods=['DELETE'])
+@role_required(['admin'])
+def evict_sql_cache():
+    data = request.get_json(silent=True) or {}
+    key = request.args.get('key') or data.get('key')
+    question = data.get('question')
+    removed = sql_query_cache.evict(key=key, question=question)
+    return jsonify({
+        'success': True,
+        'message': f'{removed} kayıt silindi',
+        'removed': removed
+    }), 200
+
 @app.route('/protected-endpoint', methods=['GET'])
 @token_required
 def protected():
     print("Protected endpoint çağrıldı")
     return jsonify({"message": "Bu endpoint'e eriştin!"}), 200
 
+# /admin-only sayfalama ayarları
+ADMIN_PAGE_DEFAULT_LIMIT = int(os.getenv('ADMIN_PAGE_DEFAULT_LIMIT', '100'))
+ADMIN_PAGE_MAX_LIMIT = int(os.getenv('ADMIN_PAGE_MAX_LIMIT', '1000'))
+ADMIN_STREAM_BATCH_SIZE = int(os.getenv('ADMIN_STREAM_BATCH_SIZE', '500'))
+
+# Keyset sıralama anahtarları: izin verilen sort değeri -> SQL ifadesi
+ADMIN_SORT_KEYS = {
+    'user_id': 'u.user_id',
+    'username': 'u.username',
+}
+
+def encode_page_cursor(sort_value, profile_key):
+    """Son satırın keyset anahtarını istemciye dönecek opak bir imlece çevirir."""
+    raw = json.dumps([sort_value, profile_key]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_page_cursor(cursor_value):
+    sort_value, profile_key = json.loads(base64.urlsafe_b64decode(cursor_value.encode('ascii')))
+    return sort_value, profile_key
+
+def build_admin_users_query(sort, has_after, limit):
+    """Admin paneli için keyset sayfalamalı sorguyu oluşturur."""
+    sort_expr = ADMIN_SORT_KEYS[sort]
+    # Bir kullanıcının birden fazla profili olabileceği için profil id'si eşitlik bozucu olarak kullanılır
+    where_clause = ""
+    if has_after:
+        where_clause = f"""
+            WHERE {sort_expr} > :after_key
+               OR ({sort_expr} = :after_key AND COALESCE(pp.profile_id, 0) > :after_profile)
+        """
+    limit_clause = "FETCH FIRST :row_limit ROWS ONLY" if limit else ""
+    return f"""
+        SELECT 
+            u.username,
+            u.email,
+            u.role,
+            pp.nickname,
+            pp.player_level,
+            pp.experience_points,
+            COALESCE(ps.games_played, 0) AS total_games,
+            COALESCE(ps.total_score, 0) AS total_score,
+            COALESCE(ps.highest_score, 0) AS highest_score,
+            COALESCE(ps.enemies_defeated, 0) AS enemies_defeated,
+            COALESCE(ps.resources_collected, 0) AS resources_collected,
+            u.user_id,
+            {sort_expr} AS sort_key,
+            COALESCE(pp.profile_id, 0) AS profile_key
+        FROM users u
+        LEFT JOIN player_profiles pp ON u.user_id = pp.user_id
+        LEFT JOIN player_stats ps ON pp.profile_id = ps.profile_id
+        {where_clause}
+        ORDER BY {sort_expr}, COALESCE(pp.profile_id, 0)
+        {limit_clause}
+    """
+
+def admin_user_row_to_dict(user):
+    return {
+        'user_id': user[11],
+        'username': user[0],
+        'email': user[1],
+        'role': user[2],
+        'nickname': user[3],
+        'level': user[4],
+        'deneyim': user[5],
+        'total_games': user[6],
+        'total_score': user[7],
+        'highest_score': user[8],
+        'enemies_defeated': user[9],
+        'resources_collected': user[10]
+    }
+
 @app.route('/admin-only', methods=['GET'])
 @role_required(['admin'])
 def admin_only():
+    sort = request.args.get('sort', 'user_id')
+    if sort not in ADMIN_SORT_KEYS:
+        return jsonify({
+            'success': False,
+            'message': f"Geçersiz sıralama anahtarı! ({', '.join(ADMIN_SORT_KEYS)})"
+        }), 400
+
+    stream = request.args.get('stream', '').lower() in ('1', 'true', 'yes')
     try:
-        query = """
-            SELECT 
-                u.username,
-                u.email,
-                u.role,
-                pp.nickname,
-                pp.player_level,
-                pp.experience_points,
-                COUNT(gs.score_id) AS total_games,
-                COALESCE(SUM(gs.score), 0) AS total_score,
-                COALESCE(MAX(gs.score), 0) AS highest_score,
-                COALESCE(SUM(gs.enemies_defeated), 0) AS enemies_defeated,
-                COALESCE(SUM(gs.resources_collected), 0) AS resources_collected
-            FROM users u
-            LEFT JOIN player_profiles pp ON u.user_id = pp.user_id
-            LEFT JOIN game_scores gs ON pp.profile_id = gs.profile_id
-            GROUP BY u.username, u.email, u.role, pp.nickname, pp.player_level, pp.experience_points
-        """
-        result = db_manager.execute_query(query)
-        print("Admin panel query result:", result)
-
-        users = [{
-            'username': user[0],
-            'email': user[1],
-            'role': user[2],
-            'nickname': user[3],
-            'level': user[4],
-            'deneyim': user[5],
-            'total_games': user[6],
-            'total_score': user[7],
-            'highest_score': user[8],
-            'enemies_defeated': user[9],
-            'resources_collected': user[10]
-        } for user in result]
+        # Akış modunda limit verilmezse tüm tablo sabit bellekle gönderilir
+        default_limit = 0 if stream else ADMIN_PAGE_DEFAULT_LIMIT
+        limit = int(request.args.get('limit', default_limit))
+        if limit < 0:
+            raise ValueError
+        if not stream:
+            limit = min(limit or ADMIN_PAGE_DEFAULT_LIMIT, ADMIN_PAGE_MAX_LIMIT)
+        after = request.args.get('after')
+        params = {}
+        if after:
+            params['after_key'], params['after_profile'] = decode_page_cursor(after)
+        if limit:
+            params['row_limit'] = limit
+    except (ValueError, TypeError):
+        return jsonify({'success': False, 'message': 'Geçersiz limit veya after parametresi!'}), 400
+
+    query = build_admin_users_query(sort, bool(after), limit)
+
+    if stream:
+        return Response(
+            stream_with_context(stream_admin_users(query, params, limit)),
+            mimetype='application/json'
+        )
+
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.arraysize = min(limit, ADMIN_STREAM_BATCH_SIZE)
+                cursor.execute(query, params)
+                result = cursor.fetchall()
+        print(f"Admin panel query: {len(result)} satır")
+
+        users = [admin_user_row_to_dict(user) for user in result]
+        next_after = None
+        if len(result) == limit:
+            last = result[-1]
+            next_after = encode_page_cursor(last[12], last[13])
 
         return jsonify({
             'success': True,
             'message': 'Admin paneli verileri başarıyla alındı',
-            'data': users
+            'data': users,
+            'next_after': next_after
         }), 200
         
     except Exception as e:
@@ -648,6 +1164,37 @@ def admin_only():
             'error': str(e)
         }), 500
 
+def stream_admin_users(query, params, limit):
+    """Admin paneli satırlarını imleçten parti parti okuyup JSON olarak akıtır."""
+    yield '{"data": ['
+    count = 0
+    last = None
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.arraysize = ADMIN_STREAM_BATCH_SIZE
+                cursor.prefetchrows = ADMIN_STREAM_BATCH_SIZE
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany()
+                    if not rows:
+                        break
+                    chunk = []
+                    for row in rows:
+                        chunk.append(json.dumps(admin_user_row_to_dict(row), default=str))
+                    yield (',' if count else '') + ','.join(chunk)
+                    count += len(rows)
+                    last = rows[-1]
+    except Exception as e:
+        print(f"Admin paneli akış hatası: {str(e)}")
+        yield '], "success": false, "message": "Veri alınamadı", "error": ' + json.dumps(str(e)) + '}'
+        return
+
+    next_after = None
+    if limit and count == limit and last is not None:
+        next_after = encode_page_cursor(last[12], last[13])
+    yield '], "success": true, "count": ' + str(count) + ', "next_after": ' + json.dumps(next_after) + '}'
+
 @app.route('/admin/update-user-role', methods=['POST'])
 @role_required(['admin'])
 def update_user_role():
@@ -663,6 +1210,7 @@ def update_user_role():
         query = "UPDATE users SET role = :1 WHERE user_id = :2"
         params = (new_role, data['user_id'])
         db_manager.execute_query(query, params)
+        invalidate_user_caches(data['user_id'])
         
         return jsonify({'message': 'Kullanıcı rolü başarıyla güncellendi!'}), 200
         
@@ -676,11 +1224,18 @@ def delete_user():
     data = request.get_json()
     if not data or not data.get('user_id'):
         return jsonify({'message': 'Eksik bilgi!'}), 400
+    user_id = data['user_id']
+    if isinstance(user_id, str) and user_id.strip().isdigit():
+        user_id = int(user_id)
+    if isinstance(user_id, bool) or not isinstance(user_id, int):
+        return jsonify({'message': 'Geçersiz kullanıcı kimliği!'}), 400
     
     try:
         query = "DELETE FROM users WHERE user_id = :1"
-        params = (data['user_id'],)
+        params = (user_id,)
         db_manager.execute_query(query, params)
+        invalidate_user_caches(user_id)
+        leaderboard.remove_user(user_id)
         
         return jsonify({'message': 'Kullanıcı başarıyla silindi!'}), 200
         
@@ -688,39 +1243,119 @@ def delete_user():
         error, = e.args
         return jsonify({'message': 'Veritabanı hatası!', 'error': error.message}), 500
 
+@app.route('/scores/batch', methods=['POST'])
+@token_required
+def add_scores_batch():
+    data = request.get_json()
+    if not data or not isinstance(data.get('scores'), list) or not data['scores']:
+        return jsonify({'success': False, 'message': 'scores listesi gerekli!'}), 400
+    if len(data['scores']) > SCORE_BATCH_MAX_ROWS:
+        return jsonify({
+            'success': False,
+            'message': f'Tek istekte en fazla {SCORE_BATCH_MAX_ROWS} skor gönderilebilir!'
+        }), 413
+
+    try:
+        payload = current_claims()
+        # Oyuncular sadece kendi profillerine skor yazabilir, admin tüm profillere
+        owner_user_id = None if payload.get('role') == 'admin' else payload.get('user_id')
+
+        result = ScoreBatchWriter(db_manager).write(data['scores'], owner_user_id=owner_user_id)
+        for user_id in result['user_ids']:
+            invalidate_user_caches(user_id)
+        try:
+            leaderboard.refresh_profiles(result['profile_ids'])
+        except Exception as e:
+            # Liderlik tablosu periyodik uzlaştırmada düzelir, skor yazımı başarısız sayılmaz
+            print(f"Liderlik tablosu güncelleme hatası: {str(e)}")
+
+        return jsonify({
+            'success': result['inserted'] > 0,
+            'message': f"{result['inserted']} skor kaydedildi, {len(result['failed'])} skor reddedildi",
+            'inserted': result['inserted'],
+            'failed': result['failed']
+        }), 201 if result['inserted'] > 0 else 400
+
+    except oracledb.DatabaseError as e:
+        error, = e.args
+        return jsonify({'success': False, 'message': 'Veritabanı hatası!', 'error': error.message}), 500
+    except Exception as e:
+        print(f"Skor partisi yazma hatası: {str(e)}")
+        return jsonify({'success': False, 'message': 'Skorlar kaydedilemedi', 'error': str(e)}), 500
+
+def _leaderboard_args():
+    """Liderlik tablosu endpoint'leri için ortak parametreleri okur."""
+    board = request.args.get('board', 'highest_score')
+    if board not in BOARD_METRICS:
+        return None, (jsonify({
+            'success': False,
+            'message': f"Geçersiz tablo! ({', '.join(BOARD_METRICS)})"
+        }), 400)
+    if not ensure_leaderboard():
+        return None, (jsonify({'success': False, 'message': 'Liderlik tablosu henüz hazır değil'}), 503)
+    return board, None
+
+def _token_user_id():
+    return current_claims().get('user_id')
+
+@app.route('/leaderboard/top', methods=['GET'])
+@token_required
+def leaderboard_top():
+    board, error = _leaderboard_args()
+    if error:
+        return error
+    try:
+        n = min(max(int(request.args.get('n', 10)), 1), LEADERBOARD_MAX_N)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Geçersiz n parametresi!'}), 400
+    return jsonify({'success': True, 'board': board, 'data': leaderboard.top(board, n)}), 200
+
+@app.route('/leaderboard/rank', methods=['GET'])
+@token_required
+def leaderboard_rank():
+    board, error = _leaderboard_args()
+    if error:
+        return error
+    ranks = leaderboard.rank_of_user(board, _token_user_id())
+    if not ranks:
+        return jsonify({'success': False, 'message': 'Sıralamada profiliniz bulunamadı'}), 404
+    return jsonify({'success': True, 'board': board, 'total_players': len(leaderboard.boards[board]), 'data': ranks}), 200
+
+@app.route('/leaderboard/around-me', methods=['GET'])
+@token_required
+def leaderboard_around_me():
+    board, error = _leaderboard_args()
+    if error:
+        return error
+    try:
+        window = min(max(int(request.args.get('window', 5)), 0), LEADERBOARD_MAX_N // 2)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Geçersiz window parametresi!'}), 400
+    entries = leaderboard.around_user(board, _token_user_id(), window)
+    if not entries:
+        return jsonify({'success': False, 'message': 'Sıralamada profiliniz bulunamadı'}), 404
+    return jsonify({'success': True, 'board': board, 'data': entries}), 200
+
+@app.route('/leaderboard/status', methods=['GET'])
+@role_required(['admin'])
+def leaderboard_status():
+    return jsonify({'success': True, 'status': leaderboard.stats()}), 200
+
 @app.route('/player-stats', methods=['GET'])
 @token_required
 def player_stats():
     try:
-        token = request.headers['Authorization'].split()[1]
-        payload = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
+        payload = current_claims()
         user_id = payload.get('user_id')
         if not user_id:
             return jsonify({'success': False, 'message': 'User ID bulunamadı!'}), 400
 
-        query = """
-            SELECT 
-                u.username,
-                pp.nickname,
-                pp.player_level,
-                pp.experience_points AS deneyim,
-                COUNT(gs.score_id) AS total_games,
-                COALESCE(SUM(gs.score), 0) AS total_score,
-                COALESCE(MAX(gs.score), 0) AS highest_score,
-                COALESCE(SUM(gs.enemies_defeated), 0) AS enemies_defeated,
-                COALESCE(SUM(gs.resources_collected), 0) AS resources_collected
-            FROM users u
-            JOIN player_profiles pp ON u.user_id = pp.user_id
-            LEFT JOIN game_scores gs ON pp.profile_id = gs.profile_id
-            WHERE u.user_id = :1
-            GROUP BY u.username, pp.nickname, pp.player_level, pp.experience_points
-        """
         print(f"Fetching stats for user_id: {user_id}")
-        result = db_manager.execute_query(query, (user_id,))
-        print("Query result:", result)
+        stats = player_stats_cache.get_or_load(user_id, lambda: PlayerStats(db_manager, user_id).get_stats())
+        print("Query result:", stats)
         
         # Eğer oyuncu bilgisi bulunamazsa, varsayılan bir profil oluştur
-        if not result or len(result) == 0:
+        if not stats:
             print("No player profile found, creating default profile...")
             with get_db_connection() as conn:
                 cursor = conn.cursor()
@@ -731,26 +1366,16 @@ def player_stats():
                 """
                 cursor.execute(insert_query, (user_id, default_nickname))
                 conn.commit()
+            invalidate_user_caches(user_id)
             # Tekrar sorgulamayı yapalım:
-            result = db_manager.execute_query(query, (user_id,))
-            print("Query result after profile creation:", result)
+            stats = player_stats_cache.get_or_load(user_id, lambda: PlayerStats(db_manager, user_id).get_stats())
+            print("Query result after profile creation:", stats)
         
-        if result and len(result) > 0:
-            user_data = result[0]
+        if stats:
             return jsonify({
                 'success': True,
                 'message': 'İstatistikler başarıyla alındı',
-                'data': {
-                    'username': user_data[0],
-                    'nickname': user_data[1],
-                    'level': user_data[2],
-                    'deneyim': user_data[3],
-                    'total_games': user_data[4],
-                    'total_score': user_data[5],
-                    'highest_score': user_data[6],
-                    'enemies_defeated': user_data[7],
-                    'resources_collected': user_data[8]
-                }
+                'data': stats
             }), 200
         else:
             return jsonify({
@@ -765,51 +1390,50 @@ def player_stats():
             'error': str(e)
         }), 500
 
+def load_user_info(user_id):
+    """users tablosundan kullanıcı bilgisini okur."""
+    query = """
+        SELECT 
+            user_id,
+            username,
+            email,
+            role,
+            created_at,
+            last_login
+        FROM users
+        WHERE user_id = :1
+    """
+    result = db_manager.execute_query(query, (user_id,))
+    if result and len(result) > 0:
+        user_data = result[0]
+        return {
+            'user_id': user_data[0],
+            'username': user_data[1],
+            'email': user_data[2],
+            'role': user_data[3],
+            'created_at': user_data[4],
+            'last_login': user_data[5]
+        }
+    return None
+
 @app.route('/user-info', methods=['GET'])
 @token_required
 def user_info():
     try:
-        token = request.headers['Authorization'].split()[1]
-        payload = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
+        payload = current_claims()
         user_id = payload.get('user_id')
         if not user_id:
             return jsonify({'success': False, 'message': 'User ID bulunamadı!'}), 400
 
-        # Rate limit kontrolü
-        if payload.get('usage_count', 0) >= 5:
-            return jsonify({
-                'success': False,
-                'message': 'Rate limit aşıldı! (5 istek/token)'
-            }), 429
-
-        query = """
-            SELECT 
-                user_id,
-                username,
-                email,
-                role,
-                created_at,
-                last_login
-            FROM users
-            WHERE user_id = :1
-        """
         print(f"Fetching user info for user_id: {user_id}")
-        result = db_manager.execute_query(query, (user_id,))
-        print("Query result:", result)
+        user_data = user_info_cache.get_or_load(user_id, lambda: load_user_info(user_id))
+        print("Query result:", user_data)
         
-        if result and len(result) > 0:
-            user_data = result[0]
+        if user_data:
             return jsonify({
                 'success': True,
                 'message': 'Kullanıcı bilgileri başarıyla alındı',
-                'data': {
-                    'user_id': user_data[0],
-                    'username': user_data[1],
-                    'email': user_data[2],
-                    'role': user_data[3],
-                    'created_at': user_data[4],
-                    'last_login': user_data[5]
-                }
+                'data': user_data
             }), 200
         else:
             return jsonify({
@@ -828,8 +1452,6 @@ def user_info():
 @app.route('/api/rag/query', methods=['POST'])
 @token_required
 def rag_query():
-    global rag_system
-    
     try:
         data = request.get_json()
         if not data or not data.get('question'):
@@ -837,12 +1459,28 @@ def rag_query():
         
         question = data.get('question')
         
+        # Şablona uyan sorular LLM'siz yanıtlanır
+        ensure_leaderboard()
+        routed = question_router.route(question, _token_user_id())
+        if routed:
+            return jsonify({
+                'success': True,
+                'answer': routed['answer'],
+                'sources': routed['sources'],
+                'route': routed['route']
+            }), 200
+        
+        started = time.perf_counter()
+        rag_system = rag_subsystem.get()
+        
         # RAG sistemi hazır değilse
         if not rag_system or not rag_system.vectordb:
             try:
                 print("RAG sistemi hazır değil, yeniden başlatılıyor...")
+                from rag_module import RAGSystem
                 rag_system = RAGSystem()
                 success = rag_system.index_documents()
+                rag_subsystem.set(rag_system)
                 if not success:
                     return jsonify({
                         'success': False, 
@@ -857,11 +1495,13 @@ def rag_query():
         
         # Soruyu yanıtla
         response = rag_system.ask(question)
+        question_router.record('rag', (time.perf_counter() - started) * 1000)
         
         return jsonify({
             'success': True,
             'answer': response['answer'],
-            'sources': response['sources']
+            'sources': response['sources'],
+            'route': 'rag'
         }), 200
         
     except Exception as e:
@@ -878,24 +1518,30 @@ def rag_query():
 @app.route('/api/rag/refresh', methods=['POST'])
 @role_required(['admin'])
 def refresh_rag_index():
-    global rag_system
-    
     try:
+        rag_system = rag_subsystem.get()
         if not rag_system:
+            from rag_module import RAGSystem
             rag_system = RAGSystem()
+            rag_subsystem.set(rag_system)
         
-        success = rag_system.refresh_index()
+        # Varsayılan artımlı yenilemedir; ?full=1 indeksi yeni bir nesilde sıfırdan oluşturur.
+        # Yenileme arka planda çalışır, ilerleme /api/rag/status üzerinden izlenir.
+        full = request.args.get('full', '0').lower() in ('1', 'true', 'yes')
+        started = rag_system.start_refresh(full=full)
         
-        if success:
+        if started:
             return jsonify({
                 'success': True,
-                'message': 'RAG indeksi başarıyla yenilendi.'
-            }), 200
+                'message': 'RAG indeksi yenileme işi başlatıldı.',
+                'job': rag_system.job
+            }), 202
         else:
             return jsonify({
                 'success': False,
-                'message': 'RAG indeksi yenilenemedi!'
-            }), 500
+                'message': 'Zaten çalışan bir yenileme işi var!',
+                'job': rag_system.job
+            }), 409
             
     except Exception as e:
         print(f"RAG indeksi yenileme hatası: {str(e)}")
@@ -909,13 +1555,19 @@ def refresh_rag_index():
 @app.route('/api/rag/status', methods=['GET'])
 @role_required(['admin'])
 def rag_status():
-    global rag_system
-    
     try:
+        # Durum sorgusu RAG sistemini başlatmaz, sadece mevcut durumu raporlar
+        rag_system = rag_subsystem.value
         status = {
+            'state': rag_subsystem.state,
             'available': rag_system is not None,
             'indexed': rag_system is not None and rag_system.vectordb is not None,
-            'persist_directory': rag_system.persist_directory if rag_system else None
+            'persist_directory': rag_system.persist_directory if rag_system else None,
+            'index_state': rag_system.index_state() if rag_system else None,
+            'embedding_cache': rag_system.embeddings.stats() if rag_system else None,
+            'index': rag_system.status() if rag_system else None,
+            'answer_cache': rag_system.answer_cache.stats() if rag_system else None,
+            'router': question_router.stats()
         }
         
         return jsonify({
@@ -930,5 +1582,18 @@ def rag_status():
             'error': str(e)
         }), 500
 
+# player_stats özet tablosunu game_scores üzerinden yeniden hesaplayan komut
+# Kullanım: flask --app app rebuild-player-stats [--profile-id ID]
+@app.cli.command('rebuild-player-stats')
+@click.option('--profile-id', type=int, default=None, help='Sadece bu profili yeniden hesapla')
+def rebuild_player_stats_command(profile_id):
+    """player_stats tablosunu game_scores verisinden yeniden oluşturur."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.callproc('rebuild_player_stats', [profile_id])
+        conn.commit()
+    target = f"profil {profile_id}" if profile_id else "tüm profiller"
+    print(f"player_stats yeniden hesaplandı ({target}).")
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8000)
\ No newline at end of file
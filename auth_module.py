@@ -0,0 +1,67 @@
+# auth_module.py
+import os
+import threading
+import time
+
+import jwt
+
+from cache_module import LocalCacheBackend, MISSING
+
+# Doğrulanmış token önbelleği ayarları
+JWT_CACHE_MAX_ENTRIES = int(os.getenv('JWT_CACHE_MAX_ENTRIES', '10000'))
+JWT_CACHE_MAX_TTL_SECONDS = float(os.getenv('JWT_CACHE_MAX_TTL_SECONDS', '300'))
+
+
+class TokenVerifier:
+    """JWT doğrulaması yapar ve yakın zamanda doğrulanmış token'ların claim'lerini önbellekte tutar.
+
+    Önbellek anahtarı token imzasıdır; isabette imzalanan kısmın (header.payload) aynı
+    olduğu ayrıca kontrol edilir. Kayıtlar token'ın exp zamanından sonra tutulmaz.
+    """
+
+    def __init__(self, secret_key, algorithms=("HS256",), max_entries=JWT_CACHE_MAX_ENTRIES,
+                 max_ttl=JWT_CACHE_MAX_TTL_SECONDS):
+        self.secret_key = secret_key
+        self.algorithms = list(algorithms)
+        self.max_ttl = max_ttl
+        self.cache = LocalCacheBackend(max_entries)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def verify(self, token):
+        """Token'ı doğrular ve claim'leri döndürür. Geçersizse jwt istisnaları fırlatır."""
+        signing_input, _, signature = token.rpartition('.')
+        if signature:
+            cached = self.cache.get(signature)
+            if cached is not MISSING:
+                cached_input, claims = cached
+                exp = claims.get('exp')
+                if cached_input == signing_input and (exp is None or exp > time.time()):
+                    with self._lock:
+                        self.hits += 1
+                    return claims
+
+        with self._lock:
+            self.misses += 1
+        claims = jwt.decode(token, self.secret_key, algorithms=self.algorithms)
+
+        ttl = self.max_ttl
+        if claims.get('exp') is not None:
+            ttl = min(ttl, claims['exp'] - time.time())
+        if signature and ttl > 0:
+            self.cache.set(signature, (signing_input, claims), ttl)
+        return claims
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.cache),
+                'max_entries': self.cache.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.cache.evictions,
+                'expirations': self.cache.expirations,
+            }
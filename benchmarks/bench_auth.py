@@ -0,0 +1,76 @@
+# benchmarks/bench_auth.py
+"""İstek başına kimlik doğrulama maliyetini ölçen mikro benchmark.
+
+Eski akış: token_required decode + yeni token encode, role_required decode, view decode.
+Yeni akış: TokenVerifier.verify ile tek doğrulama (önbellek isabeti ve ıskalaması ayrı ölçülür).
+
+Kullanım: python benchmarks/bench_auth.py [--iterations 20000]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import jwt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from auth_module import TokenVerifier  # noqa: E402
+
+SECRET = 'bench_secret_key'
+
+
+def make_token(user_id=1):
+    return jwt.encode({
+        'user_id': user_id,
+        'role': 'admin',
+        'usage_count': 0,
+        'exp': datetime.now(timezone.utc) + timedelta(hours=1)
+    }, SECRET, algorithm="HS256")
+
+
+def legacy_request(token):
+    data = jwt.decode(token, SECRET, algorithms=["HS256"])
+    jwt.encode({
+        'user_id': data['user_id'],
+        'role': data.get('role', 'player'),
+        'usage_count': data.get('usage_count', 0) + 1,
+        'exp': datetime.now(timezone.utc) + timedelta(hours=1)
+    }, SECRET, algorithm="HS256")
+    jwt.decode(token, SECRET, algorithms=["HS256"])
+    jwt.decode(token, SECRET, algorithms=["HS256"])
+
+
+def measure(label, func, iterations):
+    started = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    elapsed = time.perf_counter() - started
+    per_call_us = elapsed / iterations * 1_000_000
+    print(f"{label:<32} {per_call_us:>10.2f} µs/istek  ({iterations / elapsed:>10.0f} istek/s)")
+    return per_call_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    token = make_token()
+    # Iskalama ölçümü için her istekte farklı token
+    fresh_tokens = [make_token(i) for i in range(args.iterations)]
+
+    legacy = measure('eski (3x decode + encode)', lambda i: legacy_request(token), args.iterations)
+
+    cold = TokenVerifier(SECRET)
+    miss = measure('yeni, önbellek ıskalaması', lambda i: cold.verify(fresh_tokens[i]), args.iterations)
+
+    warm = TokenVerifier(SECRET)
+    warm.verify(token)
+    hit = measure('yeni, önbellek isabeti', lambda i: warm.verify(token), args.iterations)
+
+    print(f"\nHızlanma (ıskalama): {legacy / miss:.1f}x, (isabet): {legacy / hit:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/bench_bcrypt.py
+"""bcrypt iş faktörü kalibrasyonu ve hash havuzu verim ölçümü.
+
+Hedef gecikmeyi aşmayan en yüksek BCRYPT_ROUNDS değerini seçer, ardından
+PasswordHasher havuzunun eşzamanlı giriş yükü altındaki davranışını ölçer.
+
+Kullanım: python benchmarks/bench_bcrypt.py [--target-ms 250] [--concurrency 64]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from password_module import PasswordHasher, PasswordHasherOverloaded, calibrate_rounds  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target-ms', type=float, default=250, help='Tek hash için hedef süre (ms)')
+    parser.add_argument('--min-rounds', type=int, default=10)
+    parser.add_argument('--max-rounds', type=int, default=16)
+    parser.add_argument('--concurrency', type=int, default=64, help='Eşzamanlı giriş sayısı')
+    parser.add_argument('--requests', type=int, default=256)
+    args = parser.parse_args()
+
+    rounds, timings = calibrate_rounds(args.target_ms, args.min_rounds, args.max_rounds)
+    print("İş faktörü  süre (ms)")
+    for r, elapsed in timings.items():
+        marker = '  <- seçilen' if r == rounds else ''
+        print(f"{r:>10}  {elapsed:>9.1f}{marker}")
+    print(f"\nÖnerilen ayar: BCRYPT_ROUNDS={rounds}\n")
+
+    hasher = PasswordHasher(rounds=rounds)
+    stored = hasher.hash('benchmark-password')
+
+    latencies = []
+
+    def login(_):
+        started = time.perf_counter()
+        try:
+            hasher.verify('benchmark-password', stored)
+            latencies.append((time.perf_counter() - started) * 1000)
+            return True
+        except PasswordHasherOverloaded:
+            return False
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(login, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    accepted = sum(results)
+    print(f"{args.requests} giriş, {args.concurrency} eşzamanlı, {hasher.workers} worker, "
+          f"kuyruk sınırı {hasher.max_pending}")
+    print(f"Kabul edilen: {accepted}, hızlı reddedilen: {args.requests - accepted}")
+    print(f"Verim: {accepted / elapsed:.1f} doğrulama/s")
+    if latencies:
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"Gecikme p50: {p50:.1f} ms, p95: {p95:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+# benchmarks/bench_rag.py
+"""RAG indeksleme ve sorgu verimini sentetik veriyle, ağ erişimi olmadan ölçer.
+
+Varsayılan olarak hashing embedding ve sabit yanıtlı LLM kullanılır; --embedding-backend openai
+ile gerçek model de ölçülebilir (OPENAI_API_KEY gerekir). Ölçülenler:
+  - index_documents: süre, doküman/s, tepe bellek (soğuk ve sıcak embedding önbelleğiyle)
+  - refresh_index: yeni skorlar ve güncellenen profiller sonrası artımlı yenileme süresi
+  - ask: ilk ve tekrar eden sorular için gecikme yüzdelikleri
+
+Kullanım: python benchmarks/bench_rag.py [--players 1000] [--scores-per-player 20] [--queries 200]
+"""
+import argparse
+import os
+import random
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def rss_mb():
+    """Anlık ve tepe yerleşik bellek (MB)."""
+    current = None
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    current = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux'ta KB, macOS'ta bayt döner
+    peak = peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+    return current, peak
+
+
+def percentiles(samples_ms):
+    ordered = sorted(samples_ms)
+
+    def pick(p):
+        return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+    return {'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99), 'mean': statistics.mean(ordered)}
+
+
+def report(label, seconds, documents=None):
+    current, peak = rss_mb()
+    rate = f"{documents / seconds:>10.0f} doküman/s" if documents else ""
+    print(f"{label:<34} {seconds * 1000:>10.1f} ms {rate}  RSS {current or 0:.0f} MB (tepe {peak:.0f} MB)")
+
+
+def report_latency(label, samples_ms):
+    stats = percentiles(samples_ms)
+    print(f"{label:<34} p50 {stats['p50']:>8.2f} ms  p95 {stats['p95']:>8.2f} ms  "
+          f"p99 {stats['p99']:>8.2f} ms  ({len(samples_ms)} sorgu)")
+
+
+def make_questions(database, count, seed):
+    rng = random.Random(seed)
+    nicknames = [p['nickname'] for p in database.profiles.values()]
+    templates = [
+        lambda: f"{rng.choice(nicknames)} oyuncusunun skorları nelerdir?",
+        lambda: f"Seviye {rng.randint(1, database.levels)} oyuncuları hakkında bilgi ver",
+        lambda: "Oyunda seviye nasıl yükseltilir?",
+        lambda: f"{rng.choice(nicknames)} kaç düşman yendi?",
+        lambda: "Son 7 gün içinde oynanan oyunlar",
+    ]
+    return [rng.choice(templates)() for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, default=1000)
+    parser.add_argument('--scores-per-player', type=int, default=20)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--new-scores', type=int, default=500, help='Artımlı yenileme öncesi eklenecek skor sayısı')
+    parser.add_argument('--touched-profiles', type=int, default=50)
+    parser.add_argument('--embedding-backend', default='hashing', choices=['hashing', 'openai'])
+    parser.add_argument('--llm-backend', default='canned', choices=['canned', 'openai'])
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0, help='Sabit yanıtlı LLM için taklit gecikme')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep', action='store_true', help='Geçici dizinleri silme')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_rag_')
+    # Embedding önbelleği modül import edilmeden önce geçici dizine yönlendirilir
+    os.environ['EMBEDDING_CACHE_DIR'] = os.path.join(workdir, 'embedding_cache')
+    os.environ['CANNED_LLM_LATENCY_MS'] = str(args.llm_latency_ms)
+
+    from rag_backends_module import create_embeddings, create_llm
+    from rag_module import RAGSystem
+    from synthetic_corpus import SyntheticDatabase
+
+    try:
+        started = time.perf_counter()
+        database = SyntheticDatabase(args.players, args.scores_per_player, seed=args.seed)
+        print(f"Sentetik veri: {len(database.profiles)} profil, {len(database.scores)} skor "
+              f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+        embeddings = create_embeddings(args.embedding_backend)
+        llm = create_llm(args.llm_backend)
+        rag = RAGSystem(os.path.join(workdir, 'chroma_db'), database.connection, embeddings, llm)
+
+        started = time.perf_counter()
+        assert rag.index_documents(), "İndeksleme başarısız"
+        elapsed = time.perf_counter() - started
+        documents = rag.document_count()
+        report("index_documents (soğuk önbellek)", elapsed, documents)
+        print(f"  embedding önbelleği: {rag.embeddings.stats()['hit_rate']:.0%} isabet, "
+              f"{rag.embeddings.stats()['api_batches']} model çağrısı")
+
+        started = time.perf_counter()
+        assert rag.refresh_index(full=True), "Tam yenileme başarısız"
+        report("refresh_index full (sıcak önbellek)", time.perf_counter() - started, rag.document_count())
+        print(f"  embedding önbelleği: {rag.embeddings.stats()['hit_rate']:.0%} isabet")
+
+        database.add_scores(args.new_scores)
+        database.touch_profiles(args.touched_profiles)
+        started = time.perf_counter()
+        assert rag.refresh_index(), "Artımlı yenileme başarısız"
+        report(f"refresh_index (+{args.new_scores} skor, {args.touched_profiles} profil)", time.perf_counter() - started)
+
+        started = time.perf_counter()
+        assert rag.refresh_index(), "Artımlı yenileme başarısız"
+        report("refresh_index (değişiklik yok)", time.perf_counter() - started)
+
+        questions = make_questions(database, args.queries, args.seed)
+        first, repeat = [], []
+        seen = set()
+        for question in questions:
+            started = time.perf_counter()
+            rag.ask(question)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            (repeat if question in seen else first).append(elapsed_ms)
+            seen.add(question)
+        if first:
+            report_latency("ask (ilk kez)", first)
+        if repeat:
+            report_latency("ask (tekrar, yanıt önbelleği)", repeat)
+
+        status = rag.status()
+        print(f"Erişim yolları: {status['retrieval']}  yanıt önbelleği isabet oranı: "
+              f"{rag.answer_cache.stats()['hit_rate']:.0%}")
+        current, peak = rss_mb()
+        print(f"Son durum: {status['document_count']} doküman, nesil {status['generation']}, "
+              f"RSS {current or 0:.0f} MB (tepe {peak:.0f} MB)")
+    finally:
+        if args.keep:
+            print(f"Geçici dizin: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/bench_startup.py
+"""Uygulama import süresini ve alt sistemlerin hazır olma sürelerini ölçer.
+
+Her ölçüm temiz bir Python sürecinde yapılır. --importtime ile en pahalı
+modüller (python -X importtime çıktısından) listelenir.
+
+Kullanım: python benchmarks/bench_startup.py [--runs 5] [--warmup lazy|background] [--importtime]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import json, time
+started = time.perf_counter()
+import app
+import_ms = (time.perf_counter() - started) * 1000
+ready_ms = None
+if WAIT_READY:
+    deadline = time.perf_counter() + TIMEOUT
+    while time.perf_counter() < deadline:
+        # Sadece kayıtlı alt sistemler beklenir; lazy modda hiç istenmeyen alt sistem 'pending' kalır
+        done = ('ready', 'failed', 'pending') if WARMUP == 'lazy' else ('ready', 'failed')
+        states = [s.state for s in app.subsystems.subsystems.values()]
+        if all(state in done for state in states):
+            break
+        time.sleep(0.05)
+    ready_ms = (time.perf_counter() - started) * 1000
+print('RESULT ' + json.dumps({'import_ms': import_ms, 'ready_ms': ready_ms,
+                              'status': app.subsystems.status()}, default=str))
+"""
+
+
+def run_once(warmup, wait_ready, timeout):
+    env = dict(os.environ, STARTUP_WARMUP=warmup)
+    code = PROBE.replace('WAIT_READY', str(wait_ready)).replace('TIMEOUT', str(timeout)).replace('WARMUP', repr(warmup))
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    line = next(l for l in output.splitlines() if l.startswith('RESULT '))
+    return json.loads(line[len('RESULT '):])
+
+
+def top_imports(limit):
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=ROOT,
+                            env=dict(os.environ, STARTUP_WARMUP='lazy'),
+                            capture_output=True, text=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        rows.append((int(cumulative_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--warmup', choices=['lazy', 'background'], default='lazy')
+    parser.add_argument('--wait-ready', action='store_true', help='Alt sistemlerin bitmesini de bekle')
+    parser.add_argument('--timeout', type=float, default=300)
+    parser.add_argument('--importtime', action='store_true')
+    args = parser.parse_args()
+
+    results = [run_once(args.warmup, args.wait_ready, args.timeout) for _ in range(args.runs)]
+    import_times = [r['import_ms'] for r in results]
+    print(f"import app ({args.warmup}): medyan {statistics.median(import_times):.1f} ms, "
+          f"min {min(import_times):.1f} ms, max {max(import_times):.1f} ms ({args.runs} çalıştırma)")
+    if args.wait_ready:
+        ready_times = [r['ready_ms'] for r in results]
+        print(f"tüm alt sistemler: medyan {statistics.median(ready_times):.1f} ms")
+        for name, status in results[-1]['status']['subsystems'].items():
+            print(f"  {name:<12} {status['state']:<12} {status.get('duration_ms')} ms")
+
+    if args.importtime:
+        print("\nEn pahalı import'lar (kümülatif):")
+        for cumulative_us, name in top_imports(15):
+            print(f"  {cumulative_us / 1000:>9.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+# benchmarks/bench_vector_store.py
+"""NumpyVectorStore (float16/int8) ile Chroma'yı recall, sorgu gecikmesi ve bellek açısından karşılaştırır.
+
+Kümelenmiş sentetik embedding'ler üretilir; doğruluk referansı float32 tam kosinüs aramasıdır.
+Her depo önce bir süreçte kurulur, sonra yeni bir süreçte (worker başlangıcı gibi) açılıp sorgulanır;
+böylece açılış süresi ve yerleşik bellek (RSS) kurulumdan ve diğer depolardan etkilenmez.
+
+Kullanım: python benchmarks/bench_vector_store.py [--vectors 50000] [--dim 384] [--queries 200] [--k 5]
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BACKENDS = ['numpy-float16', 'numpy-int8', 'chroma']
+
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_data(vectors, dim, queries, seed):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(vectors // 200, 1), dim)).astype(np.float32)
+    data = centers[rng.integers(0, len(centers), vectors)] + 0.3 * rng.normal(size=(vectors, dim)).astype(np.float32)
+    picks = rng.integers(0, vectors, queries)
+    query_vectors = data[picks] + 0.1 * rng.normal(size=(queries, dim)).astype(np.float32)
+    return data, query_vectors
+
+
+def exact_top_k(data, query_vectors, k):
+    normalized = data / np.linalg.norm(data, axis=1, keepdims=True)
+    queries = query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    scores = queries @ normalized.T
+    return [set(np.argsort(-row)[:k].tolist()) for row in scores]
+
+
+class _NoEmbeddings:
+    def embed_documents(self, texts):
+        raise RuntimeError("Benchmark hazır vektör kullanır")
+
+    def embed_query(self, text):
+        raise RuntimeError("Benchmark hazır vektör kullanır")
+
+
+def build(backend, directory, data, batch=5000):
+    ids = [str(i) for i in range(len(data))]
+    if backend.startswith('numpy'):
+        from vector_store_module import NumpyVectorStore
+        store = NumpyVectorStore(directory, _NoEmbeddings(), backend.split('-', 1)[1])
+        for start in range(0, len(data), batch):
+            store.add_vectors(ids[start:start + batch], data[start:start + batch],
+                              [""] * len(ids[start:start + batch]))
+        store.persist()
+    else:
+        import chromadb
+        client = chromadb.PersistentClient(path=directory)
+        collection = client.get_or_create_collection('bench', metadata={'hnsw:space': 'cosine'})
+        for start in range(0, len(data), batch):
+            collection.add(ids=ids[start:start + batch], embeddings=data[start:start + batch].tolist())
+
+
+def open_searcher(backend, directory):
+    if backend.startswith('numpy'):
+        from vector_store_module import NumpyVectorStore
+        store = NumpyVectorStore(directory, _NoEmbeddings())
+        return lambda vector, k: [store.ids[row] for row, _ in store.search_vectors(vector, k)]
+    import chromadb
+    collection = chromadb.PersistentClient(path=directory).get_collection('bench')
+    return lambda vector, k: collection.query(query_embeddings=[vector.tolist()], n_results=k)['ids'][0]
+
+
+def child(args):
+    """Tek bir depo için kurulum veya sorgu ölçümü yapar ve sonucu JSON olarak yazdırır."""
+    data, query_vectors = make_data(args.vectors, args.dim, args.queries, args.seed)
+    directory = os.path.join(args.workdir, args.backend)
+
+    if args.phase == 'build':
+        started = time.perf_counter()
+        build(args.backend, directory, data)
+        print('RESULT ' + json.dumps({'build_s': time.perf_counter() - started}))
+        return
+
+    truth = exact_top_k(data, query_vectors, args.k)
+    del data
+
+    baseline_rss = rss_mb()
+    started = time.perf_counter()
+    search = open_searcher(args.backend, directory)
+    search(query_vectors[0], args.k)
+    open_ms = (time.perf_counter() - started) * 1000
+
+    latencies = []
+    hits = 0
+    for vector, expected in zip(query_vectors, truth):
+        started = time.perf_counter()
+        found = search(vector, args.k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += len(expected & {int(doc_id) for doc_id in found})
+    latencies.sort()
+    disk = sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(directory) for name in names)
+    print('RESULT ' + json.dumps({
+        'open_ms': open_ms,
+        'recall': hits / (len(truth) * args.k),
+        'p50_ms': latencies[len(latencies) // 2],
+        'p95_ms': latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)],
+        'mean_ms': statistics.mean(latencies),
+        'rss_delta_mb': rss_mb() - baseline_rss,
+        'disk_mb': disk / 1024 / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--vectors', type=int, default=50000)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--backends', default=','.join(BACKENDS))
+    parser.add_argument('--backend', help=argparse.SUPPRESS)
+    parser.add_argument('--phase', choices=['build', 'search'], help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase:
+        child(args)
+        return
+
+    workdir = tempfile.mkdtemp(prefix='bench_vector_store_')
+    print(f"{args.vectors} vektör x {args.dim} boyut, {args.queries} sorgu, k={args.k}")
+    print(f"{'depo':<15} {'kurulum':>9} {'açılış':>9} {'recall':>7} {'p50':>9} {'p95':>9} {'RSS artışı':>11} {'disk':>9}")
+    try:
+        for backend in args.backends.split(','):
+            r = {}
+            for phase in ('build', 'search'):
+                command = [sys.executable, os.path.abspath(__file__), '--backend', backend, '--phase', phase,
+                           '--workdir', workdir, '--vectors', str(args.vectors), '--dim', str(args.dim),
+                           '--queries', str(args.queries), '--k', str(args.k), '--seed', str(args.seed)]
+                result = subprocess.run(command, capture_output=True, text=True)
+                line = next((l for l in result.stdout.splitlines() if l.startswith('RESULT ')), None)
+                if line is None:
+                    r = None
+                    print(f"{backend:<15} başarısız ({phase}): {result.stderr.strip().splitlines()[-1:]}")
+                    break
+                r.update(json.loads(line[len('RESULT '):]))
+            if r is None:
+                continue
+            print(f"{backend:<15} {r['build_s']:>8.1f}s {r['open_ms']:>7.0f}ms {r['recall']:>7.3f} "
+                  f"{r['p50_ms']:>7.2f}ms {r['p95_ms']:>7.2f}ms {r['rss_delta_mb']:>9.0f}MB {r['disk_mb']:>7.0f}MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+# benchmarks/synthetic_corpus.py
+"""RAGSystem'in Oracle sorgularını bellekteki sentetik oyuncu/skor verisiyle yanıtlayan sahte bağlantı.
+
+RAGSystem(connection_factory=SyntheticDatabase(...).connection) şeklinde kullanılır; sadece
+rag_module'ün çalıştırdığı sorgu şekilleri desteklenir.
+"""
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+
+class SyntheticDatabase:
+    def __init__(self, players=1000, scores_per_player=20, levels=5, seed=42):
+        self.random = random.Random(seed)
+        self.levels = levels
+        self.now = datetime(2024, 1, 1)
+        self.profiles = {}
+        self.scores = {}
+        self.next_score_id = 1
+        for profile_id in range(1, players + 1):
+            self.profiles[profile_id] = self._new_profile(profile_id)
+        for profile_id in self.profiles:
+            for _ in range(scores_per_player):
+                self._add_score(profile_id)
+        self.queries = 0
+
+    def _new_profile(self, profile_id):
+        level = self.random.randint(1, self.levels)
+        return {
+            'username': f"user{profile_id}",
+            'email': f"user{profile_id}@example.com",
+            'role': 'player',
+            'nickname': f"Pilot{profile_id}",
+            'level': level,
+            'xp': level * 1000 + self.random.randint(0, 999),
+            'updated_at': self.now,
+        }
+
+    def _add_score(self, profile_id):
+        score_id = self.next_score_id
+        self.next_score_id += 1
+        self.scores[score_id] = {
+            'profile_id': profile_id,
+            'score': self.random.randint(100, 50000),
+            'enemies': self.random.randint(0, 500),
+            'resources': self.random.randint(0, 2000),
+            'game_date': self.now - timedelta(minutes=self.random.randint(0, 60 * 24 * 90)),
+        }
+        return score_id
+
+    # --- Veri değişiklikleri (artımlı yenileme ölçümü için) ---
+
+    def add_scores(self, count):
+        profile_ids = list(self.profiles)
+        for _ in range(count):
+            self._add_score(self.random.choice(profile_ids))
+
+    def touch_profiles(self, count):
+        self.now += timedelta(minutes=10)
+        for profile_id in self.random.sample(list(self.profiles), min(count, len(self.profiles))):
+            profile = self.profiles[profile_id]
+            profile['xp'] += self.random.randint(1, 500)
+            profile['updated_at'] = self.now
+
+    # --- Satır biçimleri rag_module sorgularının sütun sırasını izler ---
+
+    def _profile_row(self, profile_id):
+        p = self.profiles[profile_id]
+        return (p['username'], p['email'], p['role'], p['nickname'], p['level'], p['xp'], profile_id, p['updated_at'])
+
+    def _score_row(self, score_id):
+        s = self.scores[score_id]
+        p = self.profiles[s['profile_id']]
+        return (score_id, p['username'], p['nickname'], s['score'], s['enemies'], s['resources'],
+                s['game_date'], s['profile_id'], p['level'])
+
+    def _level_rows(self):
+        rows = []
+        for level in sorted({p['level'] for p in self.profiles.values()}):
+            players = [pid for pid, p in self.profiles.items() if p['level'] == level]
+            player_set = set(players)
+            scores = [s for s in self.scores.values() if s['profile_id'] in player_set]
+            values = [s['score'] for s in scores]
+            rows.append((
+                level,
+                len(players),
+                sum(values) / len(values) if values else None,
+                max(values) if values else None,
+                min(values) if values else None,
+                sum(s['enemies'] for s in scores) / len(scores) if scores else None,
+                sum(s['resources'] for s in scores) / len(scores) if scores else None,
+            ))
+        return rows
+
+    def execute(self, sql, params):
+        self.queries += 1
+        if "FROM dual" in sql:
+            return [(len(self.profiles), len(self.scores), len({p['level'] for p in self.profiles.values()}))]
+        if "GROUP BY pp.player_level" in sql:
+            return self._level_rows()
+        if "FROM game_scores gs" in sql:
+            if "gs.score_id >" in sql:
+                since = params[0]
+                return [self._score_row(sid) for sid in sorted(self.scores) if sid > since]
+            if "gs.score_id IN" in sql:
+                return [self._score_row(sid) for sid in params.values() if sid in self.scores]
+            return [self._score_row(sid) for sid in sorted(self.scores)]
+        if "FROM users u" in sql:
+            if "pp.updated_at >" in sql:
+                since = params[0]
+                return [self._profile_row(pid) for pid, p in self.profiles.items() if p['updated_at'] > since]
+            return [self._profile_row(pid) for pid in self.profiles]
+        if sql.strip() == "SELECT profile_id FROM player_profiles":
+            return [(pid,) for pid in self.profiles]
+        if sql.strip() == "SELECT COUNT(*) FROM game_scores":
+            return [(len(self.scores),)]
+        if sql.strip() == "SELECT score_id FROM game_scores":
+            return [(sid,) for sid in self.scores]
+        raise ValueError(f"Sentetik veritabanı bu sorguyu desteklemiyor: {sql[:80]}")
+
+    @contextmanager
+    def connection(self):
+        yield _Connection(self)
+
+
+class _Connection:
+    def __init__(self, database):
+        self.database = database
+
+    def cursor(self):
+        return _Cursor(self.database)
+
+
+class _Cursor:
+    def __init__(self, database):
+        self.database = database
+        self.arraysize = 100
+        self.prefetchrows = 2
+        self._rows = []
+        self._position = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def execute(self, sql, params=None):
+        self._rows = self.database.execute(sql, params)
+        self._position = 0
+
+    def fetchmany(self, size=None):
+        size = size or self.arraysize
+        rows = self._rows[self._position:self._position + size]
+        self._position += len(rows)
+        return rows
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def fetchall(self):
+        rows = self._rows[self._position:]
+        self._position = len(self._rows)
+        return rows
+
+    def close(self):
+        self._rows = []
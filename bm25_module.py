@@ -0,0 +1,160 @@
+# bm25_module.py
+import math
+import os
+import pickle
+import re
+import threading
+from collections import Counter
+
+# BM25 parametreleri
+BM25_K1 = float(os.getenv('BM25_K1', '1.5'))
+BM25_B = float(os.getenv('BM25_B', '0.75'))
+# Reciprocal rank fusion sabiti
+RRF_K = int(os.getenv('RRF_K', '60'))
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Filtrelemede kullanılan metadata alanları; indekste sadece bunlar tutulur
+FILTER_FIELDS = ("type", "profile_id", "nickname_key", "level", "game_date_ts")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.casefold())
+
+
+def matches_filter(metadata, where):
+    """Chroma where ifadesinin ($and, eşitlik, $gte/$lte) bir metadata sözlüğüne uyup uymadığını kontrol eder."""
+    if where is None:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+        value = metadata.get(key)
+        if isinstance(condition, dict):
+            for op, expected in condition.items():
+                if value is None:
+                    return False
+                if op == "$gte" and not value >= expected:
+                    return False
+                if op == "$lte" and not value <= expected:
+                    return False
+                if op == "$eq" and value != expected:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Birden fazla sıralı kimlik listesini 1 / (k + sıra) puanlarıyla birleştirir."""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=lambda doc_id: scores[doc_id], reverse=True)
+
+
+class BM25Index:
+    """Bellekte tutulan BM25 ters indeksi.
+
+    Doküman metinleri saklanmaz; sadece terim frekansları, doküman uzunlukları ve filtre
+    metadata'sı tutulur. Metinler gerektiğinde vektör veritabanından kimlikle okunur.
+    """
+
+    def __init__(self, k1=BM25_K1, b=BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.doc_terms = {}
+        self.doc_lengths = {}
+        self.metadata = {}
+        self.total_length = 0
+        self._lock = threading.RLock()
+
+    def add(self, doc_id, text, metadata=None):
+        with self._lock:
+            if doc_id in self.doc_lengths:
+                self.remove(doc_id)
+            counts = Counter(tokenize(text))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, {})[doc_id] = tf
+            self.doc_terms[doc_id] = tuple(counts)
+            length = sum(counts.values())
+            self.doc_lengths[doc_id] = length
+            self.total_length += length
+            self.metadata[doc_id] = {key: (metadata or {}).get(key) for key in FILTER_FIELDS}
+
+    def add_documents(self, documents):
+        for doc in documents:
+            self.add(doc.metadata["doc_id"], doc.page_content, doc.metadata)
+
+    def remove(self, doc_id):
+        with self._lock:
+            if doc_id not in self.doc_lengths:
+                return
+            for term in self.doc_terms.pop(doc_id):
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self.postings[term]
+            self.total_length -= self.doc_lengths.pop(doc_id)
+            self.metadata.pop(doc_id, None)
+
+    def search(self, query, k=5, where=None):
+        """En yüksek BM25 puanlı k dokümanın (kimlik, puan) listesini döndürür."""
+        with self._lock:
+            count = len(self.doc_lengths)
+            if not count:
+                return []
+            avg_length = self.total_length / count
+            scores = {}
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            results = []
+            for doc_id, score in ranked:
+                if matches_filter(self.metadata.get(doc_id, {}), where):
+                    results.append((doc_id, score))
+                    if len(results) >= k:
+                        break
+            return results
+
+    def save(self, path):
+        with self._lock:
+            data = {
+                'k1': self.k1,
+                'b': self.b,
+                'postings': self.postings,
+                'doc_terms': self.doc_terms,
+                'doc_lengths': self.doc_lengths,
+                'metadata': self.metadata,
+                'total_length': self.total_length,
+            }
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        index = cls(data['k1'], data['b'])
+        index.postings = data['postings']
+        index.doc_terms = data['doc_terms']
+        index.doc_lengths = data['doc_lengths']
+        index.metadata = data['metadata']
+        index.total_length = data['total_length']
+        return index
+
+    def __len__(self):
+        return len(self.doc_lengths)
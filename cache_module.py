@@ -0,0 +1,237 @@
+# cache_module.py
+import os
+import pickle
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+# Önbellek ayarları (ortam değişkenleri ile değiştirilebilir)
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '10000'))
+CACHE_TTL_SECONDS = float(os.getenv('CACHE_TTL_SECONDS', '60'))
+
+MISSING = object()
+
+
+# Paylaşılan önbellek arka uçları için temel sınıf
+class CacheBackend(ABC):
+    @abstractmethod
+    def get(self, key):
+        """Değeri döndürür, yoksa veya süresi dolmuşsa MISSING döndürür."""
+        pass
+
+    @abstractmethod
+    def set(self, key, value, ttl):
+        pass
+
+    @abstractmethod
+    def delete(self, key):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+
+# Süreç içi LRU + TTL önbellek
+class LocalCacheBackend(CacheBackend):
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Çoklu worker dağıtımları için paylaşılan sözlük benzeri depoyu saran arka uç.
+# Redis/memcached istemcisi yerine, worker'lar arasında paylaşılan herhangi bir
+# sözlük benzeri nesne (örn. multiprocessing.Manager().dict()) kullanılabilir.
+class SharedDictCacheBackend(CacheBackend):
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, key):
+        raw = self.store.get(key)
+        if raw is None:
+            return MISSING
+        value, expires_at = pickle.loads(raw)
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            return MISSING
+        return value
+
+    def set(self, key, value, ttl):
+        expires_at = time.time() + ttl if ttl else None
+        self.store[key] = pickle.dumps((value, expires_at))
+
+    def delete(self, key):
+        try:
+            del self.store[key]
+        except KeyError:
+            pass
+
+    def clear(self):
+        self.store.clear()
+
+
+class ReadThroughCache:
+    """Süreç içi LRU/TTL önbellek veya paylaşılan bir arka uç üzerinde read-through önbellek.
+
+    shared_backend verilirse süreç içi katman kullanılmaz: bir worker'ın invalidate() çağrısı diğer
+    worker'ların yerel kopyalarına ulaşamayacağı için tüm okuma/yazmalar paylaşılan arka uca gider.
+    """
+
+    def __init__(self, name, ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES, shared_backend=None):
+        self.name = name
+        self.ttl = ttl
+        self.local = LocalCacheBackend(max_entries)
+        self.shared = shared_backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.stale_loads = 0
+        # Yüklemesi süren anahtarlar: [eşzamanlı yükleme sayısı, invalidate sayacı]
+        self._inflight = {}
+        # clear() her çağrıldığında artar
+        self._epoch = 0
+
+    def _key(self, key):
+        return f"{self.name}:{key}"
+
+    def get_or_load(self, key, loader):
+        """Önbellekte varsa değeri döndürür, yoksa loader() ile yükleyip saklar.
+
+        loader None döndürürse veya yükleme sürerken anahtar invalidate edildiyse sonuç önbelleğe alınmaz.
+        """
+        cache_key = self._key(key)
+
+        if self.shared is None:
+            value = self.local.get(cache_key)
+            if value is not MISSING:
+                with self._lock:
+                    self.hits += 1
+                return value
+        else:
+            try:
+                value = self.shared.get(cache_key)
+            except Exception as e:
+                print(f"Paylaşılan önbellek okuma hatası ({self.name}): {e}")
+                value = MISSING
+            if value is not MISSING:
+                with self._lock:
+                    self.shared_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+            inflight = self._inflight.setdefault(cache_key, [0, 0])
+            inflight[0] += 1
+            started = (inflight[1], self._epoch)
+        try:
+            value = loader()
+        except Exception:
+            with self._lock:
+                self._end_load(cache_key, inflight)
+            raise
+        with self._lock:
+            # Yükleme sürerken invalidate/clear çağrıldıysa değer yazmadan önce okunmuş olabilir;
+            # eski değer TTL boyunca sunulmasın diye saklanmaz
+            if (inflight[1], self._epoch) != started:
+                self.stale_loads += 1
+            elif value is not None:
+                self.set(key, value)
+            self._end_load(cache_key, inflight)
+        return value
+
+    def _end_load(self, cache_key, inflight):
+        # self._lock altında çağrılır
+        inflight[0] -= 1
+        if not inflight[0]:
+            del self._inflight[cache_key]
+
+    def set(self, key, value):
+        cache_key = self._key(key)
+        if self.shared is None:
+            self.local.set(cache_key, value, self.ttl)
+        else:
+            try:
+                self.shared.set(cache_key, value, self.ttl)
+            except Exception as e:
+                print(f"Paylaşılan önbellek yazma hatası ({self.name}): {e}")
+
+    def invalidate(self, key):
+        cache_key = self._key(key)
+        with self._lock:
+            inflight = self._inflight.get(cache_key)
+            if inflight is not None:
+                inflight[1] += 1
+        self.local.delete(cache_key)
+        if self.shared is not None:
+            try:
+                self.shared.delete(cache_key)
+            except Exception as e:
+                print(f"Paylaşılan önbellek silme hatası ({self.name}): {e}")
+        with self._lock:
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self):
+        with self._lock:
+            hits = self.hits + self.shared_hits
+            lookups = hits + self.misses
+            return {
+                'name': self.name,
+                'entries': len(self.local),
+                'max_entries': self.local.max_entries,
+                'ttl_seconds': self.ttl,
+                'shared_backend': type(self.shared).__name__ if self.shared is not None else None,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.local.evictions,
+                'expirations': self.local.expirations,
+                'invalidations': self.invalidations,
+                'stale_loads': self.stale_loads,
+            }
@@ -0,0 +1,154 @@
+# db_module.py
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import oracledb
+from dotenv import load_dotenv
+
+# .env dosyasını yükle
+load_dotenv()
+
+# Oracle bağlantı bilgileri
+oracle_user = os.getenv('ORACLE_USER', 'C##COSMIC_DEFENDERS')
+oracle_password = os.getenv('ORACLE_PASSWORD', 'MyPassword123')
+oracle_host = os.getenv('ORACLE_HOST', 'oracle-db')
+oracle_port = os.getenv('ORACLE_PORT', '1521')
+oracle_sid = os.getenv('ORACLE_SID', 'XE')
+
+oracle_dsn = f"{oracle_host}:{oracle_port}/{oracle_sid}"
+
+# Havuz ayarları (ortam değişkenleri ile değiştirilebilir)
+POOL_MIN = int(os.getenv('DB_POOL_MIN', '2'))
+POOL_MAX = int(os.getenv('DB_POOL_MAX', '10'))
+POOL_INCREMENT = int(os.getenv('DB_POOL_INCREMENT', '1'))
+POOL_WAIT_TIMEOUT_MS = int(os.getenv('DB_POOL_WAIT_TIMEOUT_MS', '5000'))
+POOL_STMT_CACHE_SIZE = int(os.getenv('DB_POOL_STMT_CACHE_SIZE', '50'))
+# Bağlantı havuzdan alınırken, bu kadar saniyedir boşta duran bağlantılar ping ile kontrol edilir.
+# 0 verilirse her alımda kontrol yapılır.
+POOL_PING_INTERVAL = int(os.getenv('DB_POOL_PING_INTERVAL', '60'))
+# Boşta kalan bağlantıların (min üzerindekiler) kapatılma süresi (saniye)
+POOL_IDLE_TIMEOUT = int(os.getenv('DB_POOL_IDLE_TIMEOUT', '300'))
+# Bu süreden uzun süren bağlantı alımları (havuzda bekleme, ping veya yeni oturum açma) yavaş sayılır
+POOL_SLOW_ACQUIRE_MS = float(os.getenv('DB_POOL_SLOW_ACQUIRE_MS', '10'))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Havuzun kendisinin tutmadığı sayaçlar
+_stats_lock = threading.Lock()
+_stats = {
+    'acquires': 0,
+    'slow_acquires': 0,
+    'wait_time_ms': 0.0,
+    'max_wait_time_ms': 0.0,
+    'timeouts': 0,
+    'errors': 0,
+    'dropped': 0,
+}
+
+
+def get_pool():
+    """Paylaşılan Oracle oturum havuzunu döndürür, gerekirse ilk kullanımda oluşturur."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                print(f"Oracle oturum havuzu oluşturuluyor (min={POOL_MIN}, max={POOL_MAX}, increment={POOL_INCREMENT})")
+                _pool = oracledb.create_pool(
+                    user=oracle_user,
+                    password=oracle_password,
+                    dsn=oracle_dsn,
+                    min=POOL_MIN,
+                    max=POOL_MAX,
+                    increment=POOL_INCREMENT,
+                    getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+                    wait_timeout=POOL_WAIT_TIMEOUT_MS,
+                    stmtcachesize=POOL_STMT_CACHE_SIZE,
+                    ping_interval=POOL_PING_INTERVAL,
+                    timeout=POOL_IDLE_TIMEOUT,
+                )
+    return _pool
+
+
+def _record(key, value=1):
+    with _stats_lock:
+        _stats[key] += value
+
+
+def acquire_connection():
+    """Havuzdan bir bağlantı alır ve bekleme istatistiklerini günceller."""
+    pool = get_pool()
+    started = time.perf_counter()
+    try:
+        conn = pool.acquire()
+    except oracledb.DatabaseError as e:
+        error, = e.args
+        # DPY-4005: havuzdan bağlantı beklerken zaman aşımı
+        if getattr(error, 'full_code', '') == 'DPY-4005':
+            _record('timeouts')
+        else:
+            _record('errors')
+        raise
+    waited_ms = (time.perf_counter() - started) * 1000
+    with _stats_lock:
+        _stats['acquires'] += 1
+        _stats['wait_time_ms'] += waited_ms
+        _stats['max_wait_time_ms'] = max(_stats['max_wait_time_ms'], waited_ms)
+        # Alım sonrası busy/max örneklemesi beklemeyi kaçırır; bu yüzden alımın kendisi ölçülür
+        if waited_ms >= POOL_SLOW_ACQUIRE_MS:
+            _stats['slow_acquires'] += 1
+    return conn
+
+
+def release_connection(conn):
+    """Bağlantıyı havuza iade eder; bozulmuş bağlantıları havuzdan atar."""
+    pool = get_pool()
+    try:
+        if conn.is_healthy():
+            pool.release(conn)
+        else:
+            pool.drop(conn)
+            _record('dropped')
+    except Exception as e:
+        print(f"Error releasing connection: {e}")
+
+
+@contextmanager
+def get_db_connection():
+    """Havuzdan bağlantı ödünç alan context manager"""
+    conn = None
+    try:
+        conn = acquire_connection()
+        yield conn
+    finally:
+        if conn:
+            release_connection(conn)
+
+
+def pool_stats():
+    """Havuzun anlık durumunu ve sayaçlarını sözlük olarak döndürür."""
+    with _stats_lock:
+        counters = dict(_stats)
+    acquires = counters['acquires']
+    counters['avg_wait_time_ms'] = round(counters['wait_time_ms'] / acquires, 3) if acquires else 0.0
+    counters['wait_time_ms'] = round(counters['wait_time_ms'], 3)
+    counters['max_wait_time_ms'] = round(counters['max_wait_time_ms'], 3)
+
+    if _pool is None:
+        return {'initialized': False, **counters}
+
+    return {
+        'initialized': True,
+        'busy': _pool.busy,
+        'open': _pool.opened,
+        'min': _pool.min,
+        'max': _pool.max,
+        'increment': _pool.increment,
+        'wait_timeout_ms': _pool.wait_timeout,
+        'stmt_cache_size': _pool.stmtcachesize,
+        'ping_interval': _pool.ping_interval,
+        'slow_acquire_threshold_ms': POOL_SLOW_ACQUIRE_MS,
+        **counters,
+    }
@@ -0,0 +1,286 @@
+# embedding_cache_module.py
+import fcntl
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Embedding önbelleği ayarları
+EMBEDDING_CACHE_DIR = os.getenv('EMBEDDING_CACHE_DIR', 'embedding_cache')
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', '500000'))
+# Önbellekte olmayan metinler API'ye bu boyutta partiler halinde, bu kadar eşzamanlı istekle gönderilir
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '256'))
+EMBEDDING_CONCURRENCY = int(os.getenv('EMBEDDING_CONCURRENCY', '2'))
+
+INITIAL_CAPACITY = 1024
+
+
+def content_key(model, text):
+    """Metin içeriği ve model adından kararlı bir önbellek anahtarı üretir."""
+    return hashlib.sha256(f"{model}\0{text}".encode('utf-8')).hexdigest()
+
+
+class EmbeddingStore:
+    """Vektörleri bellek eşlemeli float32 dosyasında, anahtar -> satır indeksini JSON'da tutar.
+
+    Satırlar LRU sırasıyla izlenir; max_entries aşıldığında en eski kaydın satırı yeniden kullanılır.
+    Dizin birden fazla worker tarafından paylaşılabilir: yazma işlemleri dosya kilidi altında, diskteki
+    indeks yeniden okunarak yapılır; okuyucular paylaşımlı kilitle indeksin güncel halini görür.
+    Okumaların güncellediği kullanım sırası diske ancak aynı sürecin bir sonraki yazmasında aktarılır;
+    hiç yazmayan bir sürecin okumaları sıralamayı etkilemez.
+    """
+
+    def __init__(self, directory, max_entries=EMBEDDING_CACHE_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.vectors_path = os.path.join(directory, 'vectors.f32')
+        self.index_path = os.path.join(directory, 'index.json')
+        self.lock_path = os.path.join(directory, 'index.lock')
+        self._lock = threading.Lock()
+        self.dim = None
+        self.capacity = 0
+        self.slots = OrderedDict()
+        self.next_slot = 0
+        self.evictions = 0
+        self._vectors = None
+        self._index_stamp = None
+        # Son yazmadan bu yana okunan anahtarlar; bir sonraki yazmada LRU sırasına işlenir
+        self._touched = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+        with self._file_lock(exclusive=False):
+            self._refresh()
+
+    @contextmanager
+    def _file_lock(self, exclusive):
+        with open(self.lock_path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self.index_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _reset(self):
+        self.dim = None
+        self.capacity = 0
+        self.slots = OrderedDict()
+        self.next_slot = 0
+        self._vectors = None
+
+    def _refresh(self):
+        """Diskteki indeks başka bir süreç tarafından değiştirildiyse yeniden okur (dosya kilidi altında çağrılır)."""
+        stamp = self._stamp()
+        if stamp == self._index_stamp:
+            return
+        self._index_stamp = stamp
+        if stamp is None or not os.path.exists(self.vectors_path):
+            self._reset()
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            self.dim = index['dim']
+            self.slots = OrderedDict(index['slots'])
+            self.next_slot = index['next_slot']
+            if self._vectors is None or index['capacity'] != self.capacity:
+                self._open(index['capacity'])
+        except Exception as e:
+            print(f"Embedding önbelleği okunamadı, sıfırdan başlanıyor: {e}")
+            self._reset()
+
+    def _open(self, capacity):
+        mode = 'r+' if os.path.exists(self.vectors_path) else 'w+'
+        if mode == 'r+':
+            size = capacity * self.dim * 4
+            if os.path.getsize(self.vectors_path) < size:
+                with open(self.vectors_path, 'r+b') as f:
+                    f.truncate(size)
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode=mode, shape=(capacity, self.dim))
+        self.capacity = capacity
+
+    def _write_index(self):
+        """İndeksi atomik olarak kaydeder (dışlayıcı dosya kilidi altında çağrılır)."""
+        index = {
+            'dim': self.dim,
+            'capacity': self.capacity,
+            'slots': list(self.slots.items()),
+            'next_slot': self.next_slot,
+        }
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+        self._index_stamp = self._stamp()
+
+    def _allocate(self):
+        """Yeni bir satır döndürür; LRU'dan çıkarılan bir satır ise ikinci değer True olur."""
+        if self.next_slot >= self.max_entries:
+            # En uzun süredir kullanılmayan kaydın satırı yeniden kullanılır
+            _, slot = self.slots.popitem(last=False)
+            self.evictions += 1
+            return slot, True
+        if self.next_slot >= self.capacity:
+            if self._vectors is not None:
+                self._vectors.flush()
+            self._open(min(max(self.capacity * 2, INITIAL_CAPACITY), self.max_entries))
+        slot = self.next_slot
+        self.next_slot += 1
+        return slot, False
+
+    def get_many(self, keys):
+        """Bulunan anahtarlar için {anahtar: vektör listesi} döndürür."""
+        found = {}
+        with self._lock, self._file_lock(exclusive=False):
+            self._refresh()
+            if self._vectors is None:
+                return found
+            for key in keys:
+                slot = self.slots.get(key)
+                if slot is not None:
+                    self.slots.move_to_end(key)
+                    self._touched[key] = None
+                    self._touched.move_to_end(key)
+                    found[key] = self._vectors[slot].tolist()
+            while len(self._touched) > self.max_entries:
+                self._touched.popitem(last=False)
+        return found
+
+    def put_many(self, items):
+        """Vektörleri tek bir yazma işleminde ekler ve indeksi diske kaydeder."""
+        # Aynı anahtarın son değeri geçerlidir; max_entries'ten fazla yeni anahtar bu yazmada birbirini
+        # çıkaracağı için sadece son max_entries kayıt yazılır
+        items = list(OrderedDict(items).items())[-self.max_entries:]
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh()
+            # Bu sürecin okumaları diskten yeniden okunan sıraya işlenir
+            for key in self._touched:
+                if key in self.slots:
+                    self.slots.move_to_end(key)
+            self._touched.clear()
+            writes = []
+            reused = False
+            for key, vector in items:
+                if self.dim is None:
+                    self.dim = len(vector)
+                if len(vector) != self.dim:
+                    raise ValueError(f"Embedding boyutu uyuşmuyor: {len(vector)} != {self.dim}")
+                slot = self.slots.get(key)
+                if slot is not None:
+                    # Bu işlemde yazılan bir satır aynı işlemde LRU'dan çıkarılmasın
+                    self.slots.move_to_end(key)
+                else:
+                    slot, evicted = self._allocate()
+                    reused = reused or evicted
+                writes.append((key, slot, vector))
+            if not writes:
+                return
+            if reused:
+                # Çıkarılan anahtarlar, satırları üzerine yazılmadan önce indeksten silinmiş olmalı;
+                # aksi halde yarıda kalan bir yazma eski anahtarı yeni vektörle eşleştirir
+                self._write_index()
+            for key, slot, vector in writes:
+                self._vectors[slot] = vector
+            self._vectors.flush()
+            for key, slot, _ in writes:
+                self.slots[key] = slot
+                self.slots.move_to_end(key)
+            self._write_index()
+
+    def __len__(self):
+        return len(self.slots)
+
+
+class CachedEmbeddings(Embeddings):
+    """Bir embedding modelini içerik adresli kalıcı önbellekle sarar.
+
+    Sadece önbellekte olmayan metinler, tekrarları ayıklanarak ve partiler halinde modele gönderilir.
+    """
+
+    def __init__(self, embeddings, model_name, directory=EMBEDDING_CACHE_DIR,
+                 max_entries=EMBEDDING_CACHE_MAX_ENTRIES, batch_size=EMBEDDING_BATCH_SIZE,
+                 concurrency=EMBEDDING_CONCURRENCY):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        # Model başına ayrı dizin; farklı boyutlu vektörler karışmaz
+        self.store = EmbeddingStore(os.path.join(directory, content_key('model', model_name)[:16]), max_entries)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.api_batches = 0
+
+    def _embed_batch(self, texts):
+        vectors = self.embeddings.embed_documents(texts)
+        with self._lock:
+            self.api_batches += 1
+        return vectors
+
+    def embed_documents(self, texts):
+        keys = [content_key(self.model_name, text) for text in texts]
+        found = self.store.get_many(keys)
+
+        missing = OrderedDict()
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+
+        misses = sum(1 for key in keys if key not in found)
+        with self._lock:
+            self.hits += len(texts) - misses
+            self.misses += misses
+
+        if missing:
+            missing_keys = list(missing.keys())
+            missing_texts = list(missing.values())
+            batches = [
+                (missing_keys[i:i + self.batch_size], missing_texts[i:i + self.batch_size])
+                for i in range(0, len(missing_texts), self.batch_size)
+            ]
+            if self.concurrency > 1 and len(batches) > 1:
+                with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                    results = list(executor.map(lambda batch: self._embed_batch(batch[1]), batches))
+            else:
+                results = [self._embed_batch(batch[1]) for batch in batches]
+
+            new_items = []
+            for (batch_keys, _), vectors in zip(batches, results):
+                new_items.extend(zip(batch_keys, vectors))
+            # Diğer worker'larla tutarlılık için tüm yeni vektörler tek kilitli işlemde yazılır
+            self.store.put_many(new_items)
+            found.update(new_items)
+
+        return [found[key] for key in keys]
+
+    def embed_query(self, text):
+        # Sorgular tekrar etmediği için önbelleğe yazılmaz; doküman vektörlerini LRU'dan atmasınlar
+        return self.embeddings.embed_query(text)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'model': self.model_name,
+                'entries': len(self.store),
+                'max_entries': self.store.max_entries,
+                'dim': self.store.dim,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'api_batches': self.api_batches,
+                'evictions': self.store.evictions,
+                'batch_size': self.batch_size,
+                'concurrency': self.concurrency,
+            }
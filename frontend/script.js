@@ -153,11 +153,10 @@ async function fetchWithToken(url, options = {}) {
             console.error('Hata detayları:', errorData);
         }
         
-        // Yeni token varsa güncelle
-        const newToken = response.headers.get('New-Token');
-        if (newToken) {
-            localStorage.setItem('token', newToken);
-            console.log('Token yenilendi');
+        // Rate limit aşıldıysa kullanıcıyı bilgilendir
+        if (response.status === 429) {
+            const retryAfter = response.headers.get('Retry-After');
+            showNotification(`Çok fazla istek gönderildi. ${retryAfter || 1} saniye sonra tekrar deneyin.`, 'error');
         }
         
         // Token süresi dolmuşsa veya geçersizse çıkış yap
@@ -255,8 +254,19 @@ async function fetchAdminPanel() {
     adminContent.innerHTML = '<div class="admin-loader">Yükleniyor...</div>';
 
     try {
-        const response = await fetchWithToken(`${API_URL}/admin-only`);
-        const data = await response.json();
+        // Sunucu keyset sayfalaması yapar; next_after boş gelene kadar sayfaları topla
+        let data = null;
+        let users = [];
+        let after = null;
+        do {
+            const url = after ? `${API_URL}/admin-only?after=${encodeURIComponent(after)}` : `${API_URL}/admin-only`;
+            const response = await fetchWithToken(url);
+            data = await response.json();
+            if (!data.success) break;
+            users = users.concat(data.data);
+            after = data.next_after;
+        } while (after);
+        data.data = users;
         
         if (data.success) {
             adminContent.innerHTML = `
@@ -0,0 +1,331 @@
+# leaderboard_module.py
+import os
+import random
+import threading
+import time
+
+# Liderlik tablosu ayarları
+LEADERBOARD_RECONCILE_SECONDS = int(os.getenv('LEADERBOARD_RECONCILE_SECONDS', '300'))
+LEADERBOARD_FETCH_BATCH_SIZE = int(os.getenv('LEADERBOARD_FETCH_BATCH_SIZE', '1000'))
+LEADERBOARD_MAX_N = int(os.getenv('LEADERBOARD_MAX_N', '100'))
+
+# Desteklenen sıralama türleri: ad -> (highest_score, total_score, games_played) satırından skor
+BOARD_METRICS = {
+    'highest_score': lambda highest, total, games: highest,
+    'average_score': lambda highest, total, games: total / games if games else 0,
+}
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, levels):
+        self.key = key
+        self.next = [None] * levels
+        self.width = [1] * levels
+
+
+class IndexableSkipList:
+    """Sıralı anahtarlar için sıra istatistikli (indexable) skip list.
+
+    Ekleme, silme, sıra (rank) bulma ve indeksle erişim ortalama O(log n)'dir.
+    Her bağlantı, atladığı eleman sayısını (width) tutar.
+    """
+
+    MAX_LEVELS = 32
+
+    def __init__(self):
+        self.head = _Node(None, self.MAX_LEVELS)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _random_level(self):
+        level = 1
+        while level < self.MAX_LEVELS and random.random() < 0.5:
+            level += 1
+        return level
+
+    def _find_chain(self, key):
+        chain = [None] * self.MAX_LEVELS
+        steps_at_level = [0] * self.MAX_LEVELS
+        node = self.head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+        return chain, steps_at_level
+
+    def insert(self, key):
+        chain, steps_at_level = self._find_chain(key)
+        levels = self._random_level()
+        new_node = _Node(key, levels)
+        steps = 0
+        for level in range(levels):
+            prev = chain[level]
+            new_node.next[level] = prev.next[level]
+            prev.next[level] = new_node
+            new_node.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain, _ = self._find_chain(key)
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        levels = len(target.next)
+        for level in range(levels):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def rank(self, key):
+        """Anahtarın 0 tabanlı sırasını döndürür, yoksa KeyError."""
+        chain, steps_at_level = self._find_chain(key)
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        return sum(steps_at_level)
+
+    def slice(self, start, count):
+        """start (0 tabanlı) konumundan itibaren en fazla count anahtar döndürür."""
+        if start < 0:
+            count += start
+            start = 0
+        if count <= 0 or start >= self.size:
+            return []
+        node = self.head
+        remaining = start + 1
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        keys = []
+        while node is not None and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class Leaderboard:
+    """Tek bir metriğe göre profil sıralaması. Anahtar (-skor, profile_id) olduğundan
+    küçük anahtar daha iyi sıradır ve eşit skorlar profile_id ile ayrılır."""
+
+    def __init__(self, metric):
+        self.metric = metric
+        self.ranking = IndexableSkipList()
+        self.keys = {}
+
+    def upsert(self, profile_id, value):
+        key = (-value, profile_id)
+        old_key = self.keys.get(profile_id)
+        if old_key == key:
+            return
+        if old_key is not None:
+            self.ranking.remove(old_key)
+        self.ranking.insert(key)
+        self.keys[profile_id] = key
+
+    def remove(self, profile_id):
+        old_key = self.keys.pop(profile_id, None)
+        if old_key is not None:
+            self.ranking.remove(old_key)
+
+    def rank(self, profile_id):
+        key = self.keys.get(profile_id)
+        if key is None:
+            return None
+        return self.ranking.rank(key)
+
+    def slice(self, start, count):
+        start = max(start, 0)
+        return [(start + i, -key[0], key[1]) for i, key in enumerate(self.ranking.slice(start, count))]
+
+    def __len__(self):
+        return len(self.ranking)
+
+
+class LeaderboardService:
+    """Oracle'daki player_stats tablosundan beslenen, bellekte sıcak tutulan liderlik tabloları."""
+
+    PROFILE_QUERY = """
+        SELECT pp.profile_id, pp.user_id, pp.nickname,
+               ps.highest_score, ps.total_score, ps.games_played
+        FROM player_profiles pp
+        JOIN player_stats ps ON pp.profile_id = ps.profile_id
+        WHERE ps.games_played > 0
+    """
+
+    def __init__(self, connection_factory, reconcile_seconds=LEADERBOARD_RECONCILE_SECONDS):
+        self.connection_factory = connection_factory
+        self.reconcile_seconds = reconcile_seconds
+        self._lock = threading.RLock()
+        self.boards = {name: Leaderboard(name) for name in BOARD_METRICS}
+        self.profiles = {}
+        self.user_profiles = {}
+        self.ready = False
+        self.last_reconciled_at = None
+        self.last_reconcile_ms = None
+        self._thread = None
+        # Yükleme sürerken gelen tazeleme satırları ve silinen kullanıcılar; takas sonrası yeniden uygulanır
+        self._loading = False
+        self._pending_rows = {}
+        self._pending_removals = set()
+
+    def _fetch_rows(self, extra_where="", params=None):
+        with self.connection_factory() as conn:
+            with conn.cursor() as cursor:
+                cursor.arraysize = LEADERBOARD_FETCH_BATCH_SIZE
+                cursor.prefetchrows = LEADERBOARD_FETCH_BATCH_SIZE
+                cursor.execute(self.PROFILE_QUERY + extra_where, params or {})
+                while True:
+                    rows = cursor.fetchmany()
+                    if not rows:
+                        break
+                    yield from rows
+
+    def _apply(self, boards, profiles, user_profiles, row):
+        profile_id, user_id, nickname, highest, total, games = row
+        profiles[profile_id] = {'user_id': user_id, 'nickname': nickname, 'games_played': games or 0}
+        user_profiles.setdefault(user_id, set()).add(profile_id)
+        for name, metric in BOARD_METRICS.items():
+            boards[name].upsert(profile_id, metric(highest or 0, total or 0, games or 0))
+
+    def reconcile(self):
+        """Tüm tabloyu veritabanından yeniden yükler ve yapıları atomik olarak değiştirir."""
+        started = time.perf_counter()
+        boards = {name: Leaderboard(name) for name in BOARD_METRICS}
+        profiles = {}
+        user_profiles = {}
+        with self._lock:
+            self._loading = True
+            self._pending_rows = {}
+            self._pending_removals = set()
+        try:
+            for row in self._fetch_rows():
+                self._apply(boards, profiles, user_profiles, row)
+        except Exception:
+            with self._lock:
+                self._loading = False
+            raise
+        with self._lock:
+            # Yükleme sırasında yazılan skorlar ve silinen kullanıcılar yeni yapılarda kaybolmamalı
+            for row in self._pending_rows.values():
+                # Yüklemeden önce okunmuş eski bir tazeleme, yüklenen daha güncel satırı ezmemeli
+                if (row[5] or 0) >= profiles.get(row[0], {}).get('games_played', -1):
+                    self._apply(boards, profiles, user_profiles, row)
+            for user_id in self._pending_removals:
+                self._remove_user(boards, profiles, user_profiles, user_id)
+            self._loading = False
+            self._pending_rows = {}
+            self._pending_removals = set()
+            self.boards = boards
+            self.profiles = profiles
+            self.user_profiles = user_profiles
+            self.ready = True
+            self.last_reconciled_at = time.time()
+            self.last_reconcile_ms = round((time.perf_counter() - started) * 1000, 2)
+        print(f"Liderlik tablosu yüklendi: {len(profiles)} profil ({self.last_reconcile_ms} ms)")
+
+    def refresh_profiles(self, profile_ids):
+        """Skor yazımından sonra sadece etkilenen profilleri veritabanından tazeler."""
+        profile_ids = list(profile_ids)
+        with self._lock:
+            if not profile_ids or not (self.ready or self._loading):
+                return
+        binds = {f"p{i}": pid for i, pid in enumerate(profile_ids)}
+        extra_where = f" AND pp.profile_id IN ({', '.join(':' + b for b in binds)})"
+        rows = list(self._fetch_rows(extra_where, binds))
+        with self._lock:
+            for row in rows:
+                if self._loading:
+                    # Sayaçlar yalnızca artar; aynı profil için en çok oyunlu satır en günceldir
+                    pending = self._pending_rows.get(row[0])
+                    if pending is None or (row[5] or 0) >= (pending[5] or 0):
+                        self._pending_rows[row[0]] = row
+                if self.ready:
+                    self._apply(self.boards, self.profiles, self.user_profiles, row)
+
+    @staticmethod
+    def _remove_user(boards, profiles, user_profiles, user_id):
+        for profile_id in user_profiles.pop(user_id, set()):
+            profiles.pop(profile_id, None)
+            for board in boards.values():
+                board.remove(profile_id)
+
+    def remove_user(self, user_id):
+        with self._lock:
+            if self._loading:
+                self._pending_removals.add(user_id)
+                self._pending_rows = {pid: row for pid, row in self._pending_rows.items() if row[1] != user_id}
+            self._remove_user(self.boards, self.profiles, self.user_profiles, user_id)
+
+    def _entry(self, rank, value, profile_id):
+        profile = self.profiles.get(profile_id, {})
+        return {
+            'rank': rank + 1,
+            'profile_id': profile_id,
+            'nickname': profile.get('nickname'),
+            'value': value
+        }
+
+    def top(self, board, n):
+        with self._lock:
+            return [self._entry(*item) for item in self.boards[board].slice(0, n)]
+
+    def rank_of_user(self, board, user_id):
+        with self._lock:
+            results = []
+            for profile_id in sorted(self.user_profiles.get(user_id, ())):
+                rank = self.boards[board].rank(profile_id)
+                if rank is not None:
+                    key = self.boards[board].keys[profile_id]
+                    results.append(self._entry(rank, -key[0], profile_id))
+            return results
+
+    def around_user(self, board, user_id, window):
+        with self._lock:
+            ranks = self.rank_of_user(board, user_id)
+            if not ranks:
+                return []
+            center = ranks[0]['rank'] - 1
+            start = max(center - window, 0)
+            return [self._entry(*item) for item in self.boards[board].slice(start, center - start + window + 1)]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'ready': self.ready,
+                'profiles': len(self.profiles),
+                'boards': {name: len(board) for name, board in self.boards.items()},
+                'last_reconciled_at': self.last_reconciled_at,
+                'last_reconcile_ms': self.last_reconcile_ms,
+                'reconcile_seconds': self.reconcile_seconds,
+            }
+
+    def _run(self):
+        while True:
+            # İlk yükleme start() öncesinde yapıldıysa sonraki uzlaştırma bir periyot sonradır
+            if self.ready:
+                time.sleep(self.reconcile_seconds)
+            try:
+                self.reconcile()
+            except Exception as e:
+                print(f"Liderlik tablosu yükleme hatası: {str(e)}")
+                if not self.ready:
+                    time.sleep(self.reconcile_seconds)
+
+    def start(self):
+        """Periyodik uzlaştırmayı arka plan thread'inde başlatır; tablo henüz yüklenmediyse önce yükler."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='leaderboard-reconcile', daemon=True)
+            self._thread.start()
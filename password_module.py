@@ -0,0 +1,107 @@
+# password_module.py
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import bcrypt
+
+# bcrypt iş faktörü (log2 tur sayısı). benchmarks/bench_bcrypt.py ile kalibre edilebilir.
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+# Aynı anda çalışan hash işlemleri; bcrypt GIL'i bıraktığı için thread havuzu yeterlidir
+PASSWORD_POOL_WORKERS = int(os.getenv('PASSWORD_POOL_WORKERS', str(os.cpu_count() or 2)))
+# Çalışan + kuyrukta bekleyen en fazla iş; aşılırsa istek hemen reddedilir
+PASSWORD_POOL_MAX_PENDING = int(os.getenv('PASSWORD_POOL_MAX_PENDING', str(PASSWORD_POOL_WORKERS * 4)))
+PASSWORD_TIMEOUT_SECONDS = float(os.getenv('PASSWORD_TIMEOUT_SECONDS', '10'))
+
+
+class PasswordHasherOverloaded(Exception):
+    """Hash havuzu dolu olduğunda fırlatılır; istemciye 503 dönülmelidir."""
+    pass
+
+
+class PasswordHasher:
+    """bcrypt hash/doğrulama işlemlerini sınırlı bir thread havuzunda çalıştırır."""
+
+    def __init__(self, rounds=BCRYPT_ROUNDS, workers=PASSWORD_POOL_WORKERS,
+                 max_pending=PASSWORD_POOL_MAX_PENDING, timeout=PASSWORD_TIMEOUT_SECONDS):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.total_time_ms = 0.0
+
+    def _finished(self, started):
+        # Slot, iş gerçekten bittiğinde bırakılır; zaman aşımına uğrayan işler de sayılır
+        self._slots.release()
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+            self.total_time_ms += (time.perf_counter() - started) * 1000
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherOverloaded("Şifre işlem kuyruğu dolu")
+        with self._lock:
+            self.pending += 1
+        started = time.perf_counter()
+        future = self._executor.submit(func, *args)
+        future.add_done_callback(lambda _: self._finished(started))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise PasswordHasherOverloaded("Şifre işlemi zaman aşımına uğradı")
+
+    def hash(self, password):
+        """Şifreyi hashler ve str olarak döndürür."""
+        hashed = self._run(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(rounds=self.rounds))
+        return hashed.decode('utf-8')
+
+    def verify(self, password, hashed):
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rounds': self.rounds,
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': self.pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'avg_time_ms': round(self.total_time_ms / self.completed, 2) if self.completed else 0.0,
+            }
+
+
+def measure_rounds(rounds, samples=3):
+    """Verilen iş faktörü için tek bir hash işleminin ortalama süresini (ms) ölçer."""
+    salt = bcrypt.gensalt(rounds=rounds)
+    started = time.perf_counter()
+    for _ in range(samples):
+        bcrypt.hashpw(b'calibration-password', salt)
+    return (time.perf_counter() - started) / samples * 1000
+
+
+def calibrate_rounds(target_ms, min_rounds=10, max_rounds=16, samples=3):
+    """Hedef gecikmeyi aşmayan en yüksek iş faktörünü ve ölçümleri döndürür."""
+    chosen = min_rounds
+    timings = {}
+    for rounds in range(min_rounds, max_rounds + 1):
+        elapsed = measure_rounds(rounds, samples)
+        timings[rounds] = elapsed
+        if elapsed > target_ms:
+            break
+        chosen = rounds
+    return chosen, timings
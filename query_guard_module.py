@@ -0,0 +1,223 @@
+# query_guard_module.py
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import deque
+
+# enforce: eşik aşımında reddet veya satır sınırı ekle; log: sadece kaydet; off: planı hiç okuma
+SQL_GUARD_MODE = os.getenv('SQL_GUARD_MODE', 'enforce')
+# Optimizer'ın tahmini maliyet ve satır sayısı eşikleri (kök plan satırı)
+SQL_GUARD_MAX_COST = float(os.getenv('SQL_GUARD_MAX_COST', '100000'))
+SQL_GUARD_MAX_CARDINALITY = float(os.getenv('SQL_GUARD_MAX_CARDINALITY', '100000'))
+# Eşiği aşan sorgular reddedilmeden önce bu satır sınırıyla yeniden yazılıp tekrar değerlendirilir
+SQL_GUARD_REWRITE_ROWS = int(os.getenv('SQL_GUARD_REWRITE_ROWS', '1000'))
+SQL_GUARD_REJECT_CARTESIAN = os.getenv('SQL_GUARD_REJECT_CARTESIAN', 'true').lower() in ('1', 'true', 'yes')
+# Kararların eşik ayarı için JSON satırları olarak yazılacağı dosya (boşsa sadece bellekte tutulur)
+SQL_GUARD_LOG_FILE = os.getenv('SQL_GUARD_LOG_FILE', '')
+SQL_GUARD_RECENT = int(os.getenv('SQL_GUARD_RECENT', '100'))
+SQL_GUARD_CALL_TIMEOUT_MS = int(os.getenv('SQL_GUARD_CALL_TIMEOUT_MS', '5000'))
+
+ALLOW = 'allow'
+REWRITE = 'rewrite'
+REJECT = 'reject'
+
+ROW_LIMIT_PATTERN = re.compile(r"\bfetch\s+(?:first|next)\b|\brownum\b", re.IGNORECASE)
+FOR_UPDATE_PATTERN = re.compile(r"\bfor\s+update\b", re.IGNORECASE)
+# Sadece bu hatalarda plan okunamayan sorguya izin verilir: sözdizimi/ad çözümleme hataları
+# (ORA-009xx, ORA-01756) sorgu çalıştırıldığında da aynen oluşur ve veritabanına yük bindirmez
+PARSE_ERROR_PATTERN = re.compile(r"\bORA-(?:009\d\d|01756)\b")
+
+PLAN_QUERY = """
+    SELECT id, operation, options, object_name, cost, cardinality
+    FROM plan_table
+    WHERE statement_id = :statement_id
+    ORDER BY id
+"""
+
+
+class QueryPlan:
+    """EXPLAIN PLAN çıktısının özeti."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        root = rows[0] if rows else None
+        self.cost = root['cost'] if root else None
+        self.cardinality = root['cardinality'] if root else None
+        self.cartesian = [
+            row['object_name'] or row['operation']
+            for row in rows if row['options'] and 'CARTESIAN' in row['options'].upper()
+        ]
+
+    def to_dict(self):
+        return {'cost': self.cost, 'cardinality': self.cardinality, 'cartesian': bool(self.cartesian)}
+
+
+class GuardDecision:
+    def __init__(self, action, sql, source, reason=None, plan=None, original_sql=None):
+        self.action = action
+        self.sql = sql
+        self.source = source
+        self.reason = reason
+        self.plan = plan
+        self.original_sql = original_sql or sql
+
+    @property
+    def allowed(self):
+        return self.action != REJECT
+
+    def to_dict(self):
+        return {
+            'action': self.action,
+            'source': self.source,
+            'reason': self.reason,
+            'sql': self.sql,
+            'original_sql': self.original_sql,
+            **(self.plan.to_dict() if self.plan else {'cost': None, 'cardinality': None, 'cartesian': False}),
+        }
+
+
+def is_parse_error(error):
+    """Hatanın SQL'in kendisinden kaynaklanan bir ayrıştırma hatası olup olmadığını döndürür."""
+    detail = error.args[0] if getattr(error, 'args', None) else None
+    code = getattr(detail, 'full_code', None) or str(error)
+    return bool(PARSE_ERROR_PATTERN.search(code))
+
+
+def add_row_limit(sql, rows):
+    """Satır sınırı olmayan bir SELECT'e FETCH FIRST n ROWS ONLY ekler; eklenemiyorsa None döndürür."""
+    if ROW_LIMIT_PATTERN.search(sql) or FOR_UPDATE_PATTERN.search(sql):
+        return None
+    return f"{sql.rstrip().rstrip(';')} FETCH FIRST {int(rows)} ROWS ONLY"
+
+
+class QueryGuard:
+    """Çalıştırılacak SQL'in planını EXPLAIN PLAN ile okuyup maliyet eşiklerine göre karar verir.
+
+    Kartezyen birleşim içeren sorgular reddedilir. Maliyet veya satır tahmini eşiği aşan sorgulara
+    FETCH FIRST n ROWS ONLY eklenir ve yeniden değerlendirilir; hala aşıyorsa sorgu reddedilir.
+    Plan sözdizimi hatası nedeniyle okunamazsa sorgu engellenmez, hata zaten çalıştırmada görülür.
+    Diğer hatalarda (zaman aşımı DPY-4024/ORA-03156, bağlantı sorunları) sorgu reddedilir.
+    """
+
+    def __init__(self, connection_factory, mode=SQL_GUARD_MODE, max_cost=SQL_GUARD_MAX_COST,
+                 max_cardinality=SQL_GUARD_MAX_CARDINALITY, rewrite_rows=SQL_GUARD_REWRITE_ROWS,
+                 reject_cartesian=SQL_GUARD_REJECT_CARTESIAN, log_file=SQL_GUARD_LOG_FILE):
+        self.connection_factory = connection_factory
+        self.mode = mode
+        self.max_cost = max_cost
+        self.max_cardinality = max_cardinality
+        self.rewrite_rows = rewrite_rows
+        self.reject_cartesian = reject_cartesian
+        self.log_file = log_file
+        self._lock = threading.Lock()
+        self.recent = deque(maxlen=SQL_GUARD_RECENT)
+        self.counts = {ALLOW: 0, REWRITE: 0, REJECT: 0}
+        self.explain_errors = 0
+
+    def explain(self, sql):
+        """Sorgunun planını plan_table üzerinden okur."""
+        statement_id = uuid.uuid4().hex[:30]
+        with self.connection_factory() as conn:
+            conn.call_timeout = SQL_GUARD_CALL_TIMEOUT_MS
+            try:
+                with conn.cursor() as cursor:
+                    # EXPLAIN PLAN bağlama değişkeni kabul etmez; statement_id yalnızca onaltılık karakterdir
+                    cursor.execute(f"EXPLAIN PLAN SET STATEMENT_ID = '{statement_id}' FOR {sql.rstrip().rstrip(';')}")
+                    cursor.execute(PLAN_QUERY, {'statement_id': statement_id})
+                    rows = [
+                        {'id': row[0], 'operation': row[1], 'options': row[2], 'object_name': row[3],
+                         'cost': row[4], 'cardinality': row[5]}
+                        for row in cursor.fetchall()
+                    ]
+                    cursor.execute("DELETE FROM plan_table WHERE statement_id = :statement_id",
+                                   {'statement_id': statement_id})
+                conn.commit()
+            finally:
+                conn.call_timeout = 0
+        return QueryPlan(rows)
+
+    def _over_threshold(self, plan):
+        if plan.cost is not None and plan.cost > self.max_cost:
+            return f"tahmini maliyet {plan.cost} > {self.max_cost:g}"
+        if plan.cardinality is not None and plan.cardinality > self.max_cardinality:
+            return f"tahmini satır sayısı {plan.cardinality} > {self.max_cardinality:g}"
+        return None
+
+    def _evaluate(self, sql, source):
+        try:
+            plan = self.explain(sql)
+        except Exception as e:
+            with self._lock:
+                self.explain_errors += 1
+            if is_parse_error(e):
+                return GuardDecision(ALLOW, sql, source, f"plan okunamadı: {str(e)}")
+            # Satır sınırı COUNT(*), GROUP BY veya ORDER BY maliyetini sınırlamaz; planı okunamayan
+            # (büyük olasılıkla pahalı) sorgu çalıştırılmaz
+            return GuardDecision(REJECT, sql, source, f"plan okunamadı: {str(e)}")
+
+        if plan.cartesian and self.reject_cartesian:
+            return GuardDecision(REJECT, sql, source, f"kartezyen birleşim: {', '.join(plan.cartesian)}", plan)
+
+        reason = self._over_threshold(plan)
+        if reason is None:
+            return GuardDecision(ALLOW, sql, source, None, plan)
+
+        limited_sql = add_row_limit(sql, self.rewrite_rows)
+        if limited_sql is None:
+            return GuardDecision(REJECT, sql, source, reason, plan)
+        try:
+            limited_plan = self.explain(limited_sql)
+        except Exception as e:
+            return GuardDecision(REJECT, sql, source, f"{reason}; satır sınırlı plan okunamadı: {str(e)}", plan)
+        limited_reason = self._over_threshold(limited_plan)
+        if limited_reason is not None:
+            return GuardDecision(REJECT, sql, source, f"{reason}; FETCH FIRST {self.rewrite_rows} ile: {limited_reason}",
+                                 limited_plan, original_sql=sql)
+        return GuardDecision(REWRITE, limited_sql, source, f"{reason}; FETCH FIRST {self.rewrite_rows} eklendi",
+                             limited_plan, original_sql=sql)
+
+    def _record(self, decision):
+        entry = {'at': time.time(), **decision.to_dict()}
+        with self._lock:
+            self.counts[decision.action] += 1
+            self.recent.appendleft(entry)
+        if decision.action != ALLOW or decision.reason:
+            print(f"SQL guard [{decision.source}] {decision.action}: {decision.reason}")
+        if self.log_file:
+            try:
+                with self._lock, open(self.log_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+            except OSError as e:
+                print(f"SQL guard günlüğü yazılamadı: {str(e)}")
+
+    def check(self, sql, source):
+        """SQL için karar verir; enforce dışındaki modlarda sorgu hiçbir zaman değiştirilmez veya reddedilmez."""
+        if self.mode == 'off':
+            return GuardDecision(ALLOW, sql, source, None)
+        decision = self._evaluate(sql, source)
+        if self.mode != 'enforce' and decision.action != ALLOW:
+            decision = GuardDecision(ALLOW, sql, source, f"[{self.mode}] {decision.action}: {decision.reason}",
+                                     decision.plan)
+        self._record(decision)
+        return decision
+
+    def stats(self):
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'max_cost': self.max_cost,
+                'max_cardinality': self.max_cardinality,
+                'rewrite_rows': self.rewrite_rows,
+                'reject_cartesian': self.reject_cartesian,
+                'allowed': self.counts[ALLOW],
+                'rewritten': self.counts[REWRITE],
+                'rejected': self.counts[REJECT],
+                'explain_errors': self.explain_errors,
+            }
+
+    def recent_decisions(self):
+        with self._lock:
+            return list(self.recent)
@@ -0,0 +1,119 @@
+# query_runner_module.py
+import base64
+import json
+import os
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+# Admin SELECT sorgularının doğrudan çalıştırılması için satır/bayt bütçeleri
+SQL_FALLBACK_MAX_ROWS = int(os.getenv('SQL_FALLBACK_MAX_ROWS', '1000'))
+SQL_FALLBACK_MAX_BYTES = int(os.getenv('SQL_FALLBACK_MAX_BYTES', str(5 * 1024 * 1024)))
+# NDJSON akış modunda satırlar bellekte biriktirilmediği için bütçe daha yüksektir
+SQL_FALLBACK_STREAM_MAX_ROWS = int(os.getenv('SQL_FALLBACK_STREAM_MAX_ROWS', '100000'))
+SQL_FALLBACK_STREAM_MAX_BYTES = int(os.getenv('SQL_FALLBACK_STREAM_MAX_BYTES', str(100 * 1024 * 1024)))
+SQL_FALLBACK_ARRAYSIZE = int(os.getenv('SQL_FALLBACK_ARRAYSIZE', '500'))
+
+
+def to_json_value(value):
+    """Oracle'dan gelen değeri JSON'da doğal karşılığına çevirir (sayılar sayı, tarihler ISO metin)."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+    if hasattr(value, 'read'):
+        # CLOB/BLOB
+        return to_json_value(value.read())
+    return str(value)
+
+
+def describe_columns(cursor):
+    return [
+        {'name': column[0], 'type': getattr(column[1], 'name', str(column[1]))}
+        for column in cursor.description
+    ]
+
+
+def iter_select(connection_factory, sql, params=None, max_rows=SQL_FALLBACK_MAX_ROWS,
+                max_bytes=SQL_FALLBACK_MAX_BYTES, arraysize=SQL_FALLBACK_ARRAYSIZE, call_timeout_ms=0):
+    """SELECT sorgusunu partiler halinde okur.
+
+    Önce ('columns', [...]) verir, sonra her satır için ('row', [...], json_metni), en sonda da
+    ('done', row_count, truncated_reason). Satır veya bayt bütçesi dolunca okuma durdurulur;
+    transaction commit edilmez.
+    """
+    with connection_factory() as conn:
+        # Havuzdaki bağlantı paylaşıldığı için çağrı süresi sınırı iş bitince kaldırılır
+        conn.call_timeout = call_timeout_ms
+        try:
+            with conn.cursor() as cursor:
+                # Bütçeden fazla satırı ağdan çekmemek için parti boyu bütçeyle sınırlanır
+                cursor.arraysize = max(1, min(arraysize, max_rows + 1))
+                cursor.prefetchrows = cursor.arraysize
+                cursor.execute(sql, params or {})
+                if cursor.description is None:
+                    raise ValueError("Sorgu satır döndürmüyor")
+                yield 'columns', describe_columns(cursor)
+                row_count = 0
+                size = 0
+                truncated = None
+                while truncated is None:
+                    rows = cursor.fetchmany()
+                    if not rows:
+                        break
+                    for row in rows:
+                        if row_count >= max_rows:
+                            truncated = 'max_rows'
+                            break
+                        values = [to_json_value(value) for value in row]
+                        encoded = json.dumps(values, ensure_ascii=False)
+                        if size + len(encoded) > max_bytes:
+                            truncated = 'max_bytes'
+                            break
+                        size += len(encoded)
+                        row_count += 1
+                        yield 'row', values, encoded
+                yield 'done', row_count, truncated
+        finally:
+            conn.call_timeout = 0
+
+
+def run_select(connection_factory, sql, params=None, max_rows=SQL_FALLBACK_MAX_ROWS,
+               max_bytes=SQL_FALLBACK_MAX_BYTES, arraysize=SQL_FALLBACK_ARRAYSIZE, call_timeout_ms=0):
+    """Sorgu sonucunu bütçe dahilinde toplar: {'columns', 'rows', 'row_count', 'truncated', 'bytes'}."""
+    result = {'columns': [], 'rows': [], 'row_count': 0, 'truncated': None, 'bytes': 0}
+    for item in iter_select(connection_factory, sql, params, max_rows, max_bytes, arraysize, call_timeout_ms):
+        if item[0] == 'columns':
+            result['columns'] = item[1]
+        elif item[0] == 'row':
+            result['rows'].append(item[1])
+            result['bytes'] += len(item[2])
+        else:
+            result['row_count'], result['truncated'] = item[1], item[2]
+    return result
+
+
+def stream_select_ndjson(connection_factory, sql, params=None, max_rows=SQL_FALLBACK_STREAM_MAX_ROWS,
+                         max_bytes=SQL_FALLBACK_STREAM_MAX_BYTES, arraysize=SQL_FALLBACK_ARRAYSIZE,
+                         call_timeout_ms=0, header=None):
+    """Sonucu satır başına bir JSON olacak şekilde akıtır.
+
+    İlk satır {"columns": [...]} (header ile birleştirilir), sonraki her satır bir değer dizisi,
+    son satır {"done": true, "row_count": n, "truncated": ...} veya hata durumunda {"error": ...}.
+    """
+    try:
+        for item in iter_select(connection_factory, sql, params, max_rows, max_bytes, arraysize, call_timeout_ms):
+            if item[0] == 'columns':
+                yield json.dumps({**(header or {}), 'columns': item[1]}, ensure_ascii=False) + '\n'
+            elif item[0] == 'row':
+                yield item[2] + '\n'
+            else:
+                yield json.dumps({'done': True, 'row_count': item[1], 'truncated': item[2]}) + '\n'
+    except Exception as e:
+        print(f"SQL akış hatası: {str(e)}")
+        yield json.dumps({'done': True, 'error': str(e)}, ensure_ascii=False) + '\n'
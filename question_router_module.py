@@ -0,0 +1,241 @@
+# question_router_module.py
+import os
+import re
+import threading
+import time
+import unicodedata
+
+from cache_module import ReadThroughCache
+
+# SQL ile hesaplanan özetlerin önbellekte kalma süresi
+QUESTION_ROUTER_CACHE_TTL_SECONDS = float(os.getenv('QUESTION_ROUTER_CACHE_TTL_SECONDS', '30'))
+QUESTION_ROUTER_MAX_N = int(os.getenv('QUESTION_ROUTER_MAX_N', '20'))
+
+LEVEL = r"(?:seviye|level|lvl)\s*(?P<level>\d+)|(?P<level2>\d+)\s*\.?\s*seviye"
+LEVEL_PATTERN = re.compile(LEVEL)
+
+
+def normalize_text(question):
+    """Soruyu kalıplarla eşleştirmek için küçük harfe çevirir.
+
+    casefold() 'İ' harfini 'i' + birleşik nokta (U+0307) yapar; nokta atılarak "En İyi" ve "en iyi"
+    aynı metne dönüşür.
+    """
+    text = unicodedata.normalize('NFC', question).casefold().replace('\u0307', '')
+    return re.sub(r"\s+", " ", text)
+
+
+def _level(match):
+    return int(match.group('level') or match.group('level2'))
+
+
+def _number(value):
+    if value is None:
+        return None
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, 2)
+
+
+class QueryTemplate:
+    """Bir soru kalıbını (regex listesi) SQL/özet tabanlı bir yanıtlayıcıya bağlar."""
+
+    def __init__(self, name, patterns, handler):
+        self.name = name
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+        self.handler = handler
+
+    def match(self, question):
+        for pattern in self.patterns:
+            match = pattern.search(question)
+            if match:
+                return match
+        return None
+
+
+class QuestionRouter:
+    """Kesin sayısal cevabı olan soruları LLM'e gitmeden veritabanından veya liderlik tablosundan yanıtlar.
+
+    route() eşleşen şablon yoksa None döndürür; bu durumda soru RAG sistemine gönderilmelidir.
+    """
+
+    def __init__(self, connection_factory, leaderboard=None, cache_ttl=QUESTION_ROUTER_CACHE_TTL_SECONDS):
+        self.connection_factory = connection_factory
+        self.leaderboard = leaderboard
+        self.cache = ReadThroughCache('question_router', ttl=cache_ttl, max_entries=1000)
+        self._lock = threading.Lock()
+        self.routes = {}
+        self.errors = {}
+        # Daha özel kalıplar önce denenir
+        self.templates = [
+            QueryTemplate('my_rank', [
+                r"\bsıram\b", r"kaçıncıyım", r"sıralamam", r"\bmy rank\b", r"\bwhat is my rank\b",
+            ], self._my_rank),
+            QueryTemplate('top_players', [
+                r"en (?:iyi|yüksek skorlu) (?P<n>\d+) oyuncu", r"\btop (?P<n>\d+)\b", r"ilk (?P<n>\d+) oyuncu",
+            ], self._top_players),
+            QueryTemplate('highest_score', [
+                r"en yüksek skora? (?:sahip|yapan)", r"en yüksek skor(?:u|a sahip)? kim", r"who has the highest score",
+                r"en iyi oyuncu", r"best player", r"birinci kim",
+            ], self._highest_score),
+            QueryTemplate('average_score_at_level', [
+                rf"(?:{LEVEL}).*ortalama (?:skor|puan)", rf"ortalama (?:skor|puan).*(?:{LEVEL})",
+                rf"average score.*(?:{LEVEL})",
+            ], self._average_score_at_level),
+            QueryTemplate('average_score', [
+                r"ortalama (?:skor|puan)", r"average score",
+            ], self._average_score),
+            QueryTemplate('player_count_at_level', [
+                rf"(?:{LEVEL}).*(?:kaç oyuncu|oyuncu sayısı)", rf"(?:kaç oyuncu|oyuncu sayısı).*(?:{LEVEL})",
+                rf"how many players.*(?:{LEVEL})",
+            ], self._player_count_at_level),
+            QueryTemplate('player_count', [
+                r"kaç oyuncu", r"oyuncu sayısı", r"how many players",
+            ], self._player_count),
+        ]
+
+    def _query_one(self, sql, params=None):
+        with self.connection_factory() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params or {})
+                return cursor.fetchone()
+
+    def _cached_one(self, key, sql, params=None):
+        return self.cache.get_or_load(key, lambda: tuple(self._query_one(sql, params) or ()))
+
+    def _leaderboard_ready(self):
+        return self.leaderboard is not None and self.leaderboard.ready
+
+    @staticmethod
+    def _mentions_level(match):
+        # Genel şablonlar seviyeye göre daraltılmış soruları yanıtlamaz; bunlar RAG'e bırakılır
+        return LEVEL_PATTERN.search(match.string) is not None
+
+    # --- Şablon yanıtlayıcıları: (yanıt, kaynaklar) veya eşleşme kullanılamıyorsa None döndürür ---
+
+    def _my_rank(self, match, user_id):
+        if user_id is None or not self._leaderboard_ready():
+            return None
+        ranks = self.leaderboard.rank_of_user('highest_score', user_id)
+        if not ranks:
+            return "Henüz sıralamada yer almıyorsunuz; sıralamaya girmek için bir oyun tamamlayın.", [{"source": "leaderboard"}]
+        lines = [f"{entry['nickname']}: {entry['rank']}. sıra (en yüksek skor {_number(entry['value'])})" for entry in ranks]
+        return "En yüksek skor sıralamasındaki yeriniz:\n" + "\n".join(lines), [{"source": "leaderboard"}]
+
+    def _top_players(self, match, user_id):
+        if self._mentions_level(match) or not self._leaderboard_ready():
+            return None
+        n = min(max(int(match.group('n')), 1), QUESTION_ROUTER_MAX_N)
+        entries = self.leaderboard.top('highest_score', n)
+        if not entries:
+            return "Henüz skor kaydı yok.", [{"source": "leaderboard"}]
+        lines = [f"{entry['rank']}. {entry['nickname']} - {_number(entry['value'])}" for entry in entries]
+        return f"En yüksek skora sahip ilk {len(entries)} oyuncu:\n" + "\n".join(lines), [{"source": "leaderboard"}]
+
+    def _highest_score(self, match, user_id):
+        if self._mentions_level(match):
+            return None
+        if self._leaderboard_ready():
+            entries = self.leaderboard.top('highest_score', 1)
+            source = "leaderboard"
+            row = (entries[0]['nickname'], entries[0]['value']) if entries else None
+        else:
+            row = self._cached_one('highest_score', """
+                SELECT pp.nickname, ps.highest_score
+                FROM player_stats ps
+                JOIN player_profiles pp ON ps.profile_id = pp.profile_id
+                WHERE ps.games_played > 0
+                ORDER BY ps.highest_score DESC, pp.profile_id
+                FETCH FIRST 1 ROWS ONLY
+            """) or None
+            source = "player_stats"
+        if not row:
+            return "Henüz skor kaydı yok.", [{"source": source}]
+        return f"En yüksek skora sahip oyuncu {row[0]} ({_number(row[1])} puan).", [{"source": source}]
+
+    def _average_score_at_level(self, match, user_id):
+        level = _level(match)
+        row = self._cached_one(f'average_score:{level}', """
+            SELECT SUM(ps.total_score) / NULLIF(SUM(ps.games_played), 0), COUNT(*)
+            FROM player_stats ps
+            JOIN player_profiles pp ON ps.profile_id = pp.profile_id
+            WHERE pp.player_level = :player_level AND ps.games_played > 0
+        """, {'player_level': level})
+        if not row or row[0] is None:
+            return f"Seviye {level} oyuncularına ait skor kaydı yok.", [{"source": "player_stats"}]
+        return (f"Seviye {level} oyuncularının oyun başına ortalama skoru {_number(row[0])} "
+                f"({row[1]} oyuncu)."), [{"source": "player_stats"}]
+
+    def _average_score(self, match, user_id):
+        if self._mentions_level(match):
+            return None
+        row = self._cached_one('average_score', """
+            SELECT SUM(total_score) / NULLIF(SUM(games_played), 0), SUM(games_played)
+            FROM player_stats
+        """)
+        if not row or row[0] is None:
+            return "Henüz skor kaydı yok.", [{"source": "player_stats"}]
+        return f"Oyun başına ortalama skor {_number(row[0])} ({_number(row[1])} oyun).", [{"source": "player_stats"}]
+
+    def _player_count_at_level(self, match, user_id):
+        level = _level(match)
+        row = self._cached_one(f'player_count:{level}', """
+            SELECT COUNT(*) FROM player_profiles WHERE player_level = :player_level
+        """, {'player_level': level})
+        return f"Seviye {level} olan {row[0]} oyuncu var.", [{"source": "player_profiles"}]
+
+    def _player_count(self, match, user_id):
+        if self._mentions_level(match):
+            return None
+        row = self._cached_one('player_count', "SELECT COUNT(*) FROM player_profiles")
+        return f"Toplam {row[0]} oyuncu profili var.", [{"source": "player_profiles"}]
+
+    def record(self, route, elapsed_ms):
+        """Yönlendirme sonucunu ve gecikmesini kaydeder (route='rag' RAG'e düşen sorular içindir)."""
+        with self._lock:
+            stats = self.routes.setdefault(route, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stats['count'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+
+    def route(self, question, user_id=None):
+        """Soru bir şablona uyuyorsa {'answer', 'sources', 'route'} döndürür, yoksa None."""
+        started = time.perf_counter()
+        text = normalize_text(question)
+        for template in self.templates:
+            match = template.match(text)
+            if not match:
+                continue
+            try:
+                result = template.handler(match, user_id)
+            except Exception as e:
+                # Veritabanı veya liderlik tablosu hatası soruyu düşürmez; RAG yine yanıtlayabilir
+                print(f"Soru yönlendirme hatası ({template.name}): {str(e)}")
+                with self._lock:
+                    self.errors[template.name] = self.errors.get(template.name, 0) + 1
+                continue
+            if result is None:
+                continue
+            answer, sources = result
+            self.record(template.name, (time.perf_counter() - started) * 1000)
+            return {'answer': answer, 'sources': sources, 'route': template.name}
+        return None
+
+    def stats(self):
+        with self._lock:
+            routes = {
+                name: {
+                    'count': stats['count'],
+                    'avg_ms': round(stats['total_ms'] / stats['count'], 2) if stats['count'] else 0.0,
+                    'max_ms': round(stats['max_ms'], 2),
+                }
+                for name, stats in self.routes.items()
+            }
+        total = sum(stats['count'] for stats in routes.values())
+        routed = total - routes.get('rag', {}).get('count', 0)
+        return {
+            'templates': [template.name for template in self.templates],
+            'routes': routes,
+            'routed_ratio': round(routed / total, 4) if total else 0.0,
+            'errors': dict(self.errors),
+            'cache': self.cache.stats(),
+        }
@@ -0,0 +1,100 @@
+# rag_backends_module.py
+import hashlib
+import math
+import os
+import re
+import time
+from typing import Any, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.llms import LLM
+
+# openai: OpenAI modelleri (OPENAI_API_KEY gerekir)
+# hashing / canned: ağ erişimi gerektirmeyen deterministik yerel arka uçlar (test ve benchmark için)
+RAG_EMBEDDING_BACKEND = os.getenv('RAG_EMBEDDING_BACKEND', 'openai')
+RAG_LLM_BACKEND = os.getenv('RAG_LLM_BACKEND', 'openai')
+RAG_LLM_MODEL = os.getenv('RAG_LLM_MODEL', 'gpt-3.5-turbo-16k')
+HASHING_EMBEDDING_DIM = int(os.getenv('HASHING_EMBEDDING_DIM', '384'))
+CANNED_LLM_LATENCY_MS = float(os.getenv('CANNED_LLM_LATENCY_MS', '0'))
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class HashingEmbeddings(Embeddings):
+    """Kelime ve kelime ikililerini sabit boyutlu bir vektöre hash'leyen deterministik embedding.
+
+    Anlamsal benzerlik yakalamaz ama aynı kelimeleri paylaşan metinler yakın düşer; indeksleme ve
+    sorgu yolunun maliyetini OpenAI'ye bağlı kalmadan ölçmek için yeterlidir.
+    """
+
+    def __init__(self, dim=HASHING_EMBEDDING_DIM):
+        self.dim = dim
+        self.model = f"hashing-{dim}"
+
+    def _embed(self, text):
+        vector = [0.0] * self.dim
+        tokens = TOKEN_PATTERN.findall(text.casefold())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+            value = int.from_bytes(digest, 'little')
+            # Alt bitler boyutu, en üst bit işareti belirler
+            vector[value % self.dim] += -1.0 if value >> 63 else 1.0
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+class CannedLLM(LLM):
+    """Her istemde aynı yanıtı döndüren LLM; isteğe bağlı olarak model gecikmesini taklit eder."""
+
+    response: str = "Bu yanıt yerel test modelinden geldi."
+    latency_ms: float = CANNED_LLM_LATENCY_MS
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "canned"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return self.response
+
+
+def _openai_api_key():
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY bulunamadı. Lütfen .env dosyasını kontrol edin.")
+    return api_key
+
+
+def create_embeddings(backend=None):
+    backend = backend or RAG_EMBEDDING_BACKEND
+    if backend == 'openai':
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings(api_key=_openai_api_key())
+    if backend == 'hashing':
+        return HashingEmbeddings()
+    raise ValueError(f"Bilinmeyen embedding arka ucu: {backend}")
+
+
+def create_llm(backend=None):
+    backend = backend or RAG_LLM_BACKEND
+    if backend == 'openai':
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(temperature=0, model=RAG_LLM_MODEL, api_key=_openai_api_key())
+    if backend == 'canned':
+        return CannedLLM()
+    raise ValueError(f"Bilinmeyen LLM arka ucu: {backend}")
+
+
+def embedding_model_name(embeddings):
+    """Embedding önbelleği anahtarı için model adı."""
+    return getattr(embeddings, 'model', None) or type(embeddings).__name__
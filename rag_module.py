@@ -1,23 +1,50 @@
 # rag_module.py
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
+from langchain_community.document_loaders import DirectoryLoader
+from langchain_core.documents import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain.chains import RetrievalQA
+from langchain.chains.question_answering import load_qa_chain
 from langchain.prompts import PromptTemplate
 import os
 from dotenv import load_dotenv
 from contextlib import contextmanager
-import oracledb
+import db_module
+from embedding_cache_module import CachedEmbeddings
+from cache_module import ReadThroughCache
+from bm25_module import BM25Index, reciprocal_rank_fusion
+from rag_backends_module import create_embeddings, create_llm, embedding_model_name
+from vector_store_module import NumpyVectorStore, RAG_VECTOR_STORE, detect_store_kind
+import re
+import threading
+import time
 import pandas as pd
-import tempfile
 import json
+import hashlib
+from datetime import datetime, timedelta
 
 # .env dosyasını yükle
 load_dotenv()
 
-# OpenAI API Anahtarı
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+# Artımlı indekslemede geç commit edilen satırlar için geriye dönük okuma payları
+RAG_SCORE_ID_OVERLAP = int(os.getenv('RAG_SCORE_ID_OVERLAP', '1000'))
+RAG_PROFILE_OVERLAP_SECONDS = int(os.getenv('RAG_PROFILE_OVERLAP_SECONDS', '300'))
+RAG_TOMBSTONE_OVERLAP = int(os.getenv('RAG_TOMBSTONE_OVERLAP', '1000'))
+
+# İndeksleme sırasında cursor okuma ve embedding parti boyutları (bellek kullanımı bunlarla sınırlıdır)
+RAG_FETCH_ARRAYSIZE = int(os.getenv('RAG_FETCH_ARRAYSIZE', '1000'))
+RAG_FETCH_PREFETCHROWS = int(os.getenv('RAG_FETCH_PREFETCHROWS', str(RAG_FETCH_ARRAYSIZE)))
+RAG_EMBED_BATCH_SIZE = int(os.getenv('RAG_EMBED_BATCH_SIZE', '256'))
+
+# Tam yenilemede etkin nesille birlikte saklanacak en yeni nesil sayısı (bir önceki nesil dahil)
+RAG_KEEP_GENERATIONS = max(int(os.getenv('RAG_KEEP_GENERATIONS', '2')), 1)
+GENERATION_PATTERN = re.compile(r"gen-\d+")
+
+# Soru başına bağlama eklenecek doküman sayısı
+RAG_TOP_K = int(os.getenv('RAG_TOP_K', '5'))
+
+# Yanıt önbelleği; anahtar normalize edilmiş soru + indeks sürümüdür
+RAG_ANSWER_CACHE_TTL_SECONDS = float(os.getenv('RAG_ANSWER_CACHE_TTL_SECONDS', '300'))
+RAG_ANSWER_CACHE_MAX_ENTRIES = int(os.getenv('RAG_ANSWER_CACHE_MAX_ENTRIES', '1000'))
 
 # Oracle bağlantı bilgileri
 oracle_user = os.getenv('ORACLE_USER', 'C##COSMIC_DEFENDERS')
@@ -28,248 +55,750 @@ oracle_sid = os.getenv('ORACLE_SID', 'XE')
 
 oracle_connection_string = f"{oracle_user}/{oracle_password}@{oracle_host}:{oracle_port}/{oracle_sid}"
 
+def normalize_question(question):
+    """Büyük/küçük harf, boşluk ve sondaki noktalama farklarını yok sayar."""
+    question = re.sub(r"\s+", " ", question.strip().casefold())
+    return question.rstrip(" ?!.")
+
+LEVEL_PATTERNS = [
+    re.compile(r"(?:seviye|level|lvl)\s*[:#]?\s*(\d+)"),
+    re.compile(r"(\d+)\s*\.?\s*seviye"),
+]
+PROFILE_ID_PATTERN = re.compile(r"profil(?:\s*id)?\s*[:#]?\s*(\d+)")
+LAST_DAYS_PATTERN = re.compile(r"(?:son|last)\s+(\d+)\s*(?:gün|gun|day)")
+WORD_PATTERN = re.compile(r"[\w.-]+")
+
+
+def _timestamp(value):
+    return int(value.timestamp()) if value is not None else None
+
+
+def extract_filters(question, known_names):
+    """Sorudan takma ad/kullanıcı adı, seviye, profil ID ve tarih aralığı çıkarır.
+
+    known_names: casefold edilmiş ad -> takma ad eşlemesi (indekslenmiş profillerden).
+    """
+    text = question.casefold()
+    filters = {}
+
+    for pattern in LEVEL_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            filters["level"] = int(match.group(1))
+            break
+
+    match = PROFILE_ID_PATTERN.search(text)
+    if match:
+        filters["profile_id"] = int(match.group(1))
+
+    # Kesme işareti kelimeyi böldüğü için ekli kullanımlar da eşleşir (örn. "ali'nin")
+    for word in WORD_PATTERN.findall(text):
+        if word in known_names:
+            filters["nickname_key"] = word
+            break
+
+    match = LAST_DAYS_PATTERN.search(text)
+    if match:
+        filters["date_from"] = int(time.time()) - int(match.group(1)) * 86400
+    elif "bugün" in text or "today" in text:
+        filters["date_from"] = int(time.time()) - 86400
+    elif "bu hafta" in text or "this week" in text:
+        filters["date_from"] = int(time.time()) - 7 * 86400
+
+    return filters
+
+
+def build_metadata_filter(filters):
+    """extract_filters çıktısını Chroma where ifadesine çevirir."""
+    conditions = []
+    if "nickname_key" in filters:
+        conditions.append({"nickname_key": filters["nickname_key"]})
+    if "profile_id" in filters:
+        conditions.append({"profile_id": filters["profile_id"]})
+    if "level" in filters:
+        conditions.append({"level": filters["level"]})
+    if "date_from" in filters:
+        # Sadece skor dokümanlarında oyun tarihi vardır
+        conditions.append({"game_date_ts": {"$gte": filters["date_from"]}})
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+def _clean_metadata(metadata):
+    # Chroma None değerleri kabul etmez
+    return {key: value for key, value in metadata.items() if value is not None}
+
 @contextmanager
 def get_db_connection():
-    """Database connection context manager"""
-    conn = None
-    try:
-        conn = oracledb.connect(oracle_connection_string)
+    """Database connection context manager (app.py ile aynı havuzu kullanır)"""
+    with db_module.get_db_connection() as conn:
         yield conn
-    finally:
-        if conn:
-            try:
-                conn.close()
-            except Exception as e:
-                print(f"Error closing connection: {e}")
 
 class RAGSystem:
-    def __init__(self, persist_directory="chroma_db"):
-        """RAG sistemini başlat ve yapılandır."""
+    def __init__(self, persist_directory="chroma_db", connection_factory=None, embeddings=None, llm=None,
+                 vector_store=RAG_VECTOR_STORE):
+        """RAG sistemini başlat ve yapılandır.
+
+        connection_factory, embeddings ve llm verilmezse Oracle havuzu ile RAG_EMBEDDING_BACKEND /
+        RAG_LLM_BACKEND ayarlarındaki modeller kullanılır.
+        """
         self.persist_directory = persist_directory
+        self.connection_factory = connection_factory or get_db_connection
+        # chroma veya numpy (vector_store_module.NumpyVectorStore)
+        self.vector_store = vector_store
+        # İndeks nesli: persist_directory/gen-<n>; etkin nesil CURRENT dosyasında tutulur
+        self.generation = None
+        self.current_path = os.path.join(persist_directory, "CURRENT")
+        self._swap_lock = threading.Lock()
+        self._job_lock = threading.Lock()
+        self.job = {"state": "idle"}
         
         # Embeddings ve LLM modelini oluştur
-        if not OPENAI_API_KEY:
-            raise ValueError("OPENAI_API_KEY bulunamadı. Lütfen .env dosyasını kontrol edin.")
+        # Değişmeyen metinler tekrar gömülmesin diye model çağrıları kalıcı önbellekle sarılır
+        base_embeddings = embeddings or create_embeddings()
+        self.embeddings = CachedEmbeddings(base_embeddings, embedding_model_name(base_embeddings))
+        self.llm = llm or create_llm()
         
-        self.embeddings = OpenAIEmbeddings(api_key=OPENAI_API_KEY)
-        self.llm = ChatOpenAI(
-            temperature=0,
-            model="gpt-3.5-turbo-16k",
-            api_key=OPENAI_API_KEY
+        # Soru-cevap zinciri bir kez kurulur; bağlam dokümanları her soru için ayrıca seçilir
+        self.qa_chain = None
+        # Sorudaki takma/kullanıcı adlarını tanımak için: casefold ad -> takma ad
+        self.known_names = {}
+        # Chroma ile aynı dokümanlardan oluşan yerel BM25 indeksi
+        self.bm25 = BM25Index()
+        # İstek thread'lerinden güncellenir; _job_lock altında tutulur
+        self.retrieval_stats = {"bm25_only": 0, "hybrid": 0}
+        # İndeks her değiştiğinde artar; yanıt önbelleği anahtarının parçasıdır
+        self.index_version = 0
+        self.answer_cache = ReadThroughCache(
+            'rag_answers',
+            ttl=RAG_ANSWER_CACHE_TTL_SECONDS,
+            max_entries=RAG_ANSWER_CACHE_MAX_ENTRIES
         )
-        
+
         # Vektör veritabanını kontrol et veya oluştur
-        if os.path.exists(persist_directory):
-            print(f"Var olan Chroma DB yükleniyor: {persist_directory}")
-            self.vectordb = Chroma(
-                persist_directory=persist_directory,
-                embedding_function=self.embeddings
-            )
+        self.vectordb = None
+        generation = self._read_current_generation()
+        kind = detect_store_kind(self._generation_dir(generation)) if generation else None
+        if generation and kind != self.vector_store:
+            # Depo türü değiştiyse mevcut nesil kullanılamaz; ilk indekslemede yeni nesil oluşturulur
+            print(f"Etkin indeks nesli {kind} deposuyla oluşturulmuş, {self.vector_store} bekleniyor: {generation}")
+        elif generation:
+            print(f"Var olan vektör veritabanı yükleniyor: {self._generation_dir(generation)}")
+            self.vectordb = self._open_vector_store(self._generation_dir(generation))
+            self.generation = generation
+            self.bm25 = self._load_bm25()
+            self._load_known_names()
         else:
             print("Vektör veritabanı henüz oluşturulmadı. İndeksleme yapın.")
-            self.vectordb = None
-    
-    def _create_temp_documents_from_db(self):
-        """Veritabanından oyuncu ve oyun verilerini çeker ve geçici dokümanlar oluşturur."""
-        temp_dir = tempfile.mkdtemp()
-        files_created = []
-        
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Oyuncu profilleri
-                cursor.execute("""
-                    SELECT 
-                        u.username,
-                        u.email,
-                        u.role,
-                        pp.nickname,
-                        pp.player_level,
-                        pp.experience_points,
-                        pp.profile_id
-                    FROM users u
-                    JOIN player_profiles pp ON u.user_id = pp.user_id
-                """)
-                
-                profiles = cursor.fetchall()
-                if profiles:
-                    profiles_file = os.path.join(temp_dir, "player_profiles.txt")
-                    
-                    with open(profiles_file, 'w', encoding='utf-8') as f:
-                        f.write("# Oyuncu Profilleri\n\n")
-                        for profile in profiles:
-                            f.write(f"Kullanıcı Adı: {profile[0]}\n")
-                            f.write(f"E-posta: {profile[1]}\n")
-                            f.write(f"Rol: {profile[2]}\n")
-                            f.write(f"Oyuncu Takma Adı: {profile[3]}\n")
-                            f.write(f"Seviye: {profile[4]}\n")
-                            f.write(f"Deneyim Puanı: {profile[5]}\n")
-                            f.write(f"Profil ID: {profile[6]}\n\n")
-                    
-                    files_created.append(profiles_file)
-                
-                # Oyun skorları
-                cursor.execute("""
-                    SELECT 
-                        gs.score_id,
-                        u.username,
-                        pp.nickname,
-                        gs.score,
-                        gs.enemies_defeated,
-                        gs.resources_collected,
-                        gs.played_at
-                    FROM game_scores gs
-                    JOIN player_profiles pp ON gs.profile_id = pp.profile_id
-                    JOIN users u ON pp.user_id = u.user_id
-                    ORDER BY gs.score DESC
-                """)
-                
-                scores = cursor.fetchall()
-                if scores:
-                    scores_file = os.path.join(temp_dir, "game_scores.txt")
-                    
-                    with open(scores_file, 'w', encoding='utf-8') as f:
-                        f.write("# Oyun Skorları\n\n")
-                        for score in scores:
-                            f.write(f"Skor ID: {score[0]}\n")
-                            f.write(f"Kullanıcı Adı: {score[1]}\n")
-                            f.write(f"Oyuncu Takma Adı: {score[2]}\n")
-                            f.write(f"Skor: {score[3]}\n")
-                            f.write(f"Yenilen Düşman: {score[4]}\n")
-                            f.write(f"Toplanan Kaynak: {score[5]}\n")
-                            f.write(f"Oynanma Tarihi: {score[6]}\n\n")
-                    
-                    files_created.append(scores_file)
-                
-                # İstatistiksel özet
-                cursor.execute("""
-                    SELECT 
-                        pp.player_level,
-                        COUNT(DISTINCT pp.profile_id) AS player_count,
-                        AVG(gs.score) AS avg_score,
-                        MAX(gs.score) AS max_score,
-                        MIN(gs.score) AS min_score,
-                        AVG(gs.enemies_defeated) AS avg_enemies,
-                        AVG(gs.resources_collected) AS avg_resources
-                    FROM player_profiles pp
-                    LEFT JOIN game_scores gs ON pp.profile_id = gs.profile_id
-                    GROUP BY pp.player_level
-                    ORDER BY pp.player_level
-                """)
-                
-                stats = cursor.fetchall()
-                if stats:
-                    stats_file = os.path.join(temp_dir, "player_statistics.txt")
-                    
-                    with open(stats_file, 'w', encoding='utf-8') as f:
-                        f.write("# Oyuncu Seviyelerine Göre İstatistikler\n\n")
-                        for stat in stats:
-                            f.write(f"Seviye: {stat[0]}\n")
-                            f.write(f"Oyuncu Sayısı: {stat[1]}\n")
-                            f.write(f"Ortalama Skor: {stat[2]}\n")
-                            f.write(f"Maksimum Skor: {stat[3]}\n")
-                            f.write(f"Minimum Skor: {stat[4]}\n")
-                            f.write(f"Ortalama Yenilen Düşman: {stat[5]}\n")
-                            f.write(f"Ortalama Toplanan Kaynak: {stat[6]}\n\n")
-                    
-                    files_created.append(stats_file)
-                
-                # Oyun kuralları ve açıklamaları (statik bilgiler)
-                game_info_file = os.path.join(temp_dir, "game_info.txt")
-                with open(game_info_file, 'w', encoding='utf-8') as f:
-                    f.write("# Cosmic Defenders Oyun Bilgileri\n\n")
-                    f.write("Cosmic Defenders, uzay temalı bir savunma oyunudur. Oyuncular, galaksiyi korumak için çeşitli uzay gemileri ve silahlar kullanarak düşman uzaylılara karşı savaşırlar.\n\n")
-                    f.write("## Oyun Mekanikleri\n\n")
-                    f.write("- Oyuncular savunma kuleleri inşa ederek düşmanları durdurmalıdır\n")
-                    f.write("- Her düşman yenildiğinde puan ve deneyim kazanılır\n")
-                    f.write("- Oyun ilerledikçe daha güçlü düşmanlar ortaya çıkar\n")
-                    f.write("- Oyuncular deneyim puanı kazandıkça seviyeleri yükselir\n")
-                    f.write("- Seviye yükseldikçe yeni savunma kuleleri ve yetenekler açılır\n\n")
-                    f.write("## Seviye Sistemi\n\n")
-                    f.write("- Seviye 1: Başlangıç seviyesi, temel savunma kuleleri\n")
-                    f.write("- Seviye 2: Gelişmiş silahlar açılır, 1000 XP gerektirir\n")
-                    f.write("- Seviye 3: Özel yetenekler açılır, 2500 XP gerektirir\n")
-                    f.write("- Seviye 4: Efsanevi silahlar açılır, 5000 XP gerektirir\n")
-                    f.write("- Seviye 5: Maksimum seviye, tüm silahlar ve yetenekler açılır, 10000 XP gerektirir\n")
-                
-                files_created.append(game_info_file)
-                
-            return temp_dir, files_created
-        except Exception as e:
-            print(f"Veritabanından doküman oluşturma hatası: {str(e)}")
-            return temp_dir, []
     
+    def _open_vector_store(self, directory):
+        if self.vector_store == "numpy":
+            return NumpyVectorStore(directory, self.embeddings)
+        if self.vector_store == "chroma":
+            return Chroma(persist_directory=directory, embedding_function=self.embeddings)
+        raise ValueError(f"Bilinmeyen vektör deposu: {self.vector_store}")
+
+    def _generation_dir(self, generation):
+        return os.path.join(self.persist_directory, generation)
+
+    @property
+    def generation_dir(self):
+        return self._generation_dir(self.generation) if self.generation else None
+
+    def _read_current_generation(self):
+        if not os.path.exists(self.current_path):
+            return None
+        with open(self.current_path, "r", encoding="utf-8") as f:
+            generation = f.read().strip()
+        return generation if generation and os.path.isdir(self._generation_dir(generation)) else None
+
+    def _list_generations(self):
+        if not os.path.isdir(self.persist_directory):
+            return []
+        return sorted(name for name in os.listdir(self.persist_directory) if GENERATION_PATTERN.fullmatch(name))
+
+    def _claim_generation(self):
+        """Yeni bir nesil dizinini atomik olarak oluşturup adını döndürür.
+
+        os.mkdir var olan dizinde hata verdiği için aynı anda çalışan iki indeksleme (aynı veya farklı
+        süreçlerde) hiçbir zaman aynı nesle yazmaz.
+        """
+        os.makedirs(self.persist_directory, exist_ok=True)
+        while True:
+            generations = self._list_generations()
+            last = int(generations[-1].split("-", 1)[1]) if generations else 0
+            generation = f"gen-{last + 1:06d}"
+            try:
+                os.mkdir(self._generation_dir(generation))
+                return generation
+            except FileExistsError:
+                continue
+
+    def _bm25_path(self, directory=None):
+        return os.path.join(directory or self.generation_dir, "bm25.pkl")
+
+    def _load_bm25(self):
+        """Etkin neslin BM25 indeksini yükler; yoksa vektör veritabanındaki dokümanlardan kurar."""
+        path = self._bm25_path()
+        if os.path.exists(path):
+            try:
+                return BM25Index.load(path)
+            except Exception as e:
+                print(f"BM25 indeksi okunamadı, yeniden kuruluyor: {str(e)}")
+        bm25 = BM25Index()
+        offset = 0
+        while True:
+            batch = self.vectordb.get(include=["documents", "metadatas"], limit=RAG_EMBED_BATCH_SIZE, offset=offset)
+            if not batch["ids"]:
+                break
+            for doc_id, text, metadata in zip(batch["ids"], batch["documents"], batch["metadatas"]):
+                bm25.add(doc_id, text, metadata)
+            offset += len(batch["ids"])
+        bm25.save(path)
+        return bm25
+
+    def _activate_generation(self, generation, vectordb, bm25):
+        """Yeni nesli atomik olarak etkinleştirir; sorgular bir sonraki çağrıda yeni indeksi görür."""
+        tmp_path = self.current_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(generation)
+        with self._swap_lock:
+            os.replace(tmp_path, self.current_path)
+            self.vectordb = vectordb
+            self.bm25 = bm25
+            self.generation = generation
+        self._index_changed()
+        self._collect_old_generations()
+
+    def _collect_old_generations(self):
+        """Etkin nesil ve son RAG_KEEP_GENERATIONS nesil dışındakileri siler.
+
+        Bir önceki nesil tutulur; takas sırasında eski indeksi kullanan sorgular tamamlanabilir.
+        """
+        import shutil
+        generations = self._list_generations()
+        keep = set(generations[-RAG_KEEP_GENERATIONS:]) | {self.generation}
+        for generation in generations:
+            if generation in keep:
+                continue
+            try:
+                shutil.rmtree(self._generation_dir(generation))
+                print(f"Eski indeks nesli silindi: {generation}")
+            except Exception as e:
+                print(f"Eski indeks nesli silinemedi ({generation}): {str(e)}")
+
+    # Doküman sorguları. Her satır kararlı bir kimlikle (profile:<id>, score:<id>, level:<n>) indekslenir.
+    PROFILE_QUERY = """
+        SELECT 
+            u.username,
+            u.email,
+            u.role,
+            pp.nickname,
+            pp.player_level,
+            pp.experience_points,
+            pp.profile_id,
+            pp.updated_at
+        FROM users u
+        JOIN player_profiles pp ON u.user_id = pp.user_id
+    """
+
+    SCORE_QUERY = """
+        SELECT 
+            gs.score_id,
+            u.username,
+            pp.nickname,
+            gs.score,
+            gs.enemies_defeated,
+            gs.resources_collected,
+            gs.game_date,
+            pp.profile_id,
+            pp.player_level
+        FROM game_scores gs
+        JOIN player_profiles pp ON gs.profile_id = pp.profile_id
+        JOIN users u ON pp.user_id = u.user_id
+    """
+
+    LEVEL_STATS_QUERY = """
+        SELECT 
+            pp.player_level,
+            COUNT(DISTINCT pp.profile_id) AS player_count,
+            AVG(gs.score) AS avg_score,
+            MAX(gs.score) AS max_score,
+            MIN(gs.score) AS min_score,
+            AVG(gs.enemies_defeated) AS avg_enemies,
+            AVG(gs.resources_collected) AS avg_resources
+        FROM player_profiles pp
+        LEFT JOIN game_scores gs ON pp.profile_id = gs.profile_id
+        GROUP BY pp.player_level
+        ORDER BY pp.player_level
+    """
+
+    # Silinen profil ve skorlar tetikleyicilerle rag_tombstones tablosuna yazılır
+    TOMBSTONE_QUERY = "SELECT tombstone_id, doc_id FROM rag_tombstones WHERE tombstone_id > :1 ORDER BY tombstone_id"
+
+    GAME_INFO_TEXT = (
+        "# Cosmic Defenders Oyun Bilgileri\n\n"
+        "Cosmic Defenders, uzay temalı bir savunma oyunudur. Oyuncular, galaksiyi korumak için çeşitli uzay gemileri ve silahlar kullanarak düşman uzaylılara karşı savaşırlar.\n\n"
+        "## Oyun Mekanikleri\n\n"
+        "- Oyuncular savunma kuleleri inşa ederek düşmanları durdurmalıdır\n"
+        "- Her düşman yenildiğinde puan ve deneyim kazanılır\n"
+        "- Oyun ilerledikçe daha güçlü düşmanlar ortaya çıkar\n"
+        "- Oyuncular deneyim puanı kazandıkça seviyeleri yükselir\n"
+        "- Seviye yükseldikçe yeni savunma kuleleri ve yetenekler açılır\n\n"
+        "## Seviye Sistemi\n\n"
+        "- Seviye 1: Başlangıç seviyesi, temel savunma kuleleri\n"
+        "- Seviye 2: Gelişmiş silahlar açılır, 1000 XP gerektirir\n"
+        "- Seviye 3: Özel yetenekler açılır, 2500 XP gerektirir\n"
+        "- Seviye 4: Efsanevi silahlar açılır, 5000 XP gerektirir\n"
+        "- Seviye 5: Maksimum seviye, tüm silahlar ve yetenekler açılır, 10000 XP gerektirir\n"
+    )
+
+    def _profile_document(self, profile):
+        text = (
+            f"Kullanıcı Adı: {profile[0]}\n"
+            f"E-posta: {profile[1]}\n"
+            f"Rol: {profile[2]}\n"
+            f"Oyuncu Takma Adı: {profile[3]}\n"
+            f"Seviye: {profile[4]}\n"
+            f"Deneyim Puanı: {profile[5]}\n"
+            f"Profil ID: {profile[6]}\n"
+        )
+        doc_id = f"profile:{profile[6]}"
+        metadata = _clean_metadata({
+            "source": "player_profiles",
+            "type": "profile",
+            "doc_id": doc_id,
+            "profile_id": profile[6],
+            "username": profile[0],
+            "nickname": profile[3],
+            "nickname_key": profile[3].casefold() if profile[3] else None,
+            "username_key": profile[0].casefold() if profile[0] else None,
+            "level": profile[4],
+        })
+        return Document(page_content=text, metadata=metadata)
+
+    def _score_document(self, score):
+        text = (
+            f"Skor ID: {score[0]}\n"
+            f"Kullanıcı Adı: {score[1]}\n"
+            f"Oyuncu Takma Adı: {score[2]}\n"
+            f"Skor: {score[3]}\n"
+            f"Yenilen Düşman: {score[4]}\n"
+            f"Toplanan Kaynak: {score[5]}\n"
+            f"Oynanma Tarihi: {score[6]}\n"
+        )
+        doc_id = f"score:{score[0]}"
+        metadata = _clean_metadata({
+            "source": "game_scores",
+            "type": "score",
+            "doc_id": doc_id,
+            "profile_id": score[7],
+            "nickname": score[2],
+            "nickname_key": score[2].casefold() if score[2] else None,
+            "level": score[8],
+            "game_date_ts": _timestamp(score[6]),
+        })
+        return Document(page_content=text, metadata=metadata)
+
+    def _level_document(self, stat):
+        text = (
+            f"# Oyuncu Seviyelerine Göre İstatistikler\n\n"
+            f"Seviye: {stat[0]}\n"
+            f"Oyuncu Sayısı: {stat[1]}\n"
+            f"Ortalama Skor: {stat[2]}\n"
+            f"Maksimum Skor: {stat[3]}\n"
+            f"Minimum Skor: {stat[4]}\n"
+            f"Ortalama Yenilen Düşman: {stat[5]}\n"
+            f"Ortalama Toplanan Kaynak: {stat[6]}\n"
+        )
+        doc_id = f"level:{stat[0]}"
+        metadata = {"source": "player_statistics", "type": "level", "doc_id": doc_id, "level": stat[0]}
+        return Document(page_content=text, metadata=metadata)
+
+    def _static_documents(self, custom_docs_dir=None):
+        """Oyun bilgisi ve varsa kullanıcı dokümanlarını parçalara ayırıp kararlı kimliklerle döndürür."""
+        documents = [Document(page_content=self.GAME_INFO_TEXT, metadata={"source": "game_info", "type": "static"})]
+        if custom_docs_dir and os.path.exists(custom_docs_dir):
+            loader = DirectoryLoader(custom_docs_dir, glob="**/*.txt")
+            for doc in loader.load():
+                doc.metadata["type"] = "static"
+                documents.append(doc)
+
+        # Dokümanları parçalara ayır
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=1000,
+            chunk_overlap=200,
+            separators=["\n\n", "\n", ".", " ", ""]
+        )
+        chunks = text_splitter.split_documents(documents)
+        counters = {}
+        for chunk in chunks:
+            source = chunk.metadata.get("source", "static")
+            index = counters.get(source, 0)
+            counters[source] = index + 1
+            chunk.metadata["doc_id"] = f"static:{source}:{index}"
+        return chunks
+
+    @staticmethod
+    def _content_hash(document):
+        return hashlib.sha1(document.page_content.encode("utf-8")).hexdigest()
+
+    def _load_state(self, directory=None):
+        # Yüksek su işaretleri ve doküman özetleri (artımlı indeksleme için) her neslin kendi dizinindedir
+        directory = directory or self.generation_dir
+        if not directory:
+            return None
+        state_path = os.path.join(directory, "index_state.json")
+        if not os.path.exists(state_path):
+            return None
+        with open(state_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_state(self, state, directory=None):
+        directory = directory or self.generation_dir
+        os.makedirs(directory, exist_ok=True)
+        state_path = os.path.join(directory, "index_state.json")
+        tmp_path = state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, state_path)
+
+    @staticmethod
+    def _iter_rows(cursor, query, params=None):
+        """Sorgu sonucunu fetchmany ile sabit boyutlu partiler halinde okur."""
+        cursor.arraysize = RAG_FETCH_ARRAYSIZE
+        cursor.prefetchrows = RAG_FETCH_PREFETCHROWS
+        cursor.execute(query, params or [])
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            yield from rows
+
+    @staticmethod
+    def _batched(iterable, size):
+        batch = []
+        for item in iterable:
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _score_context(profile):
+        """Skor dokümanlarına gömülen profil alanları; değişirse profilin skor dokümanları yenilenir."""
+        return f"{profile[0]}|{profile[3]}|{profile[4]}"
+
+    @staticmethod
+    def _advance_profile_watermark(state, profile):
+        if profile[7] is not None:
+            updated_at = profile[7].isoformat()
+            if state["profile_watermark"] is None or updated_at > state["profile_watermark"]:
+                state["profile_watermark"] = updated_at
+
+    def _iter_entity_documents(self, state):
+        """Profil, skor ve seviye dokümanlarını cursor'dan akış halinde üretir; state yerinde güncellenir."""
+        with self.connection_factory() as conn:
+            cursor = conn.cursor()
+
+            # Bu noktadan önceki silmeler zaten okunan satırlara yansımıştır
+            cursor.execute("SELECT NVL(MAX(tombstone_id), 0) FROM rag_tombstones")
+            state["tombstone_watermark"] = cursor.fetchone()[0]
+
+            for profile in self._iter_rows(cursor, self.PROFILE_QUERY):
+                doc = self._profile_document(profile)
+                state["doc_hashes"][doc.metadata["doc_id"]] = self._content_hash(doc)
+                state["score_context"][doc.metadata["doc_id"]] = self._score_context(profile)
+                self._advance_profile_watermark(state, profile)
+                yield doc
+
+            for score in self._iter_rows(cursor, self.SCORE_QUERY):
+                state["score_watermark"] = max(state["score_watermark"], score[0])
+                state["score_count"] += 1
+                yield self._score_document(score)
+
+            for stat in self._iter_rows(cursor, self.LEVEL_STATS_QUERY):
+                doc = self._level_document(stat)
+                state["doc_hashes"][doc.metadata["doc_id"]] = self._content_hash(doc)
+                yield doc
+
+    def _add_documents(self, vectordb, bm25, documents):
+        """Dokümanları kararlı kimlikleriyle RAG_EMBED_BATCH_SIZE'lık partiler halinde ekler."""
+        count = 0
+        for batch in self._batched(documents, RAG_EMBED_BATCH_SIZE):
+            vectordb.add_documents(batch, ids=[doc.metadata["doc_id"] for doc in batch])
+            bm25.add_documents(batch)
+            count += len(batch)
+            self._job_progress(count_delta=len(batch))
+        return count
+
+    def _count_entity_documents(self):
+        """İlerleme yüzdesi için indekslenecek varlık dokümanı sayısını tahmin eder."""
+        with self.connection_factory() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT
+                    (SELECT COUNT(*) FROM player_profiles),
+                    (SELECT COUNT(*) FROM game_scores),
+                    (SELECT COUNT(DISTINCT player_level) FROM player_profiles)
+                FROM dual
+            """)
+            return sum(value or 0 for value in cursor.fetchone())
+
     def index_documents(self, custom_docs_dir=None):
-        """Dokümanları yükle, işle ve indeksle."""
+        """Dokümanları yeni bir indeks nesline sıfırdan indeksler ve hazır olunca etkinleştirir.
+
+        Etkin indeks bu sırada sorgulara hizmet vermeye devam eder.
+        """
+        generation = self._claim_generation()
+        directory = self._generation_dir(generation)
         try:
-            # Veritabanından geçici dokümanlar oluştur
-            temp_dir, db_files = self._create_temp_documents_from_db()
-            
-            # Kullanıcının verdiği doküman dizini varsa, onları da ekle
-            all_files = db_files.copy()
-            if custom_docs_dir and os.path.exists(custom_docs_dir):
-                loader = DirectoryLoader(custom_docs_dir, glob="**/*.txt")
-                custom_docs = loader.load()
-                # İsterseniz burada custom_docs dosyalarını listeye ekleyebilirsiniz
-            
-            if not all_files:
-                print("İndekslenecek doküman bulunamadı!")
-                return False
-            
-            # Dokümanları yükle
-            loaders = []
-            for file_path in all_files:
-                loaders.append(TextLoader(file_path, encoding='utf-8'))
-            
-            documents = []
-            for loader in loaders:
-                documents.extend(loader.load())
-            
-            # Dokümanları parçalara ayır
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=200,
-                separators=["\n\n", "\n", ".", " ", ""]
-            )
-            texts = text_splitter.split_documents(documents)
-            
-            print(f"{len(texts)} doküman parçası oluşturuldu.")
-            
-            # ChromaDB vektör veritabanı oluştur
-            self.vectordb = Chroma.from_documents(
-                texts, 
-                self.embeddings,
-                persist_directory=self.persist_directory
-            )
-            
-            # Veritabanını kaydet
-            self.vectordb.persist()
-            print(f"Vektör veritabanı {self.persist_directory} dizinine kaydedildi.")
-            
-            # Geçici dosyaları temizle
-            for file_path in all_files:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-            
-            if os.path.exists(temp_dir):
-                try:
-                    os.rmdir(temp_dir)
-                except:
-                    pass
-            
+            state = {"score_watermark": 0, "score_count": 0, "profile_watermark": None, "tombstone_watermark": 0,
+                     "doc_hashes": {}, "score_context": {}}
+
+            try:
+                self._job_progress(documents_total=self._count_entity_documents())
+            except Exception as e:
+                print(f"Doküman sayısı alınamadı: {str(e)}")
+
+            # Vektör veritabanı; dokümanlar bellekte toplanmadan partiler halinde eklenir
+            vectordb = self._open_vector_store(directory)
+            bm25 = BM25Index()
+            count = self._add_documents(vectordb, bm25, self._iter_entity_documents(state))
+            # Oyun kuralları ve (varsa) kullanıcının verdiği dokümanlar
+            count += self._add_documents(vectordb, bm25, self._static_documents(custom_docs_dir))
+
+            print(f"{count} doküman parçası indekslendi.")
+
+            # Veritabanını kaydet ve yeni nesle geç
+            vectordb.persist()
+            self._save_state(state, directory)
+            bm25.save(self._bm25_path(directory))
+            self._activate_generation(generation, vectordb, bm25)
+            print(f"Vektör veritabanı {directory} dizinine kaydedildi.")
             return True
         except Exception as e:
             print(f"İndeksleme hatası: {str(e)}")
             import traceback
             traceback.print_exc()
+            # Yarım kalan nesil etkinleştirilmez
+            import shutil
+            shutil.rmtree(directory, ignore_errors=True)
             return False
-    
+
+    def _upsert_documents(self, vectordb, bm25, documents):
+        if not documents:
+            return
+        ids = [doc.metadata["doc_id"] for doc in documents]
+        vectordb.delete(ids=ids)
+        vectordb.add_documents(documents, ids=ids)
+        bm25.add_documents(documents)
+        self._job_progress(count_delta=len(documents))
+
+    @staticmethod
+    def _existing_ids(vectordb, ids):
+        if not ids:
+            return set()
+        return set(vectordb.get(ids=ids, include=[])["ids"])
+
+    def _stage_generation(self):
+        """Etkin neslin bir kopyasını yeni bir nesil dizininde açar.
+
+        Artımlı güncellemeler bu kopyaya yazılır ve _activate_generation ile yayınlanır; sorgular
+        yarım kalmış bir güncellemeyi hiçbir zaman görmez.
+        """
+        import shutil
+        with self._swap_lock:
+            source = self.generation_dir
+        generation = self._claim_generation()
+        directory = self._generation_dir(generation)
+        try:
+            shutil.copytree(source, directory, dirs_exist_ok=True)
+            vectordb = self._open_vector_store(directory)
+            bm25 = BM25Index.load(self._bm25_path(directory))
+        except Exception:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+        return generation, directory, vectordb, bm25
+
+    def _index_changed(self):
+        """İndeks sürümünü artırır; eski sürüme ait yanıtlar artık kullanılmaz."""
+        self.index_version += 1
+        self.answer_cache.clear()
+        self._load_known_names()
+
+    def _load_known_names(self):
+        """Filtre çıkarımı için indeksteki profil adlarını yükler."""
+        try:
+            metadatas = self.vectordb.get(where={"type": "profile"}, include=["metadatas"])["metadatas"]
+        except Exception as e:
+            print(f"Profil adları yüklenemedi: {str(e)}")
+            return
+        names = {}
+        for metadata in metadatas:
+            nickname_key = metadata.get("nickname_key")
+            if nickname_key:
+                names[nickname_key] = metadata.get("nickname")
+            # Kullanıcı adı da ilgili takma ada yönlendirilir
+            username_key = metadata.get("username_key")
+            if username_key and nickname_key:
+                names.setdefault(username_key, metadata.get("nickname"))
+        self.known_names = names
+
+    def index_state(self):
+        """Artımlı indeksleme işaretlerinin özetini döndürür."""
+        state = self._load_state()
+        if state is None:
+            return None
+        return {
+            'score_watermark': state.get('score_watermark'),
+            'profile_watermark': state.get('profile_watermark'),
+            'score_count': state.get('score_count'),
+            'tracked_documents': len(state.get('doc_hashes', {})),
+        }
+
+    def update_index(self):
+        """Son indekslemeden bu yana değişen profil, skor ve seviye dokümanlarını günceller.
+
+        Skorlar score_id, profiller updated_at, silmeler rag_tombstones yüksek su işaretleriyle izlenir.
+        Geç commit edilen satırları kaçırmamak için işaretlerin biraz gerisinden okunur; zaten
+        indekslenmiş skorlar ve içeriği değişmemiş profiller tekrar gömülmez. Takma adı, kullanıcı adı
+        veya seviyesi değişen profilin skor dokümanları da yeniden üretilir.
+
+        Değişiklikler etkin neslin bir kopyasına yazılır ve tamamlanınca bu kopya etkinleştirilir;
+        güncelleme yarıda kalırsa kopya silinir, etkin indeks değişmez.
+        """
+        state = self._load_state()
+        if not self.vectordb or state is None or not os.path.exists(self._bm25_path()):
+            return self.index_documents()
+
+        import shutil
+        generation, directory, vectordb, bm25 = self._stage_generation()
+        try:
+            pending = []
+            upserted_ids = set()
+            deletes = []
+            doc_hashes = state.get("doc_hashes", {})
+            score_context = state.setdefault("score_context", {})
+            touched_profiles = []
+
+            def queue(doc):
+                pending.append(doc)
+                upserted_ids.add(doc.metadata["doc_id"])
+                if len(pending) >= RAG_EMBED_BATCH_SIZE:
+                    self._upsert_documents(vectordb, bm25, pending)
+                    pending.clear()
+
+            with self.connection_factory() as conn:
+                cursor = conn.cursor()
+
+                # Yeni skorlar
+                score_since = max(state["score_watermark"] - RAG_SCORE_ID_OVERLAP, 0)
+                rows = self._iter_rows(cursor, self.SCORE_QUERY + " WHERE gs.score_id > :1 ORDER BY gs.score_id", [score_since])
+                for batch in self._batched(rows, RAG_EMBED_BATCH_SIZE):
+                    score_docs = {}
+                    for score in batch:
+                        doc = self._score_document(score)
+                        score_docs[doc.metadata["doc_id"]] = doc
+                        state["score_watermark"] = max(state["score_watermark"], score[0])
+                    already_indexed = self._existing_ids(vectordb, list(score_docs))
+                    for doc_id, doc in score_docs.items():
+                        if doc_id not in already_indexed:
+                            queue(doc)
+                            state["score_count"] += 1
+
+                # Değişen profiller
+                if state.get("profile_watermark"):
+                    since = datetime.fromisoformat(state["profile_watermark"]) - timedelta(seconds=RAG_PROFILE_OVERLAP_SECONDS)
+                    rows = self._iter_rows(cursor, self.PROFILE_QUERY + " WHERE pp.updated_at > :1", [since])
+                else:
+                    rows = self._iter_rows(cursor, self.PROFILE_QUERY)
+                for profile in rows:
+                    doc = self._profile_document(profile)
+                    doc_id = doc.metadata["doc_id"]
+                    content_hash = self._content_hash(doc)
+                    if doc_hashes.get(doc_id) != content_hash:
+                        queue(doc)
+                        doc_hashes[doc_id] = content_hash
+                    context = self._score_context(profile)
+                    if score_context.get(doc_id, context) != context:
+                        touched_profiles.append(profile[6])
+                    score_context[doc_id] = context
+                    self._advance_profile_watermark(state, profile)
+
+                # Profil alanları değişen oyuncuların skor dokümanları
+                for chunk in self._batched(touched_profiles, 1000):
+                    binds = {f"p{j}": pid for j, pid in enumerate(chunk)}
+                    query = self.SCORE_QUERY + f" WHERE gs.profile_id IN ({', '.join(':' + b for b in binds)})"
+                    for score in self._iter_rows(cursor, query, binds):
+                        doc = self._score_document(score)
+                        if doc.metadata["doc_id"] not in upserted_ids:
+                            queue(doc)
+
+                # Silinen profiller ve skorlar
+                tombstone_since = max(state.get("tombstone_watermark", 0) - RAG_TOMBSTONE_OVERLAP, 0)
+                deleted = set()
+                for tombstone_id, doc_id in self._iter_rows(cursor, self.TOMBSTONE_QUERY, [tombstone_since]):
+                    state["tombstone_watermark"] = max(state.get("tombstone_watermark", 0), tombstone_id)
+                    deleted.add(doc_id)
+                deleted -= upserted_ids
+                if deleted:
+                    # Örtüşme penceresi nedeniyle zaten silinmiş kimlikler tekrar gelebilir
+                    existing = self._existing_ids(vectordb, list(deleted))
+                    deletes.extend(existing)
+                    for doc_id in deleted:
+                        doc_hashes.pop(doc_id, None)
+                        score_context.pop(doc_id, None)
+                    state["score_count"] -= sum(doc_id.startswith("score:") for doc_id in existing)
+
+                # Seviye özetleri (az sayıda satır; sadece içeriği değişenler güncellenir)
+                current_levels = set()
+                for stat in self._iter_rows(cursor, self.LEVEL_STATS_QUERY):
+                    doc = self._level_document(stat)
+                    doc_id = doc.metadata["doc_id"]
+                    current_levels.add(doc_id)
+                    content_hash = self._content_hash(doc)
+                    if doc_hashes.get(doc_id) != content_hash:
+                        queue(doc)
+                        doc_hashes[doc_id] = content_hash
+                for doc_id in [d for d in doc_hashes if d.startswith("level:")]:
+                    if doc_id not in current_levels:
+                        deletes.append(doc_id)
+                        del doc_hashes[doc_id]
+
+            self._upsert_documents(vectordb, bm25, pending)
+            if deletes:
+                vectordb.delete(ids=deletes)
+                for doc_id in deletes:
+                    bm25.remove(doc_id)
+
+            state["doc_hashes"] = doc_hashes
+            if upserted_ids or deletes:
+                vectordb.persist()
+                bm25.save(self._bm25_path(directory))
+                self._save_state(state, directory)
+                self._activate_generation(generation, vectordb, bm25)
+            else:
+                # İndeks değişmedi; sadece su işaretleri etkin nesle yazılır, kopya bırakılır
+                shutil.rmtree(directory, ignore_errors=True)
+                self._save_state(state)
+            print(f"Artımlı indeksleme: {len(upserted_ids)} doküman güncellendi, {len(deletes)} doküman silindi.")
+            return True
+        except Exception as e:
+            print(f"Artımlı indeksleme hatası: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            # Yarım kalan kopya etkinleştirilmez
+            shutil.rmtree(directory, ignore_errors=True)
+            return False
+
     def setup_qa_chain(self):
         """Soru-cevap zincirini oluştur."""
-        if not self.vectordb:
-            raise ValueError("Vektör veritabanı henüz oluşturulmamış! Önce 'index_documents' çağırın.")
-        
         # Özel RAG promptu
         template = """Sen Cosmic Defenders oyununun yapay zeka asistanısın. 
         Aşağıdaki bağlam bilgilerini kullanarak kullanıcının sorusuna yanıt ver.
@@ -292,57 +821,173 @@ class RAGSystem:
             input_variables=["context", "question"]
         )
         
-        # Retrievalqa zinciri oluştur
-        retriever = self.vectordb.as_retriever(
-            search_type="similarity",
-            search_kwargs={"k": 5}
-        )
-        
-        qa_chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            chain_type="stuff",
-            retriever=retriever,
-            return_source_documents=True,
-            chain_type_kwargs={"prompt": prompt}
-        )
-        
-        return qa_chain
+        # Bağlam dokümanları retrieve() ile seçildiği için zincir indeksten bağımsızdır
+        return load_qa_chain(self.llm, chain_type="stuff", prompt=prompt)
     
+    def get_qa_chain(self):
+        """Zinciri bir kez oluşturur ve yeniden kullanır."""
+        if self.qa_chain is None:
+            self.qa_chain = self.setup_qa_chain()
+        return self.qa_chain
+
+    def _resolve_filters(self, filters):
+        # Kullanıcı adıyla anılan oyuncu takma adının anahtarına çevrilir
+        if "nickname_key" in filters:
+            nickname = self.known_names.get(filters["nickname_key"])
+            if nickname:
+                filters["nickname_key"] = nickname.casefold()
+        return filters
+
+    def _get_documents(self, vectordb, ids):
+        """Kimlikleri verilen dokümanları (embedding çağrısı yapmadan) sırasıyla okur."""
+        if not ids:
+            return []
+        result = vectordb.get(ids=ids, include=["documents", "metadatas"])
+        by_id = {
+            doc_id: Document(page_content=text, metadata=metadata or {})
+            for doc_id, text, metadata in zip(result["ids"], result["documents"], result["metadatas"])
+        }
+        return [by_id[doc_id] for doc_id in ids if doc_id in by_id]
+
+    def _hybrid_search(self, vectordb, bm25, question, k, where):
+        bm25_ids = [doc_id for doc_id, _ in bm25.search(question, k=k, where=where)]
+        vector_docs = vectordb.similarity_search(question, k=k, filter=where) if where is not None \
+            else vectordb.similarity_search(question, k=k)
+        vector_ids = [doc.metadata.get("doc_id") for doc in vector_docs if doc.metadata.get("doc_id")]
+        fused_ids = reciprocal_rank_fusion([bm25_ids, vector_ids])[:k]
+        known = {doc.metadata.get("doc_id"): doc for doc in vector_docs}
+        missing = [doc_id for doc_id in fused_ids if doc_id not in known]
+        known.update({doc.metadata["doc_id"]: doc for doc in self._get_documents(vectordb, missing)})
+        return [known[doc_id] for doc_id in fused_ids if doc_id in known]
+
+    def retrieve(self, question, k=RAG_TOP_K):
+        """Sorudan çıkarılan metadata filtresiyle arama alanını daraltıp en uygun k dokümanı döndürür.
+
+        BM25 ve vektör sonuçları reciprocal rank fusion ile birleştirilir. Soru belirli bir oyuncuyu
+        veya profili adıyla/ID'siyle anıyorsa ve BM25 sonuç bulduysa embedding çağrısı yapılmaz.
+        Filtreyle sonuç bulunamazsa filtresiz aramaya düşülür.
+        """
+        with self._swap_lock:
+            vectordb, bm25 = self.vectordb, self.bm25
+        filters = self._resolve_filters(extract_filters(question, self.known_names))
+        where = build_metadata_filter(filters)
+
+        if "nickname_key" in filters or "profile_id" in filters:
+            bm25_ids = [doc_id for doc_id, _ in bm25.search(question, k=k, where=where)]
+            if bm25_ids:
+                with self._job_lock:
+                    self.retrieval_stats["bm25_only"] += 1
+                return self._get_documents(vectordb, bm25_ids)
+
+        with self._job_lock:
+            self.retrieval_stats["hybrid"] += 1
+        if where is not None:
+            documents = self._hybrid_search(vectordb, bm25, question, k, where)
+            if documents:
+                return documents
+        return self._hybrid_search(vectordb, bm25, question, k, None)
+
+    def _answer(self, question):
+        documents = self.retrieve(question)
+        result = self.get_qa_chain()({"input_documents": documents, "question": question})
+        return {
+            "answer": result["output_text"],
+            "sources": [{"source": doc.metadata.get("source", "Bilinmeyen Kaynak")} for doc in documents]
+        }
+
     def ask(self, question):
         """Kullanıcı sorusunu yanıtla."""
         try:
             if not self.vectordb:
                 raise ValueError("Vektör veritabanı henüz oluşturulmamış!")
             
-            qa_chain = self.setup_qa_chain()
-            result = qa_chain({"query": question})
-            
-            answer = {
-                "answer": result["result"],
-                "sources": [{"source": doc.metadata.get("source", "Bilinmeyen Kaynak")} for doc in result["source_documents"]]
-            }
-            
-            return answer
+            # Aynı indeks sürümünde aynı soru tekrar LLM'e gitmez; hatalar önbelleğe alınmaz
+            cache_key = f"{self.index_version}:{normalize_question(question)}"
+            return self.answer_cache.get_or_load(cache_key, lambda: self._answer(question))
         except Exception as e:
             print(f"Soru yanıtlama hatası: {str(e)}")
             import traceback
             traceback.print_exc()
             return {"answer": f"Bir hata oluştu: {str(e)}", "sources": []}
     
-    def refresh_index(self):
-        """Veritabanı indeksini yenile."""
-        # Eski indeksi temizle
-        if os.path.exists(self.persist_directory):
-            import shutil
-            try:
-                shutil.rmtree(self.persist_directory)
-                print(f"Eski indeks temizlendi: {self.persist_directory}")
-            except Exception as e:
-                print(f"Eski indeks temizleme hatası: {str(e)}")
-        
-        # Yeniden indeksle
+    def refresh_index(self, full=False):
+        """Veritabanı indeksini yenile. Varsayılan olarak sadece değişenler güncellenir.
+
+        full=True yeni bir nesil oluşturur; etkin indeks takasa kadar silinmez.
+        """
+        if not full:
+            return self.update_index()
         return self.index_documents()
 
+    def _job_progress(self, count_delta=0, documents_total=None):
+        job = self.job
+        if job.get("state") != "running":
+            return
+        job["documents_indexed"] = job.get("documents_indexed", 0) + count_delta
+        if documents_total is not None:
+            job["documents_total"] = documents_total
+
+    def _run_refresh_job(self, full):
+        success = False
+        error = None
+        try:
+            success = self.refresh_index(full=full)
+        except Exception as e:
+            error = str(e)
+        self.job.update({
+            "state": "succeeded" if success else "failed",
+            "finished_at": time.time(),
+            "error": error,
+            "generation": self.generation,
+        })
+        print(f"RAG indeks yenileme işi {self.job['state']} ({'tam' if full else 'artımlı'})")
+
+    def start_refresh(self, full=False):
+        """Yenilemeyi arka plan thread'inde başlatır. Bir iş zaten çalışıyorsa False döner."""
+        with self._job_lock:
+            if self.job.get("state") == "running":
+                return False
+            self.job = {
+                "state": "running",
+                "mode": "full" if full else "incremental",
+                "started_at": time.time(),
+                "documents_indexed": 0,
+                "documents_total": None,
+            }
+        threading.Thread(target=self._run_refresh_job, args=(full,), name="rag-refresh", daemon=True).start()
+        return True
+
+    def document_count(self):
+        vectordb = self.vectordb
+        if vectordb is None:
+            return 0
+        if hasattr(vectordb, "count"):
+            return vectordb.count()
+        return vectordb._collection.count()
+
+    def status(self):
+        """Etkin nesil, doküman sayısı ve yenileme işinin durumu."""
+        with self._job_lock:
+            job = dict(self.job)
+            retrieval = dict(self.retrieval_stats)
+        if job.get("state") == "running" and job.get("documents_total"):
+            job["progress"] = round(min(job["documents_indexed"] / job["documents_total"], 1.0), 4)
+        try:
+            document_count = self.document_count()
+        except Exception as e:
+            print(f"Doküman sayısı alınamadı: {str(e)}")
+            document_count = None
+        return {
+            "vector_store": self.vector_store,
+            "generation": self.generation,
+            "generations": self._list_generations(),
+            "document_count": document_count,
+            "index_version": self.index_version,
+            "bm25_documents": len(self.bm25),
+            "retrieval": retrieval,
+            "job": job,
+        }
+
 # Modül testi
 if __name__ == "__main__":
     rag = RAGSystem()
@@ -0,0 +1,118 @@
+# rate_limit_module.py
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+# Rol bazlı rate_limit değerleri bu pencere başına istek sayısı olarak yorumlanır
+RATE_LIMIT_WINDOW_SECONDS = float(os.getenv('RATE_LIMIT_WINDOW_SECONDS', '1'))
+RATE_LIMIT_MAX_BUCKETS = int(os.getenv('RATE_LIMIT_MAX_BUCKETS', '100000'))
+
+
+def _refill(tokens, last, now, capacity, refill_per_second):
+    return min(capacity, tokens + (now - last) * refill_per_second)
+
+
+# Token bucket durumunu tutan arka uçlar için temel sınıf
+class RateLimitBackend(ABC):
+    @abstractmethod
+    def consume(self, key, capacity, refill_per_second, cost=1):
+        """Kovadan cost kadar jeton harcamayı dener.
+
+        Dönüş: (izin_verildi, kalan_jeton, tekrar_deneme_saniyesi)
+        """
+        pass
+
+
+# Süreç içi token bucket arka ucu
+class LocalRateLimitBackend(RateLimitBackend):
+    def __init__(self, max_buckets=RATE_LIMIT_MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_per_second, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, last, now, capacity, refill_per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            # En uzun süredir kullanılmayan kovalar dolmuş sayılır, atılabilir
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        retry_after = 0 if allowed else (cost - tokens) / refill_per_second
+        return allowed, tokens, retry_after
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+# Çoklu worker için paylaşılan sözlük + kilit üzerinde çalışan arka uç
+# (örn. multiprocessing.Manager().dict() ve Manager().Lock(); Redis için bir stand-in)
+class SharedDictRateLimitBackend(RateLimitBackend):
+    def __init__(self, store, lock):
+        self.store = store
+        self.lock = lock
+
+    def consume(self, key, capacity, refill_per_second, cost=1):
+        now = time.time()
+        with self.lock:
+            tokens, last = self.store.get(key, (capacity, now))
+            tokens = _refill(tokens, last, now, capacity, refill_per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self.store[key] = (tokens, now)
+        retry_after = 0 if allowed else (cost - tokens) / refill_per_second
+        return allowed, tokens, retry_after
+
+
+class RateLimiter:
+    """Kullanıcı ve rol bazlı token bucket rate limiter.
+
+    Kovanın kapasitesi rolün rate_limit değeridir ve pencere boyunca tamamen dolar.
+    """
+
+    def __init__(self, backend=None, window_seconds=RATE_LIMIT_WINDOW_SECONDS):
+        self.backend = backend or LocalRateLimitBackend()
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    def check(self, user_id, role):
+        """İsteğe izin verilip verilmediğini ve yanıt başlıklarını döndürür."""
+        capacity = role.rate_limit
+        allowed, remaining, retry_after = self.backend.consume(
+            f"{role.role_name}:{user_id}", capacity, capacity / self.window_seconds
+        )
+        with self._lock:
+            if allowed:
+                self.allowed += 1
+            else:
+                self.rejected += 1
+        headers = {
+            'X-RateLimit-Limit': str(capacity),
+            'X-RateLimit-Remaining': str(int(remaining)),
+        }
+        if not allowed:
+            headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return allowed, headers
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'backend': type(self.backend).__name__,
+                'window_seconds': self.window_seconds,
+                'allowed': self.allowed,
+                'rejected': self.rejected,
+            }
+        if isinstance(self.backend, LocalRateLimitBackend):
+            stats['buckets'] = len(self.backend)
+        return stats
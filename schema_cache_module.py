@@ -0,0 +1,166 @@
+# schema_cache_module.py
+import hashlib
+import json
+import os
+import threading
+import time
+
+# Şema önbelleği ayarları
+SCHEMA_CACHE_DIR = os.getenv('SCHEMA_CACHE_DIR', 'schema_cache')
+# Veri sözlüğünden DDL parmak izinin yeniden okunma aralığı
+SCHEMA_CACHE_CHECK_SECONDS = float(os.getenv('SCHEMA_CACHE_CHECK_SECONDS', '60'))
+
+# Tablo/görünüm eklenmesi, silinmesi veya ALTER edilmesi last_ddl_time'ı değiştirir
+FINGERPRINT_QUERY = """
+    SELECT object_type, object_name, TO_CHAR(last_ddl_time, 'YYYYMMDDHH24MISS')
+    FROM user_objects
+    WHERE object_type IN ('TABLE', 'VIEW')
+    ORDER BY object_type, object_name
+"""
+
+FILE_PREFIX = 'schema-'
+# Kayıt biçimi değiştiğinde (örn. örnek satırlarda sütun gizleme) eski dosyalar bu sürümle geçersiz sayılır
+FILE_FORMAT = 'v2'
+
+
+class SchemaCache:
+    """SQL agent'ın tablo bilgisini (DDL, sütunlar, örnek satırlar) DDL parmak iziyle anahtarlayarak saklar.
+
+    Kayıtlar bellekte ve SCHEMA_CACHE_DIR altında parmak izi başına bir JSON dosyasında tutulur;
+    böylece yeniden başlatmalar ve diğer worker'lar aynı yansıtma sonucunu kullanır. Parmak izi en fazla
+    check_interval saniyede bir okunur ve değiştiğinde eski kayıtlar bırakılır.
+    """
+
+    def __init__(self, connection_factory, directory=SCHEMA_CACHE_DIR, check_interval=SCHEMA_CACHE_CHECK_SECONDS):
+        self.connection_factory = connection_factory
+        self.directory = directory
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._checked_at = 0.0
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.disk_loads = 0
+        self.fingerprint_checks = 0
+        self.invalidations = 0
+
+    def _compute_fingerprint(self):
+        digest = hashlib.sha256()
+        with self.connection_factory() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(FINGERPRINT_QUERY)
+                for object_type, object_name, ddl_time in cursor.fetchall():
+                    digest.update(f"{object_type}\0{object_name}\0{ddl_time}\n".encode('utf-8'))
+        return digest.hexdigest()[:32]
+
+    def _path(self, fingerprint):
+        return os.path.join(self.directory, f"{FILE_PREFIX}{FILE_FORMAT}-{fingerprint}.json")
+
+    def _read_file(self, fingerprint):
+        try:
+            with open(self._path(fingerprint), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _remove_stale_files(self, fingerprint):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        keep = os.path.basename(self._path(fingerprint))
+        for name in names:
+            if name.startswith(FILE_PREFIX) and name != keep:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def fingerprint(self, force=False):
+        """Güncel DDL parmak izini döndürür; değiştiyse bellekteki kayıtları diskteki karşılığıyla değiştirir."""
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._fingerprint and now - self._checked_at < self.check_interval:
+                return self._fingerprint
+        fingerprint = self._compute_fingerprint()
+        with self._lock:
+            self.fingerprint_checks += 1
+            self._checked_at = now
+            if fingerprint != self._fingerprint:
+                if self._fingerprint is not None:
+                    self.invalidations += 1
+                    print(f"Şema değişti, şema önbelleği yenileniyor ({self._fingerprint} -> {fingerprint})")
+                self._fingerprint = fingerprint
+                self._entries = self._read_file(fingerprint)
+                if self._entries:
+                    self.disk_loads += 1
+                self._remove_stale_files(fingerprint)
+            return fingerprint
+
+    def get(self, key):
+        fingerprint = self.fingerprint()
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                return None
+            value = self._entries.get(key)
+            if value is None:
+                # Başka bir worker aynı parmak izi için kaydı diske yazmış olabilir
+                on_disk = self._read_file(fingerprint)
+                if key in on_disk:
+                    self._entries.update(on_disk)
+                    self.disk_loads += 1
+                    value = on_disk[key]
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key, value):
+        fingerprint = self.fingerprint()
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                return
+            self._entries[key] = value
+            # Diğer worker'ların yazdığı kayıtlar korunarak dosya atomik olarak yenilenir
+            entries = self._read_file(fingerprint)
+            entries.update(self._entries)
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                tmp_path = f"{self._path(fingerprint)}.{os.getpid()}.tmp"
+                # Dosya örnek satırlar içerdiği için sadece sahibi okuyabilir
+                fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with open(fd, 'w', encoding='utf-8') as f:
+                    json.dump(entries, f, ensure_ascii=False)
+                os.replace(tmp_path, self._path(fingerprint))
+            except OSError as e:
+                print(f"Şema önbelleği diske yazılamadı: {str(e)}")
+
+    def get_or_load(self, key, loader):
+        """Kayıt varsa döndürür, yoksa loader() ile üretip önbelleğe yazar."""
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self):
+        """Bir sonraki erişimde parmak izinin yeniden okunmasını sağlar."""
+        with self._lock:
+            self._checked_at = 0.0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'name': 'sql_schema',
+                'fingerprint': self._fingerprint,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'disk_loads': self.disk_loads,
+                'fingerprint_checks': self.fingerprint_checks,
+                'invalidations': self.invalidations,
+            }
@@ -8,6 +8,8 @@ GRANT INSERT ON game_scores TO C##COSMIC_DEFENDERS;
 GRANT INSERT ON achievements TO C##COSMIC_DEFENDERS;
 GRANT INSERT ON player_achievements TO C##COSMIC_DEFENDERS;
 GRANT INSERT ON auth_tokens TO C##COSMIC_DEFENDERS;
+GRANT INSERT ON player_stats TO C##COSMIC_DEFENDERS;
+GRANT INSERT ON rag_tombstones TO C##COSMIC_DEFENDERS;
 
 -- Kullanıcıya tüm tablolarda select yetkisi ver
 GRANT SELECT ON users TO C##COSMIC_DEFENDERS;
@@ -18,6 +20,8 @@ GRANT SELECT ON game_scores TO C##COSMIC_DEFENDERS;
 GRANT SELECT ON achievements TO C##COSMIC_DEFENDERS;
 GRANT SELECT ON player_achievements TO C##COSMIC_DEFENDERS;
 GRANT SELECT ON auth_tokens TO C##COSMIC_DEFENDERS;
+GRANT SELECT ON player_stats TO C##COSMIC_DEFENDERS;
+GRANT SELECT ON rag_tombstones TO C##COSMIC_DEFENDERS;
 
 -- Kullanıcıya tüm tablolarda update yetkisi ver
 GRANT UPDATE ON users TO C##COSMIC_DEFENDERS;
@@ -28,6 +32,7 @@ GRANT UPDATE ON game_scores TO C##COSMIC_DEFENDERS;
 GRANT UPDATE ON achievements TO C##COSMIC_DEFENDERS;
 GRANT UPDATE ON player_achievements TO C##COSMIC_DEFENDERS;
 GRANT UPDATE ON auth_tokens TO C##COSMIC_DEFENDERS;
+GRANT UPDATE ON player_stats TO C##COSMIC_DEFENDERS;
 
 -- Kullanıcıya tüm tablolarda delete yetkisi ver
 GRANT DELETE ON users TO C##COSMIC_DEFENDERS;
@@ -38,6 +43,8 @@ GRANT DELETE ON game_scores TO C##COSMIC_DEFENDERS;
 GRANT DELETE ON achievements TO C##COSMIC_DEFENDERS;
 GRANT DELETE ON player_achievements TO C##COSMIC_DEFENDERS;
 GRANT DELETE ON auth_tokens TO C##COSMIC_DEFENDERS;
+GRANT DELETE ON player_stats TO C##COSMIC_DEFENDERS;
+GRANT DELETE ON rag_tombstones TO C##COSMIC_DEFENDERS;
 
 SELECT USER FROM DUAL;
 
@@ -33,6 +33,9 @@ BEGIN
     VALUES (p_user_id, p_nickname, p_avatar, 0, 1) -- Başlangıç deneyim ve seviye
     RETURNING profile_id INTO p_profile_id;
 
+    -- Boş istatistik satırı; ilk skorlar MERGE'ün INSERT koluna düşüp yarışmaz
+    INSERT INTO player_stats (profile_id) VALUES (p_profile_id);
+
     -- Eğer her şey başarılıysa commit yapalım
     COMMIT;
 
@@ -93,6 +96,38 @@ BEGIN
     SET player_level = FLOOR(SQRT(experience_points) / 10) + 1
     WHERE profile_id = p_profile_id;
 
+    -- Oyuncu istatistik özetini aynı transaction içinde güncelle.
+    -- Aynı profilin iki ilk skoru aynı anda gelirse ikisi de NOT MATCHED görüp INSERT deneyebilir;
+    -- kaybeden taraf ORA-00001 alır ve satır artık var olduğu için UPDATE olarak yeniden dener.
+    BEGIN
+    MERGE INTO player_stats ps
+    USING (SELECT p_profile_id AS profile_id FROM dual) src
+    ON (ps.profile_id = src.profile_id)
+    WHEN MATCHED THEN UPDATE SET
+        ps.games_played = ps.games_played + 1,
+        ps.total_score = ps.total_score + p_score,
+        ps.highest_score = GREATEST(ps.highest_score, p_score),
+        ps.enemies_defeated = ps.enemies_defeated + NVL(p_enemies_defeated, 0),
+        ps.resources_collected = ps.resources_collected + NVL(p_resources_collected, 0),
+        ps.last_game_date = SYSDATE,
+        ps.updated_at = SYSTIMESTAMP
+    WHEN NOT MATCHED THEN INSERT
+        (profile_id, games_played, total_score, highest_score, enemies_defeated, resources_collected, last_game_date, updated_at)
+    VALUES
+        (p_profile_id, 1, p_score, p_score, NVL(p_enemies_defeated, 0), NVL(p_resources_collected, 0), SYSDATE, SYSTIMESTAMP);
+    EXCEPTION
+        WHEN DUP_VAL_ON_INDEX THEN
+            UPDATE player_stats SET
+                games_played = games_played + 1,
+                total_score = total_score + p_score,
+                highest_score = GREATEST(highest_score, p_score),
+                enemies_defeated = enemies_defeated + NVL(p_enemies_defeated, 0),
+                resources_collected = resources_collected + NVL(p_resources_collected, 0),
+                last_game_date = SYSDATE,
+                updated_at = SYSTIMESTAMP
+            WHERE profile_id = p_profile_id;
+    END;
+
     -- Eğer her şey başarılıysa commit yapalım
     COMMIT;
 
@@ -106,6 +141,54 @@ END add_game_score_with_transaction;
 
 
 
+-- player_stats tablosunu game_scores üzerinden yeniden hesaplar (backfill).
+-- p_profile_id verilirse sadece o profil, verilmezse tüm profiller yeniden hesaplanır.
+CREATE OR REPLACE PROCEDURE rebuild_player_stats(
+    p_profile_id IN NUMBER DEFAULT NULL
+)
+IS
+BEGIN
+    SAVEPOINT start_transaction;
+
+    MERGE INTO player_stats ps
+    USING (
+        SELECT pp.profile_id,
+               COUNT(gs.score_id) AS games_played,
+               COALESCE(SUM(gs.score), 0) AS total_score,
+               COALESCE(MAX(gs.score), 0) AS highest_score,
+               COALESCE(SUM(gs.enemies_defeated), 0) AS enemies_defeated,
+               COALESCE(SUM(gs.resources_collected), 0) AS resources_collected,
+               MAX(gs.game_date) AS last_game_date
+        FROM player_profiles pp
+        LEFT JOIN game_scores gs ON pp.profile_id = gs.profile_id
+        WHERE p_profile_id IS NULL OR pp.profile_id = p_profile_id
+        GROUP BY pp.profile_id
+    ) src
+    ON (ps.profile_id = src.profile_id)
+    WHEN MATCHED THEN UPDATE SET
+        ps.games_played = src.games_played,
+        ps.total_score = src.total_score,
+        ps.highest_score = src.highest_score,
+        ps.enemies_defeated = src.enemies_defeated,
+        ps.resources_collected = src.resources_collected,
+        ps.last_game_date = src.last_game_date,
+        ps.updated_at = SYSTIMESTAMP
+    WHEN NOT MATCHED THEN INSERT
+        (profile_id, games_played, total_score, highest_score, enemies_defeated, resources_collected, last_game_date, updated_at)
+    VALUES
+        (src.profile_id, src.games_played, src.total_score, src.highest_score, src.enemies_defeated, src.resources_collected, src.last_game_date, SYSTIMESTAMP);
+
+    COMMIT;
+
+EXCEPTION
+    WHEN OTHERS THEN
+        ROLLBACK TO start_transaction;
+        RAISE_APPLICATION_ERROR(-20006, 'Error during player stats rebuild: ' || SQLERRM);
+END rebuild_player_stats;
+
+
+
+
 
 
 CREATE OR REPLACE PROCEDURE update_user_and_profile(
@@ -157,15 +240,43 @@ END update_user_and_profile;
 
 
 
+-- player_profiles satırı her güncellendiğinde updated_at'i yenile (RAG artımlı indeksleme bunu izler)
+CREATE OR REPLACE TRIGGER trg_player_profiles_updated_at
+BEFORE UPDATE ON player_profiles
+FOR EACH ROW
+BEGIN
+    :NEW.updated_at := SYSTIMESTAMP;
+END;
 
 
 
 
+-- Profil dokümanları kullanıcı adı, e-posta ve rolü de içerdiği için
+-- users güncellemelerinde ilgili profillerin updated_at değerini de yenile
+CREATE OR REPLACE TRIGGER trg_users_touch_profiles
+AFTER UPDATE OF username, email, role ON users
+FOR EACH ROW
+BEGIN
+    UPDATE player_profiles
+    SET updated_at = SYSTIMESTAMP
+    WHERE user_id = :NEW.user_id;
+END;
 
 
 
+-- Silinen skor ve profilleri artımlı RAG indeksleme için kaydet
+CREATE OR REPLACE TRIGGER trg_game_scores_tombstone
+AFTER DELETE ON game_scores
+FOR EACH ROW
+BEGIN
+    INSERT INTO rag_tombstones (doc_id) VALUES ('score:' || :OLD.score_id);
+END;
 
 
 
-
-
+CREATE OR REPLACE TRIGGER trg_player_profiles_tombstone
+AFTER DELETE ON player_profiles
+FOR EACH ROW
+BEGIN
+    INSERT INTO rag_tombstones (doc_id) VALUES ('profile:' || :OLD.profile_id);
+END;
@@ -18,6 +18,7 @@ CREATE TABLE player_profiles (
     avatar VARCHAR2(100),
     player_level NUMBER DEFAULT 1 NOT NULL,  -- level yerine player_level kullanıldı
     experience_points NUMBER DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,  -- RAG artımlı indeksleme için değişiklik işareti
     CONSTRAINT fk_profile_user FOREIGN KEY (user_id) REFERENCES users(user_id)
 );
 
@@ -72,3 +73,32 @@ CREATE TABLE player_achievements (
     CONSTRAINT fk_achievement FOREIGN KEY (achievement_id) REFERENCES achievements(achievement_id),
     CONSTRAINT unique_player_achievement UNIQUE (profile_id, achievement_id)
 );
+
+-- 9. Oyuncu İstatistikleri Tablosu (player_profiles tablosuna bağımlı)
+-- game_scores üzerinden profil başına tutulan özet; add_game_score_with_transaction
+-- ile aynı transaction içinde güncellenir, rebuild_player_stats ile yeniden hesaplanır.
+CREATE TABLE player_stats (
+    profile_id NUMBER PRIMARY KEY,
+    games_played NUMBER DEFAULT 0 NOT NULL,
+    total_score NUMBER DEFAULT 0 NOT NULL,
+    highest_score NUMBER DEFAULT 0 NOT NULL,
+    enemies_defeated NUMBER DEFAULT 0 NOT NULL,
+    resources_collected NUMBER DEFAULT 0 NOT NULL,
+    last_game_date TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT fk_stats_profile FOREIGN KEY (profile_id) REFERENCES player_profiles(profile_id) ON DELETE CASCADE
+);
+
+-- 10. RAG Silme Kayıtları Tablosu
+-- Silinen profil ve skorların doküman kimlikleri tetikleyicilerle buraya yazılır; artımlı
+-- RAG indeksleme tabloları taramadan sadece son işaretten sonraki satırları okur.
+-- Eski satırlar güvenle silinebilir, örn:
+-- DELETE FROM rag_tombstones WHERE deleted_at < SYSTIMESTAMP - INTERVAL '30' DAY;
+CREATE TABLE rag_tombstones (
+    tombstone_id NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    doc_id VARCHAR2(64) NOT NULL,
+    deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Var olan kurulumlar için: player_profiles.updated_at kolonunu ekle
+-- ALTER TABLE player_profiles ADD updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
@@ -0,0 +1,210 @@
+# sql_agent_module.py
+import ast
+import inspect
+import os
+
+import httpx
+from langchain_community.utilities.sql_database import SQLDatabase
+from langchain_core.callbacks import BaseCallbackHandler
+from sqlalchemy import event, literal, select
+from sqlalchemy.exc import SQLAlchemyError
+
+QUERY_TOOL_NAME = 'sql_db_query'
+
+# Örnek satırlarda değeri gizlenen sütunlar; bu değerler ne LLM'e ne de şema önbelleğine gider
+SQL_AGENT_MASKED_COLUMNS = {
+    name.strip().lower()
+    for name in os.getenv('SQL_AGENT_MASKED_COLUMNS', 'password,email').split(',')
+    if name.strip()
+}
+MASKED_VALUE = '***'
+
+# Eski langchain-community sürümlerinde tembel yansıtma parametresi yoktur
+SUPPORTS_LAZY_REFLECTION = 'lazy_table_reflection' in inspect.signature(SQLDatabase.__init__).parameters
+
+
+class QueryRejected(SQLAlchemyError):
+    """Maliyet koruması sorguyu reddettiğinde fırlatılır.
+
+    SQLAlchemyError olduğu için sql_db_query aracı bunu "Error: ..." metni olarak agent'a döndürür;
+    agent sorguyu daraltıp yeniden deneyebilir.
+    """
+    pass
+
+
+class CachedSQLDatabase(SQLDatabase):
+    """Tablo bilgisini (CREATE TABLE + örnek satırlar) SchemaCache'ten sunan SQLDatabase.
+
+    Tablolar açılışta yansıtılmaz; sql_db_schema aracının istediği bilgi önbellekte yoksa
+    SQLAlchemy ile yansıtılıp örnek satırlarla birlikte önbelleğe yazılır. Örnek satırlarda
+    masked_columns içindeki sütunlar (parola özeti, e-posta) veritabanından hiç okunmaz. query_guard verilirse
+    agent'ın çalıştırdığı her metin SQL önce EXPLAIN PLAN ile değerlendirilir.
+    """
+
+    def __init__(self, engine, schema_cache=None, query_guard=None, masked_columns=SQL_AGENT_MASKED_COLUMNS, **kwargs):
+        if SUPPORTS_LAZY_REFLECTION:
+            kwargs.setdefault('lazy_table_reflection', True)
+        super().__init__(engine, **kwargs)
+        self.schema_cache = schema_cache
+        self.query_guard = query_guard
+        self.masked_columns = {name.lower() for name in masked_columns}
+
+    def _get_sample_rows(self, table):
+        if not any(column.name.lower() in self.masked_columns for column in table.columns):
+            return super()._get_sample_rows(table)
+        columns = [
+            literal(MASKED_VALUE).label(column.name) if column.name.lower() in self.masked_columns else column
+            for column in table.columns
+        ]
+        command = select(*columns).limit(self._sample_rows_in_table_info)
+        columns_str = "\t".join(column.name for column in table.columns)
+        try:
+            with self._engine.connect() as connection:
+                sample_rows = [[str(value)[:100] for value in row] for row in connection.execute(command)]
+            sample_rows_str = "\n".join("\t".join(row) for row in sample_rows)
+        except SQLAlchemyError:
+            sample_rows_str = ""
+        return f"{self._sample_rows_in_table_info} rows from {table.name} table:\n{columns_str}\n{sample_rows_str}"
+
+    def run(self, command, *args, **kwargs):
+        if self.query_guard is not None and isinstance(command, str):
+            decision = self.query_guard.check(command, 'agent')
+            if not decision.allowed:
+                raise QueryRejected(f"Sorgu maliyet koruması tarafından reddedildi ({decision.reason}). "
+                                    f"Daha seçici filtreler veya birleşim koşulları kullanın.")
+            command = decision.sql
+        return super().run(command, *args, **kwargs)
+
+    def get_table_info(self, table_names=None):
+        if self.schema_cache is None:
+            return super().get_table_info(table_names)
+        names = sorted(name.lower() for name in (table_names or self.get_usable_table_names()))
+        key = f"table_info:{self._sample_rows_in_table_info}:{','.join(names)}"
+        return self.schema_cache.get_or_load(key, lambda: SQLDatabase.get_table_info(self, table_names))
+
+
+class SQLCaptureHandler(BaseCallbackHandler):
+    """Agent çalışması sırasında sql_db_query aracına verilen SQL'leri yakalar.
+
+    final_sql, hata döndürmeden tamamlanan son sorgudur; agent'ın cevabı bu sorgunun sonucuna dayanır.
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self.statements = []
+        self.final_sql = None
+
+    @staticmethod
+    def _query_from_input(input_str, inputs):
+        if isinstance(inputs, dict) and inputs.get('query'):
+            return inputs['query']
+        text = (input_str or '').strip()
+        # OpenAI functions agent araç girdisini sözlüğün metin hali olarak iletir
+        if text.startswith('{'):
+            try:
+                parsed = ast.literal_eval(text)
+                if isinstance(parsed, dict) and parsed.get('query'):
+                    return parsed['query']
+            except (ValueError, SyntaxError):
+                pass
+        return text or None
+
+    def on_tool_start(self, serialized, input_str, *, run_id, inputs=None, **kwargs):
+        name = (serialized or {}).get('name') or kwargs.get('name')
+        if name != QUERY_TOOL_NAME:
+            return
+        sql = self._query_from_input(input_str, inputs)
+        if sql:
+            self.pending[run_id] = sql
+            self.statements.append(sql)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        sql = self.pending.pop(run_id, None)
+        # Araç veritabanı hatalarını istisna yerine "Error: ..." metni olarak döndürür
+        if sql and not str(output).lstrip().startswith('Error'):
+            self.final_sql = sql
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self.pending.pop(run_id, None)
+
+
+class JobDeadlineTransport(httpx.HTTPTransport):
+    """LLM HTTP isteklerinin zaman aşımını çağıran SQL agent işinin kalan süresiyle sınırlar.
+
+    Böylece süresi dolan bir işin sürmekte olan OpenAI isteği de süre sınırında kesilir ve worker
+    slotu serbest kalır. İptal edilmiş bir işin yeni isteği hiç gönderilmez.
+    """
+
+    def __init__(self, job_executor, **kwargs):
+        super().__init__(**kwargs)
+        self.job_executor = job_executor
+
+    def handle_request(self, request):
+        job = self.job_executor.current_job()
+        remaining = job.remaining() if job is not None else None
+        if remaining is not None:
+            job.check_cancelled()
+            remaining = max(remaining, 0.001)
+            timeout = request.extensions.get('timeout') or {}
+            request.extensions['timeout'] = {
+                name: remaining if timeout.get(name) is None else min(timeout[name], remaining)
+                for name in ('connect', 'read', 'write', 'pool')
+            }
+        return super().handle_request(request)
+
+
+class CancellationHandler(BaseCallbackHandler):
+    """İptal edilen bir işin agent döngüsünü bir sonraki LLM veya araç adımında durdurur.
+
+    Sürmekte olan OpenAI isteği en geç işin süre sınırında (JobDeadlineTransport) biter; iptalden
+    sonra gelen yanıt on_llm_end ile atılır.
+    """
+
+    # Callback yöneticisi bu handler'ın fırlattığı istisnaları yutmaz
+    raise_error = True
+
+    def __init__(self, job):
+        self.job = job
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.job.check_cancelled()
+
+    def on_llm_end(self, response, **kwargs):
+        self.job.check_cancelled()
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        self.job.check_cancelled()
+
+    def on_agent_action(self, action, **kwargs):
+        self.job.check_cancelled()
+
+
+def install_cancellation_hooks(engine, job_executor, call_timeout_ms):
+    """Agent motorunun Oracle bağlantılarına call_timeout uygular ve çalışan sorguyu işe bağlar.
+
+    Böylece iptal edilen işin o anda çalışan ifadesi Connection.cancel() ile kesilebilir.
+    """
+
+    @event.listens_for(engine, 'connect')
+    def set_call_timeout(dbapi_connection, connection_record):
+        dbapi_connection.call_timeout = call_timeout_ms
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def attach(conn, cursor, statement, parameters, context, executemany):
+        job = job_executor.current_job()
+        if job is not None:
+            job.check_cancelled()
+            job.attach_connection(conn.connection.dbapi_connection)
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def detach(conn, cursor, statement, parameters, context, executemany):
+        job = job_executor.current_job()
+        if job is not None:
+            job.detach_connection(conn.connection.dbapi_connection)
+
+    @event.listens_for(engine, 'handle_error')
+    def detach_on_error(exception_context):
+        job = job_executor.current_job()
+        connection = exception_context.connection
+        if job is not None and connection is not None:
+            job.detach_connection(connection.connection.dbapi_connection)
@@ -0,0 +1,129 @@
+# sql_cache_module.py
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Agent'ın ürettiği SQL'in önbellekte kalma süresi ve kayıt sınırı
+SQL_QUERY_CACHE_TTL_SECONDS = float(os.getenv('SQL_QUERY_CACHE_TTL_SECONDS', '86400'))
+SQL_QUERY_CACHE_MAX_ENTRIES = int(os.getenv('SQL_QUERY_CACHE_MAX_ENTRIES', '500'))
+
+# Sadece okuma yapan ifadeler önbelleğe alınır
+READ_ONLY_PATTERN = re.compile(r"^\s*(?:select|with)\b", re.IGNORECASE)
+FILLER_PATTERN = re.compile(r"\b(?:please|lütfen|can you|could you|bana)\b")
+
+
+def normalize_sql_question(question):
+    """Büyük/küçük harf, noktalama, boşluk ve nezaket ifadesi farklarını yok sayar."""
+    question = question.casefold()
+    question = FILLER_PATTERN.sub(" ", question)
+    question = re.sub(r"[^\w]+", " ", question)
+    return " ".join(question.split())
+
+
+def question_key(question):
+    return hashlib.sha256(normalize_sql_question(question).encode('utf-8')).hexdigest()[:16]
+
+
+class SQLQueryCache:
+    """Doğal dil admin sorularını agent'ın en son başarıyla çalıştırdığı SQL'e eşler.
+
+    Kayıtlar normalize edilmiş soru ile anahtarlanır, şema sürümünü (DDL parmak izi) taşır ve TTL
+    sonunda ya da şema değiştiğinde geçersiz sayılır. Tekrar eden sorular LLM'e gitmeden bu SQL ile
+    doğrudan veritabanında çalıştırılır.
+    """
+
+    def __init__(self, ttl=SQL_QUERY_CACHE_TTL_SECONDS, max_entries=SQL_QUERY_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.schema_invalidations = 0
+
+    def get(self, question, schema_version=None):
+        """Geçerli kaydı döndürür; yoksa, süresi dolduysa veya şema değiştiyse None."""
+        key = question_key(question)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry['expires_at'] <= time.time():
+                del self._data[key]
+                self.expirations += 1
+                entry = None
+            if entry is not None and schema_version and entry['schema_version'] != schema_version:
+                del self._data[key]
+                self.schema_invalidations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            entry['hits'] += 1
+            entry['last_used_at'] = time.time()
+            return dict(entry)
+
+    def put(self, question, sql, schema_version=None):
+        """Okuma yapan bir SQL'i soruya bağlar; diğer ifadeleri yok sayar."""
+        if not sql or not READ_ONLY_PATTERN.match(sql):
+            return None
+        key = question_key(question)
+        now = time.time()
+        entry = {
+            'key': key,
+            'question': question,
+            'normalized_question': normalize_sql_question(question),
+            'sql': sql.strip().rstrip(';'),
+            'schema_version': schema_version,
+            'created_at': now,
+            'expires_at': now + self.ttl,
+            'last_used_at': None,
+            'hits': 0,
+        }
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            self.stores += 1
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return key
+
+    def evict(self, key=None, question=None):
+        """Anahtarı veya soruyu verilen kaydı siler; ikisi de yoksa tüm önbelleği boşaltır."""
+        with self._lock:
+            if key is None and question is None:
+                removed = len(self._data)
+                self._data.clear()
+                return removed
+            key = key or question_key(question)
+            return 1 if self._data.pop(key, None) is not None else 0
+
+    def entries(self):
+        """Süresi dolmamış kayıtları en son kullanılan önce olacak şekilde döndürür."""
+        now = time.time()
+        with self._lock:
+            return [dict(entry) for entry in reversed(self._data.values()) if entry['expires_at'] > now]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': 'sql_queries',
+                'entries': len(self._data),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'schema_invalidations': self.schema_invalidations,
+            }
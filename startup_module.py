@@ -0,0 +1,167 @@
+# startup_module.py
+import os
+import threading
+import time
+import traceback
+
+# background: alt sistemler açılışta arka plan thread'inde hazırlanır
+# lazy: her alt sistem ilk kullanıldığında hazırlanır
+STARTUP_WARMUP = os.getenv('STARTUP_WARMUP', 'background')
+# Başlatılamayan bir alt sistemin yeniden denenmeden önce beklenecek süre
+STARTUP_RETRY_SECONDS = float(os.getenv('STARTUP_RETRY_SECONDS', '30'))
+
+PENDING = 'pending'
+INITIALIZING = 'initializing'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class Subsystem:
+    """Ağır bir bileşeni bir kez ve thread-safe biçimde başlatan sarmalayıcı."""
+
+    def __init__(self, name, init_func, required=True, retry_after=STARTUP_RETRY_SECONDS):
+        self.name = name
+        self.init_func = init_func
+        self.required = required
+        self.retry_after = retry_after
+        self.failed_at = None
+        self.state = PENDING
+        self.value = None
+        self.error = None
+        self.started_at = None
+        self.duration_ms = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def _retry_due(self):
+        return self.state == FAILED and time.time() - (self.failed_at or 0) >= self.retry_after
+
+    def initialize(self):
+        """Alt sistemi başlatır; başka bir thread başlatıyorsa onun bitmesini bekler.
+
+        Başarısız olan alt sistem retry_after saniye geçtikten sonraki çağrıda yeniden denenir.
+        """
+        with self._lock:
+            if self.state == READY or (self.state == FAILED and not self._retry_due()):
+                return self.value
+            if self.state == INITIALIZING:
+                owner = False
+            else:
+                owner = True
+                self.state = INITIALIZING
+                self.started_at = time.time()
+                self._done.clear()
+        if not owner:
+            self._done.wait()
+            return self.value
+
+        started = time.perf_counter()
+        value = None
+        error = None
+        try:
+            value = self.init_func()
+        except Exception as e:
+            error = str(e)
+            print(f"{self.name} başlatma hatası: {error}")
+            traceback.print_exc()
+        with self._lock:
+            self.value = value
+            self.error = error
+            # init_func None döndürürse (örn. API anahtarı yok) alt sistem kullanılamaz sayılır
+            self.state = READY if error is None and value is not None else FAILED
+            self.failed_at = time.time() if self.state == FAILED else None
+            self.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        self._done.set()
+        print(f"{self.name} alt sistemi {self.state} ({self.duration_ms} ms)")
+        return value
+
+    def start_initialize(self):
+        """Başlatılmamış veya yeniden deneme zamanı gelmiş alt sistemi arka planda başlatır."""
+        with self._lock:
+            if not (self.state == PENDING or self._retry_due()):
+                return
+        threading.Thread(target=self.initialize, name=f'init-{self.name}', daemon=True).start()
+
+    def get(self):
+        """Hazırsa değeri döndürür, henüz başlatılmadıysa şimdi başlatır."""
+        if self.state == READY:
+            return self.value
+        return self.initialize()
+
+    def set(self, value):
+        """Alt sistemi dışarıdan (örn. yeniden kurulumdan sonra) günceller."""
+        with self._lock:
+            self.value = value
+            self.error = None
+            self.state = READY if value is not None else FAILED
+        self._done.set()
+
+    def reset(self):
+        """Bir sonraki get() çağrısında yeniden başlatılmasını sağlar."""
+        with self._lock:
+            if self.state != INITIALIZING:
+                self.state = PENDING
+                self.value = None
+
+    def status(self):
+        return {
+            'state': self.state,
+            'required': self.required,
+            'duration_ms': self.duration_ms,
+            'started_at': self.started_at,
+            'error': self.error,
+            'retry_in_seconds': round(max(0.0, self.failed_at + self.retry_after - time.time()), 2)
+            if self.state == FAILED and self.failed_at else None,
+        }
+
+
+class SubsystemRegistry:
+    """Alt sistemleri ve hazır olma denetimlerini bir arada tutar."""
+
+    def __init__(self):
+        self.subsystems = {}
+        self.probes = {}
+        self.created_at = time.time()
+        self._thread = None
+
+    def register(self, name, init_func, required=True):
+        subsystem = Subsystem(name, init_func, required)
+        self.subsystems[name] = subsystem
+        return subsystem
+
+    def add_probe(self, name, probe, required=True):
+        """Kendi yaşam döngüsü olan bileşenler için hazır olma denetimi ekler (probe() -> bool)."""
+        self.probes[name] = (probe, required)
+
+    def _warm_up(self):
+        for subsystem in list(self.subsystems.values()):
+            subsystem.initialize()
+
+    def start_background_warmup(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._warm_up, name='startup-warmup', daemon=True)
+            self._thread.start()
+
+    def ensure_required(self):
+        """Hazır olmayan zorunlu alt sistemlerin başlatılmasını (veya yeniden denenmesini) tetikler."""
+        for subsystem in self.subsystems.values():
+            if subsystem.required and subsystem.state != READY:
+                subsystem.start_initialize()
+
+    def status(self):
+        components = {name: s.status() for name, s in self.subsystems.items()}
+        ready = all(s.state == READY for s in self.subsystems.values() if s.required)
+        for name, (probe, required) in self.probes.items():
+            try:
+                ok = bool(probe())
+                components[name] = {'state': READY if ok else INITIALIZING, 'required': required}
+            except Exception as e:
+                ok = False
+                components[name] = {'state': FAILED, 'required': required, 'error': str(e)}
+            if required and not ok:
+                ready = False
+        return {
+            'ready': ready,
+            'uptime_seconds': round(time.time() - self.created_at, 2),
+            'subsystems': components,
+        }
@@ -0,0 +1,49 @@
+# tests/test_cache_module.py
+from cache_module import ReadThroughCache, SharedDictCacheBackend
+
+
+def test_get_or_load_caches_and_skips_none():
+    cache = ReadThroughCache('test', ttl=60, max_entries=10)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return 'değer'
+
+    assert cache.get_or_load('k', loader) == 'değer'
+    assert cache.get_or_load('k', loader) == 'değer'
+    assert len(calls) == 1
+    assert cache.get_or_load('none', lambda: None) is None
+    assert cache.stats()['entries'] == 1
+
+
+def test_invalidate_during_load_does_not_store_stale_value():
+    cache = ReadThroughCache('test', ttl=60, max_entries=10)
+
+    def stale_loader():
+        # Değer okunduktan sonra, önbelleğe yazılmadan önce kayıt güncellenir
+        cache.invalidate('k')
+        return 'eski'
+
+    assert cache.get_or_load('k', stale_loader) == 'eski'
+    assert cache.get_or_load('k', lambda: 'yeni') == 'yeni'
+    assert cache.stats()['stale_loads'] == 1
+
+    def clearing_loader():
+        cache.clear()
+        return 'eski'
+
+    cache.get_or_load('j', clearing_loader)
+    assert cache.get_or_load('j', lambda: 'yeni') == 'yeni'
+    assert cache._inflight == {}
+
+
+def test_shared_backend_is_used_instead_of_local_layer():
+    store = {}
+    cache = ReadThroughCache('test', ttl=60, max_entries=10, shared_backend=SharedDictCacheBackend(store))
+    cache.get_or_load('k', lambda: 1)
+    assert cache.get_or_load('k', lambda: 2) == 1
+    assert cache.stats()['shared_hits'] == 1 and cache.stats()['entries'] == 0
+
+    cache.invalidate('k')
+    assert cache.get_or_load('k', lambda: 2) == 2
@@ -0,0 +1,59 @@
+# tests/test_embedding_cache_module.py
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('langchain_core')
+
+from embedding_cache_module import EmbeddingStore
+
+
+def vec(x):
+    return [float(x), float(x) + 0.5]
+
+
+def test_put_and_get_round_trip_across_instances(tmp_path):
+    store = EmbeddingStore(str(tmp_path), max_entries=8)
+    store.put_many([('a', vec(1)), ('b', vec(2))])
+
+    reopened = EmbeddingStore(str(tmp_path), max_entries=8)
+    assert reopened.get_many(['a', 'b', 'missing']) == {'a': vec(1), 'b': vec(2)}
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    store = EmbeddingStore(str(tmp_path), max_entries=2)
+    store.put_many([('a', vec(1)), ('b', vec(2))])
+    # 'a' okunduğu için 'b' en eski kayıt olur
+    store.get_many(['a'])
+    store.put_many([('c', vec(3))])
+
+    assert store.get_many(['a', 'b', 'c']) == {'a': vec(1), 'c': vec(3)}
+    assert store.evictions == 1
+
+
+def test_reads_reach_disk_order_on_next_write(tmp_path):
+    writer = EmbeddingStore(str(tmp_path), max_entries=3)
+    writer.put_many([('a', vec(1)), ('b', vec(2))])
+    other = EmbeddingStore(str(tmp_path), max_entries=3)
+    writer.get_many(['a'])
+    # Başka bir sürecin yazması diskteki sırayı yeniden okutur; 'a' okuması kaybolmamalı
+    other.put_many([('x', vec(9))])
+    writer.put_many([('c', vec(3))])
+
+    reopened = EmbeddingStore(str(tmp_path), max_entries=3)
+    assert set(reopened.get_many(['a', 'b', 'x', 'c'])) == {'a', 'x', 'c'}
+
+
+def test_put_many_larger_than_capacity_keeps_last_entries(tmp_path):
+    store = EmbeddingStore(str(tmp_path), max_entries=4)
+    store.put_many([(f'k{i}', vec(i)) for i in range(10)] + [('k9', vec(99))])
+
+    assert len(store) == 4
+    assert store.get_many([f'k{i}' for i in range(10)]) == {
+        'k6': vec(6), 'k7': vec(7), 'k8': vec(8), 'k9': vec(99)}
+
+
+def test_dimension_mismatch_is_rejected(tmp_path):
+    store = EmbeddingStore(str(tmp_path), max_entries=4)
+    store.put_many([('a', vec(1))])
+    with pytest.raises(ValueError):
+        store.put_many([('b', [1.0, 2.0, 3.0])])
@@ -0,0 +1,75 @@
+# tests/test_leaderboard_module.py
+import random
+import threading
+
+import pytest
+
+from leaderboard_module import IndexableSkipList, Leaderboard, LeaderboardService
+
+
+def test_skip_list_rank_slice_remove_match_sorted_list():
+    rng = random.Random(7)
+    skip_list = IndexableSkipList()
+    expected = []
+    for key in rng.sample(range(10000), 500):
+        skip_list.insert(key)
+        expected.append(key)
+    for key in rng.sample(expected, 200):
+        skip_list.remove(key)
+        expected.remove(key)
+    expected.sort()
+
+    assert len(skip_list) == len(expected)
+    assert skip_list.slice(0, len(expected)) == expected
+    assert skip_list.slice(100, 10) == expected[100:110]
+    for index in rng.sample(range(len(expected)), 50):
+        assert skip_list.rank(expected[index]) == index
+
+
+def test_skip_list_missing_key_raises():
+    skip_list = IndexableSkipList()
+    skip_list.insert(1)
+    with pytest.raises(KeyError):
+        skip_list.rank(2)
+    with pytest.raises(KeyError):
+        skip_list.remove(2)
+
+
+def test_leaderboard_orders_by_score_then_profile_id():
+    board = Leaderboard('highest_score')
+    board.upsert(3, 100)
+    board.upsert(1, 100)
+    board.upsert(2, 250)
+    board.upsert(3, 300)  # mevcut profilin skoru güncellenir
+    assert board.slice(0, 10) == [(0, 300, 3), (1, 250, 2), (2, 100, 1)]
+    assert board.rank(1) == 2
+    board.remove(2)
+    assert board.rank(1) == 1
+    assert len(board) == 2
+
+
+def test_reconcile_keeps_refreshes_and_removals_made_during_load():
+    service = LeaderboardService(connection_factory=None)
+    loading = threading.Event()
+    resume = threading.Event()
+
+    def fetch_rows(extra_where="", params=None):
+        if extra_where:
+            # refresh_profiles: profil 1 yükleme sırasında yeni bir oyun oynadı
+            yield (1, 10, 'a', 50, 55, 2)
+            return
+        yield (1, 10, 'a', 5, 5, 1)
+        loading.set()
+        resume.wait()
+        yield (2, 20, 'b', 7, 7, 1)
+
+    service._fetch_rows = fetch_rows
+    thread = threading.Thread(target=service.reconcile)
+    thread.start()
+    loading.wait()
+    service.refresh_profiles([1])
+    service.remove_user(20)
+    resume.set()
+    thread.join()
+
+    assert service.top('highest_score', 5) == [{'rank': 1, 'profile_id': 1, 'nickname': 'a', 'value': 50}]
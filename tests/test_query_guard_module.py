@@ -0,0 +1,70 @@
+# tests/test_query_guard_module.py
+from query_guard_module import ALLOW, REJECT, REWRITE, QueryGuard, QueryPlan, add_row_limit, is_parse_error
+
+
+def plan(cost, cardinality, options=None):
+    return QueryPlan([{'id': 0, 'operation': 'SELECT STATEMENT', 'options': options, 'object_name': None,
+                       'cost': cost, 'cardinality': cardinality}])
+
+
+class FakeOracleError:
+    def __init__(self, full_code):
+        self.full_code = full_code
+
+
+def make_guard(explain, mode='enforce'):
+    guard = QueryGuard(connection_factory=None, mode=mode, max_cost=100, max_cardinality=1000,
+                       rewrite_rows=50, log_file='')
+    guard.explain = explain
+    return guard
+
+
+def test_add_row_limit():
+    assert add_row_limit("SELECT * FROM player_stats;  ", 10) == "SELECT * FROM player_stats FETCH FIRST 10 ROWS ONLY"
+    assert add_row_limit("SELECT * FROM t FETCH NEXT 5 ROWS ONLY", 10) is None
+    assert add_row_limit("SELECT * FROM t WHERE ROWNUM <= 5", 10) is None
+    assert add_row_limit("SELECT * FROM t FOR UPDATE", 10) is None
+
+
+def test_is_parse_error():
+    assert is_parse_error(Exception(FakeOracleError('ORA-00942')))
+    assert is_parse_error(Exception("ORA-01756: quoted string not properly terminated"))
+    assert not is_parse_error(Exception(FakeOracleError('DPY-4024')))
+    assert not is_parse_error(Exception("ORA-03156: OCI call timed out"))
+
+
+def test_cheap_query_is_allowed_and_expensive_one_is_rewritten():
+    guard = make_guard(lambda sql: plan(10, 10) if 'FETCH FIRST' in sql else plan(500, 50000))
+    decision = guard.check("SELECT * FROM player_stats", 'agent')
+    assert decision.action == REWRITE
+    assert decision.sql.endswith("FETCH FIRST 50 ROWS ONLY")
+    assert decision.original_sql == "SELECT * FROM player_stats"
+
+    guard = make_guard(lambda sql: plan(10, 10))
+    assert guard.check("SELECT 1 FROM dual", 'agent').action == ALLOW
+
+
+def test_cartesian_and_still_expensive_queries_are_rejected():
+    guard = make_guard(lambda sql: plan(10, 10, 'CARTESIAN'))
+    assert guard.check("SELECT * FROM a, b", 'agent').action == REJECT
+
+    guard = make_guard(lambda sql: plan(500, 50000))
+    assert guard.check("SELECT COUNT(*) FROM player_stats", 'agent').action == REJECT
+
+
+def test_explain_failures_fail_closed_except_parse_errors():
+    def timeout(sql):
+        raise Exception(FakeOracleError('DPY-4024'))
+
+    def parse_error(sql):
+        raise Exception(FakeOracleError('ORA-00904'))
+
+    assert make_guard(timeout).check("SELECT * FROM player_stats", 'agent').action == REJECT
+    assert make_guard(parse_error).check("SELECT nope FROM player_stats", 'agent').action == ALLOW
+
+
+def test_log_mode_never_blocks():
+    guard = make_guard(lambda sql: plan(10, 10, 'CARTESIAN'), mode='log')
+    decision = guard.check("SELECT * FROM a, b", 'agent')
+    assert decision.action == ALLOW and decision.reason.startswith('[log] reject')
+    assert guard.stats()['allowed'] == 1
@@ -0,0 +1,95 @@
+# tests/test_question_router_module.py
+from contextlib import contextmanager
+
+from question_router_module import QuestionRouter, normalize_text
+
+
+class FakeCursor:
+    def __init__(self, rows, executed):
+        self.rows = rows
+        self.executed = executed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params):
+        self.executed.append((' '.join(sql.split()), params))
+
+    def fetchone(self):
+        return self.rows.pop(0)
+
+
+class FakeConnection:
+    def __init__(self, rows, executed):
+        self.rows = rows
+        self.executed = executed
+
+    def cursor(self):
+        return FakeCursor(self.rows, self.executed)
+
+
+def make_factory(rows, executed):
+    @contextmanager
+    def factory():
+        yield FakeConnection(rows, executed)
+    return factory
+
+
+class FakeLeaderboard:
+    ready = True
+
+    def top(self, metric, n):
+        entries = [{'rank': 1, 'nickname': 'ayse', 'value': 900.0},
+                   {'rank': 2, 'nickname': 'mehmet', 'value': 750.5}]
+        return entries[:n]
+
+    def rank_of_user(self, metric, user_id):
+        return [{'nickname': 'mehmet', 'rank': 2, 'value': 750.5}] if user_id == 7 else []
+
+
+def test_normalize_text_folds_turkish_dotted_capital_i():
+    assert normalize_text("En  İyi   Oyuncu") == normalize_text("en iyi oyuncu") == "en iyi oyuncu"
+
+
+def test_leaderboard_templates_answer_without_database():
+    router = QuestionRouter(make_factory([], []), leaderboard=FakeLeaderboard())
+
+    top = router.route("En iyi 2 oyuncu kimler?")
+    assert top['route'] == 'top_players'
+    assert '1. ayse - 900' in top['answer'] and '2. mehmet - 750.5' in top['answer']
+
+    assert router.route("Kaçıncıyım?", user_id=7)['route'] == 'my_rank'
+    assert 'Henüz sıralamada' in router.route("Sıram ne?", user_id=8)['answer']
+    assert router.route("Who has the highest score?")['answer'].startswith('En yüksek skora sahip oyuncu ayse')
+
+
+def test_level_questions_use_level_parameter_and_cache():
+    executed = []
+    router = QuestionRouter(make_factory([(12,)], executed))
+
+    first = router.route("Seviye 5 kaç oyuncu var?")
+    second = router.route("How many players are at level 5?")
+    assert first['route'] == second['route'] == 'player_count_at_level'
+    assert first['answer'] == "Seviye 5 olan 12 oyuncu var."
+    assert len(executed) == 1 and executed[0][1] == {'player_level': 5}
+
+
+def test_unmatched_or_unavailable_questions_fall_back_to_rag():
+    router = QuestionRouter(make_factory([], []))
+    assert router.route("Oyunun hikayesi nedir?") is None
+    # Liderlik tablosu yokken sıralama sorusu yanıtlanamaz
+    assert router.route("Sıram kaç?", user_id=1) is None
+
+
+def test_handler_errors_are_counted_and_skipped():
+    @contextmanager
+    def broken():
+        raise RuntimeError("veritabanı kapalı")
+        yield
+
+    router = QuestionRouter(broken)
+    assert router.route("Kaç oyuncu var?") is None
+    assert router.stats()['errors'] == {'player_count': 1}
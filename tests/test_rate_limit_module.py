@@ -0,0 +1,67 @@
+# tests/test_rate_limit_module.py
+import rate_limit_module
+from rate_limit_module import LocalRateLimitBackend, RateLimiter, SharedDictRateLimitBackend
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRole:
+    role_name = 'player'
+    rate_limit = 3
+
+
+def test_bucket_allows_burst_then_refills_over_time(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit_module.time, 'monotonic', clock)
+    backend = LocalRateLimitBackend()
+
+    results = [backend.consume('u', capacity=3, refill_per_second=1)[0] for _ in range(4)]
+    assert results == [True, True, True, False]
+
+    allowed, tokens, retry_after = backend.consume('u', capacity=3, refill_per_second=1)
+    assert not allowed and retry_after == 1
+
+    clock.now += 1.5
+    assert backend.consume('u', capacity=3, refill_per_second=1)[0]
+    # Kova kapasitenin üstüne dolmaz
+    clock.now += 100
+    assert [backend.consume('u', capacity=3, refill_per_second=1)[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_least_recently_used_buckets_are_dropped(monkeypatch):
+    monkeypatch.setattr(rate_limit_module.time, 'monotonic', FakeClock())
+    backend = LocalRateLimitBackend(max_buckets=2)
+    for key in ('a', 'b', 'c'):
+        backend.consume(key, capacity=1, refill_per_second=1)
+    assert len(backend) == 2
+    # 'a' atıldığı için dolu bir kovayla yeniden başlar
+    assert backend.consume('a', capacity=1, refill_per_second=1)[0]
+
+
+def test_shared_backend_uses_the_given_store(monkeypatch):
+    import threading
+    monkeypatch.setattr(rate_limit_module.time, 'time', FakeClock())
+    store = {}
+    backend = SharedDictRateLimitBackend(store, threading.Lock())
+    assert backend.consume('u', capacity=1, refill_per_second=1)[0]
+    assert not backend.consume('u', capacity=1, refill_per_second=1)[0]
+    assert 'u' in store
+
+
+def test_rate_limiter_headers_and_stats(monkeypatch):
+    monkeypatch.setattr(rate_limit_module.time, 'monotonic', FakeClock())
+    limiter = RateLimiter(window_seconds=1)
+    outcomes = [limiter.check(42, FakeRole()) for _ in range(4)]
+
+    assert [allowed for allowed, _ in outcomes] == [True, True, True, False]
+    assert outcomes[0][1]['X-RateLimit-Limit'] == '3'
+    assert outcomes[2][1]['X-RateLimit-Remaining'] == '0'
+    assert outcomes[3][1]['Retry-After'] == '1'
+    stats = limiter.stats()
+    assert (stats['allowed'], stats['rejected'], stats['buckets']) == (3, 1, 1)
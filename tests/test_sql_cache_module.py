@@ -0,0 +1,51 @@
+# tests/test_sql_cache_module.py
+import sql_cache_module
+from sql_cache_module import READ_ONLY_PATTERN, SQLQueryCache, normalize_sql_question, question_key
+
+
+def test_normalisation_ignores_case_punctuation_and_filler_words():
+    assert normalize_sql_question("Lütfen  bana kaç oyuncu var?") == "kaç oyuncu var"
+    assert question_key("How many players, please?") == question_key("how many players")
+    assert question_key("kaç oyuncu var") != question_key("kaç profil var")
+
+
+def test_read_only_pattern():
+    assert READ_ONLY_PATTERN.match("  select * from player_stats")
+    assert READ_ONLY_PATTERN.match("WITH t AS (SELECT 1 FROM dual) SELECT * FROM t")
+    assert not READ_ONLY_PATTERN.match("DELETE FROM player_stats")
+    assert not READ_ONLY_PATTERN.match("selection")
+
+
+def test_put_and_get_with_schema_invalidation():
+    cache = SQLQueryCache(ttl=60, max_entries=10)
+    assert cache.put("Kaç oyuncu var?", "SELECT COUNT(*) FROM player_profiles;", schema_version='v1')
+
+    entry = cache.get("kaç oyuncu var", schema_version='v1')
+    assert entry['sql'] == "SELECT COUNT(*) FROM player_profiles"
+    assert cache.get("kaç oyuncu var", schema_version='v2') is None
+    assert cache.get("kaç oyuncu var", schema_version='v1') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['schema_invalidations']) == (1, 2, 1)
+
+
+def test_write_statements_are_not_cached():
+    cache = SQLQueryCache(ttl=60, max_entries=10)
+    assert cache.put("oyuncuları sil", "DELETE FROM player_profiles") is None
+    assert cache.put("boş", "") is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_expiry_and_lru_eviction(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(sql_cache_module.time, 'time', lambda: now[0])
+    cache = SQLQueryCache(ttl=10, max_entries=2)
+    cache.put("a", "SELECT 1 FROM dual")
+    cache.put("b", "SELECT 2 FROM dual")
+    cache.get("a")
+    cache.put("c", "SELECT 3 FROM dual")
+    assert cache.get("b") is None and cache.get("a") is not None
+
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.stats()['expirations'] == 1
+    assert cache.stats()['evictions'] == 1
@@ -0,0 +1,313 @@
+# vector_store_module.py
+import os
+import pickle
+import threading
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from bm25_module import matches_filter
+
+# chroma: Chroma (SQLite + HNSW); numpy: bellek eşlemeli nicemlenmiş matris üzerinde tam arama
+RAG_VECTOR_STORE = os.getenv('RAG_VECTOR_STORE', 'chroma')
+# numpy deposunda vektörlerin saklanma biçimi: float16 veya int8 (satır başına ölçekli)
+RAG_NUMPY_DTYPE = os.getenv('RAG_NUMPY_DTYPE', 'float16')
+# Arama sırasında tek seferde çarpılan satır sayısı; geçici bellek kullanımını sınırlar
+RAG_NUMPY_SEARCH_BATCH = int(os.getenv('RAG_NUMPY_SEARCH_BATCH', '65536'))
+
+META_FILE = 'numpy_store.pkl'
+INITIAL_CAPACITY = 1024
+
+
+def detect_store_kind(directory):
+    """Bir indeks dizininin hangi depo ile oluşturulduğunu döndürür (yoksa None)."""
+    if os.path.exists(os.path.join(directory, META_FILE)):
+        return 'numpy'
+    if os.path.exists(os.path.join(directory, 'chroma.sqlite3')):
+        return 'chroma'
+    return None
+
+
+class NumpyVectorStore(VectorStore):
+    """Normalize edilmiş embedding'leri bitişik, bellek eşlemeli bir matriste tutan vektör deposu.
+
+    Matris dosyası işletim sistemi sayfa önbelleği üzerinden worker'lar arasında paylaşılır.
+    Arama kosinüs benzerliğiyle, satır partileri halinde matris çarpımıyla yapılan tam top-k'dır.
+    Doküman metinleri ve metadata ayrı bir pickle dosyasında tutulur. Chroma'nın RAGSystem
+    tarafından kullanılan arayüzünü (add_documents, delete, get, similarity_search, persist) taklit eder.
+
+    Diğer worker'lar aynı nesli açık tuttuğu için depo sadece eklemelidir: silinen veya güncellenen
+    dokümanın satırı ölü işaretlenir ve hiçbir zaman yeniden kullanılmaz, yeni vektör sona eklenir.
+    Diğer süreçler metadata dosyasının sürümü değiştiğinde onu yeniden okur ve sadece kaydedilmiş
+    satırları görür. Ölü satırlar tam yenilemede yeni bir nesil oluşturulurken temizlenir.
+    Bir nesle aynı anda tek bir süreç yazmalıdır.
+    """
+
+    def __init__(self, persist_directory, embedding_function, dtype=RAG_NUMPY_DTYPE):
+        if dtype not in ('float16', 'int8'):
+            raise ValueError(f"Desteklenmeyen vektör tipi: {dtype}")
+        self.persist_directory = persist_directory
+        self.embedding_function = embedding_function
+        self.dtype = dtype
+        self._lock = threading.RLock()
+        self.dim = None
+        self.capacity = 0
+        self.size = 0
+        self.ids = []
+        self.texts = []
+        self.metadatas = []
+        self.row_of = {}
+        self.version = 0
+        self._meta_stamp = None
+        self._vectors = None
+        self._scales = None
+        self._alive = np.zeros(0, dtype=bool)
+        os.makedirs(persist_directory, exist_ok=True)
+        self._load()
+
+    @property
+    def embeddings(self):
+        return self.embedding_function
+
+    # --- Dosya yönetimi ---
+
+    def _path(self, name):
+        return os.path.join(self.persist_directory, name)
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self._path(META_FILE))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        meta_path = self._path(META_FILE)
+        stamp = self._stamp()
+        if stamp is None:
+            return
+        with open(meta_path, 'rb') as f:
+            meta = pickle.load(f)
+        self._meta_stamp = stamp
+        if meta['dim'] is None or (meta.get('version', 0) == self.version and self._vectors is not None):
+            return
+        self.dtype = meta['dtype']
+        self.dim = meta['dim']
+        self.size = meta['size']
+        self.ids = meta['ids']
+        self.texts = meta['texts']
+        self.metadatas = meta['metadatas']
+        self.version = meta.get('version', 0)
+        self.row_of = {doc_id: row for row, doc_id in enumerate(self.ids) if doc_id is not None}
+        self._open(meta['capacity'])
+        self._alive = np.zeros(self.capacity, dtype=bool)
+        self._alive[list(self.row_of.values())] = True
+
+    def _refresh(self):
+        """Başka bir süreç metadata dosyasını yeniden yazdıysa onu yükler (kilit altında çağrılır)."""
+        if self._stamp() != self._meta_stamp:
+            self._load()
+
+    def _open(self, capacity):
+        vector_dtype = np.float16 if self.dtype == 'float16' else np.int8
+        itemsize = np.dtype(vector_dtype).itemsize
+        self._vectors = self._open_memmap('vectors.bin', vector_dtype, (capacity, self.dim), capacity * self.dim * itemsize)
+        if self.dtype == 'int8':
+            self._scales = self._open_memmap('scales.bin', np.float32, (capacity,), capacity * 4)
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self._alive)] = self._alive[:capacity]
+        self._alive = alive
+        self.capacity = capacity
+
+    def _open_memmap(self, name, dtype, shape, size):
+        path = self._path(name)
+        if not os.path.exists(path):
+            open(path, 'wb').close()
+        if os.path.getsize(path) < size:
+            with open(path, 'r+b') as f:
+                f.truncate(size)
+        return np.memmap(path, dtype=dtype, mode='r+', shape=shape)
+
+    def _ensure_capacity(self, needed):
+        if needed <= self.capacity:
+            return
+        capacity = max(self.capacity, INITIAL_CAPACITY)
+        while capacity < needed:
+            capacity *= 2
+        if self._vectors is not None:
+            self._vectors.flush()
+        self._open(capacity)
+
+    # --- Vektör işlemleri ---
+
+    @staticmethod
+    def _normalize(vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _write_rows(self, rows, vectors):
+        if self.dtype == 'float16':
+            self._vectors[rows] = vectors.astype(np.float16)
+        else:
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            self._vectors[rows] = np.round(vectors / scales[:, None]).astype(np.int8)
+            self._scales[rows] = scales
+
+    def add_vectors(self, ids, vectors, texts=None, metadatas=None):
+        """Hazır embedding'leri sona ekler; aynı kimlik varsa eski satırı ölü işaretler."""
+        vectors = self._normalize(vectors)
+        texts = texts or [""] * len(ids)
+        metadatas = metadatas or [{}] * len(ids)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding boyutu uyuşmuyor: {vectors.shape[1]} != {self.dim}")
+            self._refresh()
+            rows = []
+            for doc_id in ids:
+                # Satırlar yerinde güncellenmez; diğer worker'lar eski satırı eski metadata ile okuyor olabilir
+                self._kill(doc_id)
+                rows.append(self.size)
+                self.size += 1
+                self.ids.append(None)
+                self.texts.append(None)
+                self.metadatas.append(None)
+            self._ensure_capacity(self.size)
+            self._write_rows(np.asarray(rows), vectors)
+            for row, doc_id, text, metadata in zip(rows, ids, texts, metadatas):
+                self.ids[row] = doc_id
+                self.texts[row] = text
+                self.metadatas[row] = metadata or {}
+                self.row_of[doc_id] = row
+                self._alive[row] = True
+        return list(ids)
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        if ids is None:
+            raise ValueError("NumpyVectorStore kararlı doküman kimlikleri gerektirir")
+        vectors = self.embedding_function.embed_documents(texts)
+        return self.add_vectors(list(ids), vectors, texts, list(metadatas) if metadatas else None)
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, persist_directory=None, **kwargs):
+        store = cls(persist_directory, embedding)
+        store.add_texts(texts, metadatas, ids)
+        return store
+
+    def _kill(self, doc_id):
+        row = self.row_of.pop(doc_id, None)
+        if row is None:
+            return
+        self._alive[row] = False
+        self.ids[row] = None
+        self.texts[row] = None
+        self.metadatas[row] = None
+
+    def delete(self, ids=None, **kwargs):
+        with self._lock:
+            self._refresh()
+            for doc_id in ids or []:
+                self._kill(doc_id)
+        return True
+
+    def _filter_mask(self, where):
+        mask = self._alive[:self.size].copy()
+        if where is not None:
+            for row in np.flatnonzero(mask):
+                if not matches_filter(self.metadatas[row], where):
+                    mask[row] = False
+        return mask
+
+    def search_vectors(self, query_vector, k=4, where=None):
+        """En benzer k satırı (satır, benzerlik) olarak döndürür."""
+        query = self._normalize([query_vector])[0]
+        with self._lock:
+            self._refresh()
+            if self.size == 0:
+                return []
+            mask = self._filter_mask(where)
+            best_rows = np.empty(0, dtype=np.int64)
+            best_scores = np.empty(0, dtype=np.float32)
+            for start in range(0, self.size, RAG_NUMPY_SEARCH_BATCH):
+                end = min(start + RAG_NUMPY_SEARCH_BATCH, self.size)
+                batch_mask = mask[start:end]
+                if not batch_mask.any():
+                    continue
+                block = np.asarray(self._vectors[start:end], dtype=np.float32)
+                scores = block @ query
+                if self.dtype == 'int8':
+                    scores *= self._scales[start:end]
+                scores[~batch_mask] = -np.inf
+                take = min(k, int(batch_mask.sum()))
+                top = np.argpartition(-scores, take - 1)[:take]
+                best_rows = np.concatenate([best_rows, top + start])
+                best_scores = np.concatenate([best_scores, scores[top]])
+            if not len(best_rows):
+                return []
+            order = np.argsort(-best_scores)[:k]
+            return [(int(best_rows[i]), float(best_scores[i])) for i in order]
+
+    def _document(self, row):
+        return Document(page_content=self.texts[row], metadata=dict(self.metadatas[row]))
+
+    def similarity_search_with_score(self, query, k=4, filter=None, **kwargs):
+        query_vector = self.embedding_function.embed_query(query)
+        return [(self._document(row), score) for row, score in self.search_vectors(query_vector, k, filter)]
+
+    def similarity_search(self, query, k=4, filter=None, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("documents", "metadatas")):
+        """Chroma.get ile aynı biçimde {'ids', 'documents', 'metadatas'} döndürür."""
+        with self._lock:
+            self._refresh()
+            if ids is not None:
+                rows = [self.row_of[doc_id] for doc_id in ids if doc_id in self.row_of]
+            else:
+                rows = [int(row) for row in np.flatnonzero(self._filter_mask(where))]
+            if ids is not None and where is not None:
+                rows = [row for row in rows if matches_filter(self.metadatas[row], where)]
+            rows = rows[offset or 0:]
+            if limit is not None:
+                rows = rows[:limit]
+            return {
+                'ids': [self.ids[row] for row in rows],
+                'documents': [self.texts[row] for row in rows] if 'documents' in include else None,
+                'metadatas': [self.metadatas[row] for row in rows] if 'metadatas' in include else None,
+            }
+
+    def count(self):
+        with self._lock:
+            self._refresh()
+            return len(self.row_of)
+
+    def persist(self):
+        """Vektörleri diske yazar ve metadata dosyasını atomik olarak kaydeder."""
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+            if self._scales is not None:
+                self._scales.flush()
+            self.version += 1
+            meta = {
+                'version': self.version,
+                'dtype': self.dtype,
+                'dim': self.dim,
+                'size': self.size,
+                'capacity': self.capacity,
+                'ids': self.ids,
+                'texts': self.texts,
+                'metadatas': self.metadatas,
+            }
+            meta_path = self._path(META_FILE)
+            tmp_path = meta_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(meta, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, meta_path)
+            self._meta_stamp = self._stamp()